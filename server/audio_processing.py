@@ -0,0 +1,422 @@
+# audio_processing.py
+
+import io
+import os
+import wave
+import queue
+import threading
+import subprocess
+from typing import Optional, Tuple
+
+# 规范 PCM 格式：单条对话解码后统一转换为该格式，后续处理与合并都不再需要重采样
+PCM_SAMPLE_RATE = 44100
+PCM_CHANNELS = 1
+PCM_SAMPLE_WIDTH = 2 # 16-bit little-endian
+
+def _require_numpy():
+    try:
+        import numpy as np # 延迟导入 numpy
+    except ImportError:
+        raise ImportError("The 'numpy' module is required for in-process audio processing. Please install it using 'pip install numpy'.")
+    return np
+
+def effects_filter(volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> Optional[str]:
+    """
+    返回实现音量和速度调整的 ffmpeg 滤镜链；无需调整时返回 None。
+
+    volume_adjustment 为增益（dB），speed_adjustment 为语速百分比（10 表示 +10%）。速度调整使用 atempo（WSOLA，
+    不改变音高）；单个 atempo 的倍率限制在 [0.5, 2.0]，超出范围时串联多个。
+    """
+    filters = []
+    if volume_adjustment:
+        filters.append(f"volume={volume_adjustment}dB")
+    if speed_adjustment:
+        tempo = 1 + speed_adjustment / 100.0
+        if tempo <= 0:
+            raise ValueError(f"Invalid speed_adjustment: {speed_adjustment}. The resulting speed must be positive.")
+        while tempo > 2.0:
+            filters.append("atempo=2.0")
+            tempo /= 2.0
+        while tempo < 0.5:
+            filters.append("atempo=0.5")
+            tempo /= 0.5
+        filters.append(f"atempo={tempo:.6f}")
+    return ",".join(filters) if filters else None
+
+class AudioBuffer:
+    """
+    内存中的一段音频及其格式信息，由 TTS 适配器的 synthesize/asynthesize 返回。
+
+    format 为 "mp3"、"wav" 等容器格式，或表示原始 16-bit 小端 PCM 的 "pcm"（此时须给出 sample_rate 和 channels）。
+    data 可以是 bytes、bytearray 或 memoryview，解码时以 memoryview 直接送入 ffmpeg 或 numpy，不再复制。
+    """
+    __slots__ = ("data", "format", "sample_rate", "channels")
+
+    def __init__(self, data, format: str, sample_rate: Optional[int] = None, channels: Optional[int] = None):
+        if format == "pcm" and (not sample_rate or not channels):
+            raise ValueError("Raw PCM audio requires sample_rate and channels.")
+        self.data = data
+        self.format = format
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def __len__(self) -> int:
+        return memoryview(self.data).nbytes
+
+    @property
+    def extension(self) -> str:
+        """保存为文件时使用的扩展名；原始 PCM 保存为 WAV。"""
+        return ".wav" if self.format == "pcm" else f".{self.format}"
+
+    @classmethod
+    def from_samples(cls, samples, sample_rate: int = PCM_SAMPLE_RATE) -> "AudioBuffer":
+        """包装 int16 PCM 数组（形状为 (帧数, 声道数)），不复制采样数据。"""
+        np = _require_numpy()
+        samples = np.ascontiguousarray(samples, dtype='<i2')
+        channels = samples.shape[1] if samples.ndim > 1 else 1
+        return cls(memoryview(samples).cast('B'), "pcm", sample_rate, channels)
+
+def read_audio_buffer(filepath: str) -> AudioBuffer:
+    """将音频文件读入内存，格式由扩展名决定。"""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    return AudioBuffer(data, os.path.splitext(filepath)[1].lstrip('.').lower() or "unknown")
+
+def save_audio_buffer(audio: AudioBuffer, filepath: str):
+    """将音频缓冲区写入文件；原始 PCM 写为 WAV，其它格式原样写出。"""
+    if audio.format == "pcm":
+        with wave.open(filepath, 'wb') as wav_file:
+            wav_file.setnchannels(audio.channels)
+            wav_file.setsampwidth(PCM_SAMPLE_WIDTH)
+            wav_file.setframerate(audio.sample_rate)
+            wav_file.writeframes(audio.data)
+    else:
+        with open(filepath, 'wb') as f:
+            f.write(audio.data)
+
+def _read_canonical_wav(wav_source, sample_rate: int, channels: int):
+    """如果 wav_source（路径或文件对象）是目标格式的 WAV，返回其 int16 PCM 数组；否则返回 None。"""
+    np = _require_numpy()
+    try:
+        with wave.open(wav_source, 'rb') as wav_file:
+            if (wav_file.getcomptype() == 'NONE'
+                    and wav_file.getsampwidth() == PCM_SAMPLE_WIDTH
+                    and wav_file.getframerate() == sample_rate
+                    and wav_file.getnchannels() == channels):
+                frames = wav_file.readframes(wav_file.getnframes())
+                return np.frombuffer(frames, dtype='<i2').reshape(-1, channels)
+    except (wave.Error, EOFError):
+        pass # 非 WAV 或不支持的 WAV 编码，交给 ffmpeg 处理
+    return None
+
+def _ffmpeg_decode(input_args, input_data, audio_filter: Optional[str], sample_rate: int, channels: int, source_name: str):
+    """调用一次 ffmpeg 解码为目标格式的 int16 PCM 数组；input_data 不为 None 时经 stdin 送入。"""
+    np = _require_numpy()
+    command = [
+        "ffmpeg",
+        "-v", "error",
+        *input_args,
+    ]
+    if audio_filter is not None:
+        command.extend(["-af", audio_filter])
+    command.extend([
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "-ac", str(channels),
+        "pipe:1"
+    ])
+    try:
+        process = subprocess.run(command, input=input_data, check=True, capture_output=True)
+    except FileNotFoundError:
+        raise RuntimeError("FFmpeg is not installed or not in your PATH. Please install FFmpeg to decode audio files. You can download FFmpeg from: https://ffmpeg.org/download.html")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Error decoding {source_name} with FFmpeg: {e.stderr.decode('utf-8', errors='replace')}")
+    return np.frombuffer(process.stdout, dtype='<i2').reshape(-1, channels)
+
+def decode_audio_file(filepath: str, sample_rate: int = PCM_SAMPLE_RATE, channels: int = PCM_CHANNELS, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0):
+    """
+    将音频文件解码为 int16 PCM 数组，形状为 (帧数, 声道数)。
+
+    已经是目标格式且无需调整音量/速度的 WAV 文件直接用 wave 模块读取，不启动任何外部进程；
+    其它情况只调用一次 ffmpeg，在同一次解码中应用音量/速度调整，直接输出目标采样率和声道数的原始 PCM，
+    不产生任何中间文件或有损重编码。
+
+    Raises:
+        ImportError: 如果 'numpy' 模块未安装。
+        RuntimeError: 如果 ffmpeg 不可用或解码失败。
+    """
+    _require_numpy()
+    audio_filter = effects_filter(volume_adjustment, speed_adjustment)
+    if audio_filter is None:
+        samples = _read_canonical_wav(filepath, sample_rate, channels)
+        if samples is not None:
+            return samples
+    return _ffmpeg_decode(["-i", filepath], None, audio_filter, sample_rate, channels, os.path.basename(filepath))
+
+def decode_audio_buffer(audio: AudioBuffer, sample_rate: int = PCM_SAMPLE_RATE, channels: int = PCM_CHANNELS, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0):
+    """
+    decode_audio_file 的内存版本：解码 AudioBuffer，不读写任何文件。
+
+    目标格式的原始 PCM 直接以 memoryview 构造数组（零复制），目标格式的 WAV 只解析文件头；
+    其它情况经 stdin 把缓冲区送入一次 ffmpeg，原始 PCM 按 sample_rate/channels 指定输入格式，容器格式由 ffmpeg 探测。
+
+    Raises:
+        ImportError: 如果 'numpy' 模块未安装。
+        RuntimeError: 如果 ffmpeg 不可用或解码失败。
+    """
+    np = _require_numpy()
+    audio_filter = effects_filter(volume_adjustment, speed_adjustment)
+    view = memoryview(audio.data).cast('B')
+    if audio.format == "pcm":
+        if audio_filter is None and audio.sample_rate == sample_rate and audio.channels == channels:
+            return np.frombuffer(view[:len(view) - len(view) % (PCM_SAMPLE_WIDTH * channels)], dtype='<i2').reshape(-1, channels)
+        input_args = ["-f", "s16le", "-ar", str(audio.sample_rate), "-ac", str(audio.channels), "-i", "pipe:0"]
+    else:
+        if audio_filter is None and audio.format == "wav":
+            samples = _read_canonical_wav(io.BytesIO(view), sample_rate, channels)
+            if samples is not None:
+                return samples
+        input_args = ["-i", "pipe:0"]
+    return _ffmpeg_decode(input_args, view, audio_filter, sample_rate, channels, f"{len(view)} bytes of {audio.format} audio")
+
+class StreamingAudioDecoder:
+    """
+    边接收边解码的音频解码器，用于分块到达的 TTS 音频（如豆包的 NDJSON 流）。
+
+    start 启动 ffmpeg 及其读写线程（阻塞，应在发出请求前、在事件循环之外调用）；之后 write 只把音频块放入队列
+    并立即返回（不阻塞，可在事件循环中调用），后台线程将其写入 ffmpeg 的 stdin，另有线程读取解码出的 PCM 和
+    错误输出；网络传输与解码（及音量/速度调整）重叠进行，finish 时只需等待最后一块解码完成。
+    reset 丢弃已写入的数据（例如重试前，之后需重新 start），abort 终止解码。
+    """
+    def __init__(self, sample_rate: int = PCM_SAMPLE_RATE, channels: int = PCM_CHANNELS, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0):
+        _require_numpy()
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.audio_filter = effects_filter(volume_adjustment, speed_adjustment)
+        self.bytes_written = 0
+        self._process = None
+        self._queue = None
+        self._threads = []
+        self._output = bytearray()
+        self._stderr = bytearray()
+
+    def write(self, chunk):
+        """把一块音频放入解码队列（不阻塞）；必须先调用 start。"""
+        if not chunk:
+            return
+        if self._process is None:
+            raise RuntimeError("StreamingAudioDecoder.start() must be called before writing audio.")
+        self._queue.put(bytes(chunk))
+        self.bytes_written += len(chunk)
+
+    def start(self):
+        """启动 ffmpeg 及其读写线程（阻塞）；已启动时不做任何事。"""
+        if self._process is not None:
+            return
+        command = [
+            "ffmpeg",
+            "-v", "error",
+            "-i", "pipe:0",
+        ]
+        if self.audio_filter is not None:
+            command.extend(["-af", self.audio_filter])
+        command.extend([
+            "-f", "s16le",
+            "-acodec", "pcm_s16le",
+            "-ar", str(self.sample_rate),
+            "-ac", str(self.channels),
+            "pipe:1"
+        ])
+        try:
+            self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise RuntimeError("FFmpeg is not installed or not in your PATH. Please install FFmpeg to decode audio files. You can download FFmpeg from: https://ffmpeg.org/download.html")
+        self._queue = queue.SimpleQueue()
+        self._threads = [
+            threading.Thread(target=self._write_loop, args=(self._process, self._queue), daemon=True),
+            threading.Thread(target=self._read_loop, args=(self._process.stdout, self._output), daemon=True),
+            threading.Thread(target=self._read_loop, args=(self._process.stderr, self._stderr), daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @staticmethod
+    def _write_loop(process, chunks):
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                process.stdin.write(chunk)
+        except OSError:
+            pass # ffmpeg 提前退出，错误信息见 finish 中的返回码和 stderr
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _read_loop(pipe, output: bytearray):
+        while True:
+            data = pipe.read(64 * 1024)
+            if not data:
+                break
+            output += data
+
+    def _stop(self):
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return self._process.wait()
+
+    def finish(self):
+        """等待解码完成，返回 int16 PCM 数组，形状为 (帧数, 声道数)。"""
+        np = _require_numpy()
+        if self._process is None or self.bytes_written == 0:
+            self.abort()
+            raise RuntimeError("No audio was written to the streaming decoder.")
+        returncode = self._stop()
+        self._process = None
+        if returncode != 0:
+            raise RuntimeError(f"Error decoding streamed audio with FFmpeg: {self._stderr.decode('utf-8', errors='replace')}")
+        output, self._output = self._output, bytearray()
+        usable = len(output) - len(output) % (PCM_SAMPLE_WIDTH * self.channels)
+        return np.frombuffer(memoryview(output)[:usable], dtype='<i2').reshape(-1, self.channels)
+
+    def abort(self):
+        """终止解码并丢弃已写入的数据；未启动或已完成时不做任何事。"""
+        if self._process is not None:
+            self._process.kill()
+            self._stop()
+            self._process = None
+        self._output = bytearray()
+        self._stderr = bytearray()
+
+    def reset(self):
+        """丢弃已写入的数据，之后写入的音频从头解码（用于重试）。"""
+        self.abort()
+        self.bytes_written = 0
+
+def write_wav(filepath: str, samples, sample_rate: int = PCM_SAMPLE_RATE):
+    """将 int16 PCM 数组写入 WAV 文件（无损，不经过任何编码器）。"""
+    np = _require_numpy()
+    samples = np.ascontiguousarray(samples, dtype='<i2')
+    channels = samples.shape[1] if samples.ndim > 1 else 1
+    with wave.open(filepath, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(PCM_SAMPLE_WIDTH)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(memoryview(samples).cast('B'))
+
+def find_silence_bounds(samples, sample_rate: int, silence_threshold_db: float = -60, min_silence_duration: float = 0.5, window_duration: float = 0.01) -> Tuple[int, int]:
+    """
+    使用向量化的窗口 RMS 计算定位首尾静音，返回保留区间 [start, end) 的帧下标。
+
+    与 ffmpeg silencedetect 的语义保持一致：只有当首部（或尾部）连续低于 silence_threshold_db
+    的时长不短于 min_silence_duration 时才会被裁剪；全部为静音时返回完整区间。
+    """
+    np = _require_numpy()
+    total_frames = samples.shape[0]
+    if total_frames == 0:
+        return 0, 0
+
+    window = max(1, int(sample_rate * window_duration))
+    # 每帧各声道的平均功率（归一化到 [-1, 1]）
+    power = np.square(samples.astype(np.float32) / 32768.0)
+    if power.ndim > 1:
+        power = power.mean(axis=1)
+    padding = (-total_frames) % window
+    if padding:
+        power = np.pad(power, (0, padding))
+    window_rms = np.sqrt(power.reshape(-1, window).mean(axis=1))
+
+    threshold = 10 ** (silence_threshold_db / 20.0)
+    voiced_windows = np.flatnonzero(window_rms >= threshold)
+    if voiced_windows.size == 0:
+        return 0, total_frames
+
+    start = int(voiced_windows[0]) * window
+    end = min(total_frames, (int(voiced_windows[-1]) + 1) * window)
+    min_silence_frames = int(min_silence_duration * sample_rate)
+    if start < min_silence_frames:
+        start = 0
+    if total_frames - end < min_silence_frames:
+        end = total_frames
+    return start, end
+
+def trim_silence(samples, sample_rate: int = PCM_SAMPLE_RATE, silence_threshold_db: float = -60, min_silence_duration: float = 0.5):
+    """
+    裁剪 PCM 数组的首尾静音并返回裁剪后的数组（为原数组的视图，不复制数据）。
+    如果裁剪后几乎为空，则原样返回。
+    """
+    start, end = find_silence_bounds(samples, sample_rate, silence_threshold_db, min_silence_duration)
+    if (end - start) / sample_rate <= 0.01: # 避免极短音频被裁成空文件
+        return samples
+    return samples[start:end]
+
+def canonical_wav_frames(filepath: str) -> Optional[int]:
+    """如果文件是规范 PCM 格式（PCM_SAMPLE_RATE、PCM_CHANNELS、16-bit）的 WAV，返回其帧数；否则返回 None。"""
+    try:
+        with wave.open(filepath, 'rb') as wav_file:
+            if (wav_file.getcomptype() == 'NONE'
+                    and wav_file.getsampwidth() == PCM_SAMPLE_WIDTH
+                    and wav_file.getframerate() == PCM_SAMPLE_RATE
+                    and wav_file.getnchannels() == PCM_CHANNELS):
+                return wav_file.getnframes()
+    except (OSError, wave.Error, EOFError):
+        pass
+    return None
+
+def encode_canonical_wavs(wav_filepaths, output_filepath: str, output_args, chunk_frames: int = 64 * 1024) -> int:
+    """
+    把规范 PCM 格式的 WAV 片段按顺序拼接，送入一次 ffmpeg 编码，返回写入的总帧数。
+
+    片段已是同一采样率和声道数的 PCM，拼接只是逐块复制采样数据（不解码、不重采样），
+    整期音频只在这里编码一次；output_args 为 ffmpeg 的输出参数（编码器、码率、声道等）。
+
+    Raises:
+        RuntimeError: 如果 ffmpeg 不可用或编码失败。
+    """
+    command = [
+        "ffmpeg", "-y",
+        "-v", "error",
+        "-f", "s16le",
+        "-ar", str(PCM_SAMPLE_RATE),
+        "-ac", str(PCM_CHANNELS),
+        "-i", "pipe:0",
+        *output_args,
+        output_filepath,
+    ]
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("FFmpeg is not installed or not in your PATH. Please install FFmpeg to encode audio files. You can download FFmpeg from: https://ffmpeg.org/download.html")
+
+    total_frames = 0
+    try:
+        for wav_filepath in wav_filepaths:
+            with wave.open(wav_filepath, 'rb') as wav_file:
+                while True:
+                    frames = wav_file.readframes(chunk_frames)
+                    if not frames:
+                        break
+                    process.stdin.write(frames)
+                    total_frames += len(frames) // (PCM_SAMPLE_WIDTH * PCM_CHANNELS)
+    except BrokenPipeError:
+        pass # ffmpeg 提前退出，错误信息见下方的返回码和 stderr
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+    stderr = process.stderr.read()
+    process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"Error encoding {os.path.basename(output_filepath)} with FFmpeg: {stderr.decode('utf-8', errors='replace')}")
+    return total_frames
@@ -0,0 +1,125 @@
+# audio_stream.py
+
+import json
+import binascii
+from typing import Callable, Optional
+
+class JsonAudioStreamDecoder:
+    """
+    增量解码 JSON 响应中内嵌的音频字符串（Minimax 的 hex、Gemini 的 base64）。
+
+    每次 feed 一段响应字节。解析器只跟踪字符串、转义和键名；读到名为 key 的字符串值时，按编码的对齐单位
+    （hex 2 个字符、base64 4 个字符）逐块解码并交给 sink（默认追加到 audio），未对齐的余数留到下一块。
+    音频字符串之外的 JSON 保存在 envelope 中（音频字符串以空串代替），流结束后可用 envelope() 取得状态码、
+    错误信息、mimeType 等字段。因此每次请求的峰值内存约为解码后的音频加一个网络块，
+    不再同时持有原始响应、解析出的字符串和解码结果。响应中出现多个同名音频字符串时按顺序拼接。
+    """
+    MAX_KEY_LENGTH = 64 # 更长的字符串不可能是要查找的键，不再收集其内容
+
+    def __init__(self, key: str, encoding: str, sink: Optional[Callable[[bytes], None]] = None):
+        if encoding == "hex":
+            self._unit, self._decode = 2, binascii.unhexlify
+        elif encoding == "base64":
+            self._unit, self._decode = 4, binascii.a2b_base64
+        else:
+            raise ValueError(f"Unsupported audio encoding: {encoding}")
+        self.key = key.encode("utf-8")
+        self.encoding = encoding
+        self.audio = bytearray()
+        self.audio_bytes = 0 # 已解码的音频字节数
+        self.audio_strings = 0 # 已读完的音频字符串个数
+        self._sink = sink if sink is not None else self.audio.extend
+        self._envelope = bytearray()
+        self._in_audio = False
+        self._pending = b"" # 尚未对齐、留待下一块解码的字符
+        self._in_string = False
+        self._escape = False
+        self._string = bytearray()
+        self._string_too_long = False
+        self._last_string: Optional[bytes] = None
+        self._after_colon = False
+        self._value_key: Optional[bytes] = None
+
+    def feed(self, chunk: bytes):
+        """追加一段响应字节，解码其中的音频数据。"""
+        pos = 0
+        length = len(chunk)
+        while pos < length:
+            if self._in_audio:
+                end = chunk.find(b'"', pos)
+                self._feed_audio(chunk[pos:length if end == -1 else end])
+                if end == -1:
+                    return
+                self._finish_audio()
+                self._envelope += b'"' # 结束引号，envelope 中的音频字符串为空串
+                pos = end + 1
+                continue
+            pos = self._scan(chunk, pos)
+
+    def _scan(self, chunk: bytes, pos: int) -> int:
+        """扫描音频字符串之外的 JSON，返回下一段待处理的位置（进入音频字符串时提前返回）。"""
+        start = pos
+        length = len(chunk)
+        while pos < length:
+            char = chunk[pos]
+            pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == 0x5C: # '\\'
+                    self._escape = True
+                elif char == 0x22: # '"'
+                    self._in_string = False
+                    self._last_string = None if self._string_too_long else bytes(self._string)
+                    continue
+                if not self._string_too_long:
+                    self._string.append(char)
+                    self._string_too_long = len(self._string) > self.MAX_KEY_LENGTH
+            elif char == 0x22:
+                if self._after_colon and self._value_key == self.key:
+                    self._in_audio = True
+                    self._after_colon = False
+                    break
+                self._in_string = True
+                self._after_colon = False
+                self._string.clear()
+                self._string_too_long = False
+            elif char == 0x3A: # ':'
+                self._after_colon = True
+                self._value_key = self._last_string
+            elif char not in b" \t\r\n":
+                self._after_colon = False
+        self._envelope += chunk[start:pos]
+        return pos
+
+    def _feed_audio(self, segment: bytes):
+        data = self._pending + segment if self._pending else segment
+        if b"\\" in data:
+            # 部分 JSON 编码器会把 '/' 转义为 '\/'；结尾的 '\' 留到下一块再处理
+            held = b"\\" if data.endswith(b"\\") and not data.endswith(b"\\\\") else b""
+            data = data[:len(data) - len(held)].replace(b"\\/", b"/")
+            if b"\\" in data:
+                raise ValueError(f"Unsupported escape sequence in {self.encoding} audio string.")
+        else:
+            held = b""
+        aligned = len(data) - len(data) % self._unit
+        if aligned:
+            decoded = self._decode(data[:aligned])
+            self.audio_bytes += len(decoded)
+            self._sink(decoded)
+        self._pending = data[aligned:] + held
+
+    def _finish_audio(self):
+        if self._pending:
+            raise ValueError(f"Truncated {self.encoding} audio string ({len(self._pending)} trailing characters).")
+        self._in_audio = False
+        self.audio_strings += 1
+
+    def close(self):
+        """响应结束时调用；音频字符串未闭合时抛出 ValueError。"""
+        if self._in_audio:
+            raise ValueError(f"Response ended inside the {self.encoding} audio string.")
+
+    def envelope(self):
+        """解析音频字符串之外的 JSON（音频字符串为空串）；不是合法 JSON 时抛出 ValueError。"""
+        return json.loads(bytes(self._envelope))
@@ -0,0 +1,122 @@
+# avatar.py
+
+import os
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+# 渲染后的头像 PNG 的 LRU 缓存条目数
+avatar_cache_size = int(os.getenv("PODCAST_AVATAR_CACHE_SIZE", "1024"))
+
+def generate_pixel_avatar(seed_string: str) -> bytes:
+    """
+    根据给定的字符串生成一个48x48像素的像素头像。
+    头像具有确定性（相同输入字符串生成相同头像）和对称性。
+    """
+    size = 48
+    pixel_grid_size = 5 # 内部像素网格大小 (例如 5x5)
+    
+    # 使用SHA256哈希作为随机种子，确保确定性
+    hash_object = hashlib.sha256(seed_string.encode('utf-8'))
+    hash_hex = hash_object.hexdigest()
+    
+    # 将哈希值转换为整数，作为局部随机数生成器的种子（不修改全局 random 的状态，并发调用互不影响）
+    rng = random.Random(int(hash_hex, 16))
+    
+    # 创建一个空白的48x48 RGBA图像
+    img = Image.new('RGBA', (size, size), (255, 255, 255, 0)) # 透明背景
+    draw = ImageDraw.Draw(img)
+    
+    # 随机生成头像的主颜色 (饱和度较高，亮度适中)
+    hue = rng.randint(0, 360)
+    saturation = rng.randint(70, 100) # 高饱和度
+    lightness = rng.randint(40, 60)   # 适中亮度
+    
+    # 将HSL转换为RGB
+    def hsl_to_rgb(h, s, l):
+        h /= 360
+        s /= 100
+        l /= 100
+        
+        if s == 0:
+            return (int(l * 255), int(l * 255), int(l * 255), 255)
+        
+        def hue_to_rgb(p, q, t):
+            if t < 0: t += 1
+            if t > 1: t -= 1
+            if t < 1/6: return p + (q - p) * 6 * t
+            if t < 1/2: return q
+            if t < 2/3: return p + (q - p) * (2/3 - t) * 6
+            return p
+        
+        q = l * (1 + s) if l < 0.5 else l + s - l * s
+        p = 2 * l - q
+        
+        r = hue_to_rgb(p, q, h + 1/3)
+        g = hue_to_rgb(p, q, h)
+        b = hue_to_rgb(p, q, h - 1/3)
+        
+        return (int(r * 255), int(g * 255), int(b * 255), 255)
+        
+    main_color = hsl_to_rgb(hue, saturation, lightness)
+    
+    # 生成像素网格
+    # 只需生成一半的网格，然后对称复制
+    pixels = [[0 for _ in range(pixel_grid_size)] for _ in range(pixel_grid_size)]
+    
+    for y in range(pixel_grid_size):
+        for x in range((pixel_grid_size + 1) // 2): # 只生成左半部分或中间列
+            if rng.random() > 0.5: # 50% 的几率填充像素
+                pixels[y][x] = 1 # 填充
+                pixels[y][pixel_grid_size - 1 - x] = 1 # 对称填充
+    
+    # 计算每个内部像素在最终图像中的大小
+    pixel_width = size // pixel_grid_size
+    pixel_height = size // pixel_grid_size
+    
+    # 绘制像素
+    for y in range(pixel_grid_size):
+        for x in range(pixel_grid_size):
+            if pixels[y][x] == 1:
+                draw.rectangle(
+                    [x * pixel_width, y * pixel_height, (x + 1) * pixel_width, (y + 1) * pixel_height],
+                    fill=main_color
+                )
+    
+    # 将图像转换为字节流
+    byte_io = BytesIO()
+    img.save(byte_io, format='PNG')
+    return byte_io.getvalue()
+
+_avatar_cache: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+_avatar_cache_lock = threading.Lock()
+
+def get_cached_avatar(seed_string: str) -> Optional[Tuple[bytes, str]]:
+    """返回已缓存的 (PNG 字节, ETag)；未缓存时返回 None，不进行绘制，可以直接在事件循环中调用。"""
+    with _avatar_cache_lock:
+        cached = _avatar_cache.get(seed_string)
+        if cached is not None:
+            _avatar_cache.move_to_end(seed_string)
+        return cached
+
+def get_avatar(seed_string: str) -> Tuple[bytes, str]:
+    """
+    返回 (PNG 字节, 强 ETag)。头像由输入确定且不会改变，渲染结果保存在有界 LRU 缓存中，重复请求无需重新绘制和编码。
+    未命中时需要绘制，应在线程中调用。
+    """
+    cached = get_cached_avatar(seed_string)
+    if cached is not None:
+        return cached
+    png_bytes = generate_pixel_avatar(seed_string)
+    avatar = (png_bytes, f'"{hashlib.sha256(png_bytes).hexdigest()[:32]}"')
+    with _avatar_cache_lock:
+        _avatar_cache[seed_string] = avatar
+        _avatar_cache.move_to_end(seed_string)
+        while len(_avatar_cache) > max(0, avatar_cache_size):
+            _avatar_cache.popitem(last=False)
+    return avatar
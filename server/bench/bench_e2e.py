@@ -0,0 +1,197 @@
+"""
+端到端基准测试：用本地替身服务（bench/stub_servers.py）代替 LLM 和 TTS 服务商，完整运行
+generate_podcast_audio_api（概要 -> 流式脚本 -> TTS -> 裁剪 -> 合并），不消耗真实服务商的额度。
+
+对每个 服务商 x 脚本条数 x threads 组合报告:
+    episodes/hour        每小时可生成的播客期数（按并发生成 --concurrency 期计算）
+    p50 / p95            单期任务耗时
+    CPU s / audio min    每分钟成品音频消耗的 CPU 秒数（本进程及 ffmpeg 等子进程，不含替身服务）
+
+使用方法（在 server 目录下运行）:
+    python bench/bench_e2e.py [--providers edge-tts,doubao-tts] [--threads 1,4,8] [--turns 10,40] \\
+        [--episodes 4] [--concurrency 1] [--tts-latency 0.3] [--tts-jitter 0.1]
+
+TTS 片段缓存在基准测试中被禁用（PODCAST_TTS_CACHE_MAX_BYTES=0），否则重复的文本会直接命中缓存。
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["PODCAST_TTS_CACHE_MAX_BYTES"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import podcast_generator # noqa: E402
+import provider_control # noqa: E402
+from stub_servers import StubSettings, start_stub_process # noqa: E402
+
+PROVIDERS = ("index-tts", "edge-tts", "fish-audio", "minimax", "doubao-tts", "gemini-tts")
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config")
+MERGED_MP3_BITRATE = 192000 # merge_audio_files 输出的 MP3 码率，ffprobe 不可用时据此估算时长
+
+def _write_provider_config(provider: str, base_url: str, config_dir: str) -> str:
+    """复制服务商配置并把接口地址指向替身服务；文件名保持不变（tts_provider 由文件名推断）。"""
+    with open(os.path.join(CONFIG_DIR, f"{provider}.json"), "r", encoding="utf-8") as f:
+        config_data = json.load(f)
+    api_urls = {
+        "fish-audio": f"{base_url}/fish/v1/tts",
+        "minimax": f"{base_url}/minimax/v1/t2a_v2?GroupId={{{{group_id}}}}",
+        "doubao-tts": f"{base_url}/doubao/api/v3/tts/unidirectional",
+        "gemini-tts": f"{base_url}/gemini/v1beta/models/{{{{model}}}}:generateContent",
+    }
+    if provider in api_urls:
+        config_data["apiUrl"] = api_urls[provider]
+    config_path = os.path.join(config_dir, f"{provider}.json")
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump(config_data, f, ensure_ascii=False)
+    return config_path
+
+def _tts_providers_config(base_url: str) -> str:
+    template_url = f"{base_url}/tts?text={{{{text}}}}&voice={{{{voiceCode}}}}"
+    return json.dumps({
+        "index": {"api_url": template_url},
+        "edge": {"api_url": template_url},
+        "doubao": {"X-Api-App-Id": "bench", "X-Api-Access-Key": "bench"},
+        "fish": {"api_key": "bench"},
+        "minimax": {"group_id": "bench", "api_key": "bench"},
+        "gemini": {"api_key": "bench"},
+    })
+
+def _pod_users(config_path: str) -> str:
+    with open(config_path, "r", encoding="utf-8") as f:
+        voices = json.load(f).get("voices") or []
+    return json.dumps([{"code": voice["code"], "role": f"角色{index + 1}"} for index, voice in enumerate(voices[:2])], ensure_ascii=False)
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def _episode_seconds(output_path: str, merge_stats: dict) -> float:
+    duration = merge_stats.get("audio_seconds") or podcast_generator.get_audio_duration(output_path)
+    if duration is None:
+        duration = os.path.getsize(output_path) * 8 / MERGED_MP3_BITRATE
+    return duration
+
+def _run_episode(base_url: str, config_path: str, tts_providers_config: str, pod_users: str, threads: int, turns: int) -> tuple:
+    args = argparse.Namespace(
+        api_key="bench",
+        base_url=f"{base_url}/v1",
+        model=f"stub-turns-{turns}",
+        threads=threads,
+        output_language="Chinese",
+        usetime="5 minutes",
+    )
+    start = time.perf_counter()
+    result = podcast_generator.generate_podcast_audio_api(
+        args=args,
+        config_path=config_path,
+        input_txt_content="人工智能的未来发展",
+        tts_providers_config_content=tts_providers_config,
+        podUsers_json_content=pod_users,
+    )
+    return time.perf_counter() - start, os.path.join(podcast_generator.output_dir, result["output_audio_filepath"]), result.get("merge_stats") or {}
+
+def _bench(provider: str, turns: int, threads: int, episodes: int, concurrency: int, base_url: str, config_path: str, tts_providers_config: str) -> dict:
+    # 每组从相同的自适应并发初始状态开始，结果互不影响
+    provider_control._concurrency_controller = None
+    pod_users = _pod_users(config_path)
+    cpu_start = _cpu_seconds()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_run_episode, base_url, config_path, tts_providers_config, pod_users, threads, turns) for _ in range(episodes)]
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - wall_start
+    cpu = _cpu_seconds() - cpu_start
+
+    latencies = [latency for latency, _, _ in results]
+    audio_seconds = 0.0
+    for _, output_path, merge_stats in results:
+        audio_seconds += _episode_seconds(output_path, merge_stats)
+        os.remove(output_path)
+    return {
+        "provider": provider,
+        "turns": turns,
+        "threads": threads,
+        "episodes_per_hour": episodes / wall * 3600,
+        "p50": _percentile(latencies, 0.5),
+        "p95": _percentile(latencies, 0.95),
+        "cpu_per_audio_minute": cpu / (audio_seconds / 60) if audio_seconds else float("nan"),
+        "audio_minutes": audio_seconds / 60,
+    }
+
+def _parse_list(value: str, cast=str) -> list:
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end podcast generation benchmark against local stand-in LLM and TTS servers.")
+    parser.add_argument("--providers", default=",".join(PROVIDERS), help=f"Comma-separated TTS providers (default: all of {', '.join(PROVIDERS)}).")
+    parser.add_argument("--threads", default="1,4,8", help="Comma-separated threads settings (default: 1,4,8).")
+    parser.add_argument("--turns", default="10,40", help="Comma-separated script lengths in dialog turns (default: 10,40).")
+    parser.add_argument("--episodes", type=int, default=4, help="Episodes per combination (default: 4).")
+    parser.add_argument("--concurrency", type=int, default=1, help="Episodes generated at the same time (default: 1).")
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="Mean TTS latency in seconds (default: 0.3).")
+    parser.add_argument("--tts-jitter", type=float, default=0.1, help="TTS latency jitter in seconds (default: 0.1).")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mean LLM time to first token in seconds (default: 0.5).")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="LLM time to first token jitter in seconds (default: 0.2).")
+    parser.add_argument("--llm-token-interval", type=float, default=0.005, help="Delay between streamed tokens in seconds (default: 0.005).")
+    parser.add_argument("--seconds-per-char", type=float, default=0.2, help="Synthesized audio seconds per text character (default: 0.2).")
+    args = parser.parse_args()
+
+    providers = _parse_list(args.providers)
+    unknown = [provider for provider in providers if provider not in PROVIDERS]
+    if unknown:
+        parser.error(f"Unknown providers: {', '.join(unknown)}")
+    if not shutil.which("ffmpeg"):
+        parser.error("ffmpeg is required (stub audio encoding, trimming and merging).")
+
+    settings = StubSettings(args.tts_latency, args.tts_jitter, args.llm_latency, args.llm_jitter, args.llm_token_interval, args.seconds_per_char)
+    stub_process, base_url = start_stub_process(settings)
+    work_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    original_output_dir = podcast_generator.output_dir
+    podcast_generator.output_dir = os.path.join(work_dir, "output")
+    os.makedirs(podcast_generator.output_dir, exist_ok=True)
+    # 基准测试的各组结果汇总在最后输出，生成过程中的日志写入文件
+    log_path = os.path.join(work_dir, "bench.log")
+    rows = []
+    try:
+        tts_providers_config = _tts_providers_config(base_url)
+        for provider in providers:
+            config_path = _write_provider_config(provider, base_url, work_dir)
+            for turns in _parse_list(args.turns, int):
+                for threads in _parse_list(args.threads, int):
+                    print(f"Running {provider} turns={turns} threads={threads} ({args.episodes} episodes, concurrency {args.concurrency})...", flush=True)
+                    stdout = sys.stdout
+                    with open(log_path, "a", encoding="utf-8") as log:
+                        sys.stdout = log
+                        try:
+                            rows.append(_bench(provider, turns, threads, args.episodes, args.concurrency, base_url, config_path, tts_providers_config))
+                        except Exception as e:
+                            print(f"Benchmark failed: {e}")
+                            sys.stdout = stdout
+                            print(f"  failed: {e}")
+                        finally:
+                            sys.stdout = stdout
+    finally:
+        podcast_generator.output_dir = original_output_dir
+        stub_process.terminate()
+        stub_process.join(timeout=5)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\nTTS latency {args.tts_latency}±{args.tts_jitter}s, LLM first token {args.llm_latency}±{args.llm_jitter}s, {args.episodes} episodes per row, concurrency {args.concurrency}")
+    print(f"{'provider':<12} {'turns':>5} {'threads':>7} {'episodes/h':>11} {'p50 s':>8} {'p95 s':>8} {'CPU s/audio min':>16} {'audio min':>10}")
+    for row in rows:
+        print(f"{row['provider']:<12} {row['turns']:>5} {row['threads']:>7} {row['episodes_per_hour']:>11.1f} {row['p50']:>8.2f} {row['p95']:>8.2f} "
+              f"{row['cpu_per_audio_minute']:>16.2f} {row['audio_minutes']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
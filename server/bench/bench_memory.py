@@ -0,0 +1,127 @@
+"""
+内存基准测试：对比 JSON 内嵌音频（Minimax hex、Gemini base64）的流式解码与整体解析（读完响应体后 json + bytes.fromhex /
+base64.b64decode）在单次 TTS 请求中的峰值内存。请求发往本地替身服务（bench/stub_servers.py），不消耗真实服务商的额度。
+
+对每个 服务商 x 音频时长 组合报告:
+    audio MB             解码后的音频大小
+    peak MB              单次请求期间 Python 分配内存的峰值（tracemalloc，相对请求前）
+    peak / audio         峰值内存与音频大小之比；流式解码应接近 1，整体解析约为 3-4
+
+使用方法（在 server 目录下运行）:
+    python bench/bench_memory.py [--providers minimax,gemini-tts] [--seconds 10,60,300] [--iterations 3]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import podcast_generator # noqa: E402
+from tts_adapters import aclose_async_http_client # noqa: E402
+from stub_servers import StubSettings, start_stub_process # noqa: E402
+from bench_e2e import CONFIG_DIR, _tts_providers_config # noqa: E402
+
+PROVIDERS = ("minimax", "gemini-tts")
+API_URLS = {
+    "minimax": "{base_url}/minimax/v1/t2a_v2?GroupId={{{{group_id}}}}",
+    "gemini-tts": "{base_url}/gemini/v1beta/models/{{{{model}}}}:generateContent",
+}
+EXTRA_PARAMS_KEYS = {"minimax": "minimax", "gemini-tts": "gemini"}
+SECONDS_PER_CHAR = 1.0 # 每个字符合成 1 秒音频，文本长度即音频秒数
+
+def _create_adapter(provider: str, base_url: str):
+    with open(os.path.join(CONFIG_DIR, f"{provider}.json"), "r", encoding="utf-8") as f:
+        config_data = json.load(f)
+    config_data["apiUrl"] = API_URLS[provider].format(base_url=base_url)
+    extra_params = json.loads(_tts_providers_config(base_url))[EXTRA_PARAMS_KEYS[provider]]
+    return podcast_generator._create_tts_adapter(provider, config_data, extra_params), config_data["voices"][0]["code"]
+
+def _buffered_synthesize(provider: str, adapter, text: str, voice_code: str) -> bytes:
+    """流式解码之前的做法：读完整个响应体，解析 JSON，再一次性解码音频字符串。"""
+    api_url, payload, headers = adapter._build_request(text, voice_code)
+    response = adapter.session.post(api_url, json=payload, headers=headers, timeout=60)
+    response.raise_for_status()
+    if provider == "minimax":
+        return bytes.fromhex(response.json()["data"]["audio"])
+    return base64.b64decode(response.json()["candidates"][0]["content"]["parts"][0]["inlineData"]["data"])
+
+async def _asynthesize(adapter, text: str, voice_code: str):
+    try:
+        return await adapter.asynthesize(text, voice_code)
+    finally:
+        await aclose_async_http_client()
+
+def _measure(call) -> tuple:
+    """返回 (音频字节数, 相对调用前的 Python 内存峰值)。"""
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    audio = call()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    return len(audio), peak
+
+def _bench(provider: str, seconds: int, iterations: int, base_url: str) -> list:
+    adapter, voice_code = _create_adapter(provider, base_url)
+    text = "测" * max(1, int(seconds / SECONDS_PER_CHAR))
+    modes = {
+        "buffered": lambda: _buffered_synthesize(provider, adapter, text, voice_code),
+        "streaming": lambda: adapter.synthesize(text, voice_code),
+        "streaming-async": lambda: asyncio.run(_asynthesize(adapter, text, voice_code)),
+    }
+    rows = []
+    try:
+        for mode, call in modes.items():
+            call() # 预热连接和替身服务的音频缓存
+            measurements = [_measure(call) for _ in range(iterations)]
+            audio_bytes = measurements[0][0]
+            peak = max(peak for _, peak in measurements)
+            rows.append({"provider": provider, "seconds": seconds, "mode": mode, "audio_bytes": audio_bytes, "peak": peak})
+    finally:
+        adapter.close()
+    return rows
+
+def _parse_list(value: str, cast=str) -> list:
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of decoding JSON-embedded TTS audio, streaming vs. buffered, against local stand-in servers.")
+    parser.add_argument("--providers", default=",".join(PROVIDERS), help=f"Comma-separated TTS providers (default: {', '.join(PROVIDERS)}).")
+    parser.add_argument("--seconds", default="10,60,300", help="Comma-separated audio durations per request in seconds (default: 10,60,300).")
+    parser.add_argument("--iterations", type=int, default=3, help="Measured requests per combination (default: 3).")
+    args = parser.parse_args()
+
+    providers = _parse_list(args.providers)
+    unknown = [provider for provider in providers if provider not in PROVIDERS]
+    if unknown:
+        parser.error(f"Unknown providers: {', '.join(unknown)}")
+
+    stub_process, base_url = start_stub_process(StubSettings(tts_latency=0.0, tts_jitter=0.0, seconds_per_char=SECONDS_PER_CHAR))
+    rows = []
+    stdout = sys.stdout
+    tracemalloc.start()
+    try:
+        for provider in providers:
+            for seconds in _parse_list(args.seconds, int):
+                print(f"Running {provider} {seconds}s ({args.iterations} requests per mode)...", flush=True)
+                sys.stdout = open(os.devnull, "w") # 适配器的请求日志不计入输出
+                try:
+                    rows.extend(_bench(provider, seconds, args.iterations, base_url))
+                finally:
+                    sys.stdout.close()
+                    sys.stdout = stdout
+    finally:
+        tracemalloc.stop()
+        stub_process.terminate()
+        stub_process.join(timeout=5)
+
+    print(f"\n{'provider':<12} {'audio s':>8} {'mode':<16} {'audio MB':>9} {'peak MB':>8} {'peak / audio':>13}")
+    for row in rows:
+        print(f"{row['provider']:<12} {row['seconds']:>8} {row['mode']:<16} {row['audio_bytes'] / 1e6:>9.2f} {row['peak'] / 1e6:>8.2f} "
+              f"{row['peak'] / row['audio_bytes']:>13.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+静音裁剪基准测试：对比进程内向量化裁剪 (trim_audio_silence) 与原 FFmpeg silencedetect 链路
+(_trim_audio_silence_ffmpeg) 的耗时和外部进程启动次数。
+
+使用方法（在 server 目录下运行）:
+    python bench/bench_trim.py [--iterations 20] [--input some_segment.mp3]
+
+未指定 --input 时会合成一段带首尾静音的测试音频（WAV，若 ffmpeg 可用则额外生成 MP3）。
+"""
+
+import argparse
+import math
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import podcast_generator # noqa: E402
+
+def _write_synthetic_segment(filepath, sample_rate=24000, lead_silence=0.8, voiced=4.0, tail_silence=1.2):
+    """生成 首部静音 + 调制噪声（模拟语音）+ 尾部静音 的 16-bit 单声道 WAV。"""
+    rng = random.Random(42)
+    frames = bytearray()
+    frames.extend(b"\x00\x00" * int(sample_rate * lead_silence))
+    for i in range(int(sample_rate * voiced)):
+        envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 3 * i / sample_rate)
+        value = envelope * (0.6 * math.sin(2 * math.pi * 220 * i / sample_rate) + 0.2 * (rng.random() - 0.5))
+        frames.extend(struct.pack("<h", int(value * 20000)))
+    frames.extend(b"\x00\x00" * int(sample_rate * tail_silence))
+    with wave.open(filepath, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(bytes(frames))
+
+class _ProcessCounter:
+    """统计 subprocess.run 的调用次数（即外部进程启动次数）。"""
+    def __init__(self):
+        self.count = 0
+        self._original_run = subprocess.run
+
+    def __enter__(self):
+        def counting_run(*args, **kwargs):
+            self.count += 1
+            return self._original_run(*args, **kwargs)
+        subprocess.run = counting_run
+        return self
+
+    def __exit__(self, *exc):
+        subprocess.run = self._original_run
+
+def _bench(label, trim_func, input_file, work_dir, iterations):
+    durations = []
+    with _ProcessCounter() as counter:
+        for i in range(iterations):
+            output_file = os.path.join(work_dir, f"out_{label}_{i}.wav")
+            start = time.perf_counter()
+            trim_func(input_file, output_file)
+            durations.append(time.perf_counter() - start)
+            os.remove(output_file)
+    durations.sort()
+    print(f"  {label:<10} mean {sum(durations) / len(durations) * 1000:8.1f} ms | "
+          f"p50 {durations[len(durations) // 2] * 1000:8.1f} ms | "
+          f"processes/segment {counter.count / iterations:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark in-process silence trimming against the FFmpeg chain.")
+    parser.add_argument("--iterations", type=int, default=20, help="Iterations per input (default: 20).")
+    parser.add_argument("--input", help="Audio file to trim instead of the synthetic segment.")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_trim_")
+    try:
+        inputs = []
+        if args.input:
+            inputs.append(args.input)
+        else:
+            wav_input = os.path.join(work_dir, "segment.wav")
+            _write_synthetic_segment(wav_input)
+            inputs.append(wav_input)
+            if shutil.which("ffmpeg"):
+                mp3_input = os.path.join(work_dir, "segment.mp3")
+                subprocess.run(["ffmpeg", "-v", "error", "-i", wav_input, "-c:a", "libmp3lame", "-q:a", "2", mp3_input], check=True)
+                inputs.append(mp3_input)
+
+        for input_file in inputs:
+            print(f"\nInput: {os.path.basename(input_file)} ({args.iterations} iterations)")
+            _bench("in-process", podcast_generator.trim_audio_silence, input_file, work_dir, args.iterations)
+            if shutil.which("ffmpeg"):
+                _bench("ffmpeg", podcast_generator._trim_audio_silence_ffmpeg, input_file, work_dir, args.iterations)
+            else:
+                print("  ffmpeg     skipped (ffmpeg not found in PATH)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
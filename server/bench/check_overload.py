@@ -0,0 +1,96 @@
+"""
+过载检查：替身服务（bench/stub_servers.py）对每个 TTS 请求返回 429 时，确认每个服务商的适配器（同步和异步）
+都抛出带 HTTP 状态码的 TTSRequestError，并且该服务商的自适应并发限制（AIMDLimiter）随之下调，其它服务商的限制不受影响。
+
+使用方法（在 server 目录下运行），任一检查失败时退出码为 1:
+    python bench/check_overload.py [--providers edge-tts,fish-audio]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+
+os.environ["PODCAST_TTS_CACHE_MAX_BYTES"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import podcast_generator # noqa: E402
+from provider_control import AIMDLimiter, ConcurrencyController # noqa: E402
+from tts_adapters import TTSRequestError, aclose_async_http_client # noqa: E402
+from bench_e2e import PROVIDERS, _parse_list, _tts_providers_config, _write_provider_config # noqa: E402
+from stub_servers import StubSettings, start_stub_process # noqa: E402
+
+INITIAL_LIMIT = 8
+TEXT = "今天我们来聊一聊人工智能"
+
+def _check_error(error: BaseException, status: int) -> str:
+    if not isinstance(error, TTSRequestError):
+        return f"raised {type(error).__name__} instead of TTSRequestError: {error}"
+    if error.status_code != status:
+        return f"status_code is {error.status_code}, expected {status}"
+    return ""
+
+def _check_sync(adapter, voice_code: str, limiter: AIMDLimiter, status: int) -> str:
+    try:
+        with limiter.slot(len(TEXT)):
+            adapter.synthesize(TEXT, voice_code)
+    except Exception as e:
+        return _check_error(e, status)
+    return "request succeeded"
+
+async def _check_async(adapter, voice_code: str, limiter: AIMDLimiter, status: int) -> str:
+    try:
+        async with limiter.aslot(len(TEXT)):
+            await adapter.asynthesize(TEXT, voice_code)
+    except Exception as e:
+        return _check_error(e, status)
+    finally:
+        await aclose_async_http_client()
+    return "request succeeded"
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that a 429 from every TTS provider lowers that provider's adaptive concurrency limit.")
+    parser.add_argument("--providers", default=",".join(PROVIDERS), help=f"Comma-separated TTS providers (default: all of {', '.join(PROVIDERS)}).")
+    parser.add_argument("--status", type=int, default=429, help="HTTP status returned by the stand-in TTS server (default: 429).")
+    args = parser.parse_args()
+
+    stub_process, base_url = start_stub_process(StubSettings(tts_latency=0.0, tts_jitter=0.0, tts_error_rate=1.0, tts_error_status=args.status))
+    work_dir = tempfile.mkdtemp(prefix="check_overload_")
+    failures = 0
+    try:
+        tts_providers_config = _tts_providers_config(base_url)
+        for provider in _parse_list(args.providers):
+            config_data = podcast_generator._load_configuration_path(_write_provider_config(provider, base_url, work_dir))
+            adapter = podcast_generator._initialize_tts_adapter(config_data, tts_providers_config)
+            voice_code = config_data["voices"][0]["code"]
+            # 每种调用方式使用新的控制器（限制器每个冷却期内只下调一次），并确认其它服务商的限制不受影响
+            for mode in ("sync", "async"):
+                controller = ConcurrencyController()
+                limiters = {name: controller.limiter(name, {"initial": INITIAL_LIMIT}) for name in PROVIDERS}
+                limiter = limiters[provider]
+                if mode == "sync":
+                    problem = _check_sync(adapter, voice_code, limiter, args.status)
+                else:
+                    problem = asyncio.run(_check_async(adapter, voice_code, limiter, args.status))
+                if not problem and limiter.limit >= INITIAL_LIMIT:
+                    problem = f"limit stayed at {limiter.limit:g}"
+                changed = [name for name, other in limiters.items() if name != provider and other.limit != INITIAL_LIMIT]
+                if not problem and changed:
+                    problem = f"limits of {', '.join(changed)} changed too"
+                failures += bool(problem)
+                print(f"{provider:<12} {mode:<6} {'FAIL ' + problem if problem else f'ok (limit {INITIAL_LIMIT} -> {limiter.limit:g})'}")
+    finally:
+        stub_process.terminate()
+        stub_process.join(timeout=5)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if failures:
+        print(f"\n{failures} check(s) failed.")
+        sys.exit(1)
+    print("\nAll providers lower their concurrency limit on overload.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+端到端基准测试使用的本地替身服务：一个 HTTP 服务同时模拟 OpenAI 流式聊天接口和各 TTS 服务商的接口格式，
+延迟和抖动可配置，不消耗真实服务商的额度。
+
+路由（与 bench_e2e.py 生成的服务商配置对应）:
+    POST /v1/chat/completions                           OpenAI 流式聊天（SSE）；model 形如 stub-turns-40 时脚本包含 40 条对话
+    GET  /tts?text=...&voice=...                        IndexTTS / Edge TTS（GET + URL 模板），返回 MP3
+    POST /fish/v1/tts                                   Fish Audio（msgpack 请求体），返回 MP3
+    POST /minimax/v1/t2a_v2                             Minimax（JSON，音频为 hex 编码的 MP3）
+    POST /doubao/api/v3/tts/unidirectional              豆包（NDJSON 流，音频为 base64 编码的 MP3 分块）
+    POST /gemini/v1beta/models/{model}:generateContent  Gemini（JSON，音频为 base64 编码的 24kHz 16-bit PCM）
+
+合成音频的时长按文本长度计算（seconds_per_char），内容为带包络的正弦波，不会被静音裁剪掉。
+也可以单独运行，供手动调试或其它压测工具使用（在 server 目录下运行）:
+    python bench/stub_servers.py [--port 8900] [--tts-latency 0.3] [--tts-jitter 0.1] [--tts-error-rate 0.2]
+"""
+
+import argparse
+import base64
+import json
+import math
+import multiprocessing
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+PCM_SAMPLE_RATE = 24000
+
+# 生成脚本对话时使用的句子
+_SENTENCES = [
+    "今天我们来聊一聊人工智能在日常生活中的应用",
+    "这个问题其实没有想象中那么简单",
+    "我觉得最关键的还是数据的质量",
+    "很多听众朋友都在后台留言问过这个话题",
+    "说到这里我想起了一个很有意思的例子",
+    "从技术的角度来看这件事情有好几个层面",
+    "不过我们也要看到它带来的风险和挑战",
+    "那你觉得普通人应该怎么去适应这种变化呢",
+    "没错这也是为什么越来越多的公司开始重视它",
+    "好的那我们下一期再继续深入讨论",
+]
+
+class StubSettings:
+    """
+    替身服务的延迟设置。TTS 延迟和 LLM 首个 token 延迟都在 [latency - jitter, latency + jitter] 内均匀分布。
+    tts_error_rate 为 TTS 请求返回 tts_error_status（默认 429，附带 Retry-After: 1）的比例，用于检查过载处理。
+    """
+    def __init__(self, tts_latency: float = 0.3, tts_jitter: float = 0.1, llm_latency: float = 0.5, llm_jitter: float = 0.2,
+                 llm_token_interval: float = 0.005, seconds_per_char: float = 0.2, seed: int = 42,
+                 tts_error_rate: float = 0.0, tts_error_status: int = 429):
+        self.tts_latency = tts_latency
+        self.tts_jitter = tts_jitter
+        self.llm_latency = llm_latency
+        self.llm_jitter = llm_jitter
+        self.llm_token_interval = llm_token_interval
+        self.seconds_per_char = seconds_per_char
+        self.seed = seed
+        self.tts_error_rate = tts_error_rate
+        self.tts_error_status = tts_error_status
+
+class _AudioFactory:
+    """按时长（0.25 秒为单位）生成并缓存合成音频的 PCM 和 MP3。"""
+    def __init__(self, seconds_per_char: float):
+        self.seconds_per_char = seconds_per_char
+        self._lock = threading.Lock()
+        self._pcm = {}
+        self._mp3 = {}
+
+    def _quarters(self, text: str) -> int:
+        return max(2, round(len(text) * self.seconds_per_char * 4))
+
+    def pcm(self, text: str) -> bytes:
+        quarters = self._quarters(text)
+        with self._lock:
+            cached = self._pcm.get(quarters)
+        if cached is None:
+            t = np.arange(int(PCM_SAMPLE_RATE * quarters / 4)) / PCM_SAMPLE_RATE
+            envelope = 0.6 + 0.4 * np.sin(2 * math.pi * 3 * t)
+            samples = envelope * (0.6 * np.sin(2 * math.pi * 220 * t) + 0.2 * np.sin(2 * math.pi * 470 * t))
+            cached = (samples * 16000).astype("<i2").tobytes()
+            with self._lock:
+                self._pcm[quarters] = cached
+        return cached
+
+    def mp3(self, text: str) -> bytes:
+        quarters = self._quarters(text)
+        with self._lock:
+            cached = self._mp3.get(quarters)
+        if cached is None:
+            command = [
+                "ffmpeg", "-loglevel", "error",
+                "-f", "s16le", "-ar", str(PCM_SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+                "-c:a", "libmp3lame", "-b:a", "64k", "-f", "mp3", "pipe:1",
+            ]
+            cached = subprocess.run(command, input=self.pcm(text), capture_output=True, check=True).stdout
+            with self._lock:
+                self._mp3[quarters] = cached
+        return cached
+
+def _build_script(turns: int, rng: random.Random) -> str:
+    transcripts = []
+    for index in range(turns):
+        dialog = "，".join(rng.sample(_SENTENCES, rng.randint(1, 3))) + "。"
+        transcripts.append({"speaker_id": index % 2, "dialog": dialog})
+    return json.dumps({"podcast_transcripts": transcripts}, ensure_ascii=False, indent=2)
+
+def _build_overview(rng: random.Random) -> str:
+    body = "".join(rng.sample(_SENTENCES, 5))
+    return f"基准测试播客\n科技,人工智能\n{body}"
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # 支持 keep-alive，与真实服务商一致
+    server_version = "PodcastBenchStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- 通用工具 ---
+
+    @property
+    def settings(self) -> StubSettings:
+        return self.server.settings
+
+    def _sleep(self, latency: float, jitter: float):
+        with self.server.rng_lock:
+            delay = self.server.rng.uniform(latency - jitter, latency + jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_bytes(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data: dict, status: int = 200):
+        self._send_bytes(json.dumps(data).encode("utf-8"), "application/json", status)
+
+    def _send_tts_error(self) -> bool:
+        """按 tts_error_rate 返回错误状态；已返回错误时为 True。"""
+        if self.settings.tts_error_rate <= 0:
+            return False
+        with self.server.rng_lock:
+            failed = self.server.rng.random() < self.settings.tts_error_rate
+        if not failed:
+            return False
+        body = json.dumps({"error": "stub overload"}).encode("utf-8")
+        self.send_response(self.settings.tts_error_status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+
+    def _start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    # --- 路由 ---
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        if parsed.path == "/tts":
+            if self._send_tts_error():
+                return
+            text = urllib.parse.parse_qs(parsed.query).get("text", [""])[0]
+            self._sleep(self.settings.tts_latency, self.settings.tts_jitter)
+            self._send_bytes(self.server.audio.mp3(text), "audio/mpeg")
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        path = urllib.parse.urlparse(self.path).path
+        body = self._read_body()
+        if path == "/v1/chat/completions":
+            self._chat_completions(json.loads(body))
+        elif self._send_tts_error():
+            return
+        elif path == "/fish/v1/tts":
+            import msgpack
+            payload = msgpack.unpackb(body, raw=False)
+            self._sleep(self.settings.tts_latency, self.settings.tts_jitter)
+            self._send_bytes(self.server.audio.mp3(payload["text"]), "audio/mpeg")
+        elif path == "/minimax/v1/t2a_v2":
+            payload = json.loads(body)
+            self._sleep(self.settings.tts_latency, self.settings.tts_jitter)
+            self._send_json({"data": {"audio": self.server.audio.mp3(payload["text"]).hex(), "status": 2}, "base_resp": {"status_code": 0, "status_msg": "success"}})
+        elif path == "/doubao/api/v3/tts/unidirectional":
+            self._doubao(json.loads(body))
+        elif re.fullmatch(r"/gemini/v1beta/models/[^/]+:generateContent", path):
+            payload = json.loads(body)
+            text = payload["contents"][0]["parts"][0]["text"]
+            self._sleep(self.settings.tts_latency, self.settings.tts_jitter)
+            audio = base64.b64encode(self.server.audio.pcm(text)).decode("ascii")
+            self._send_json({"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": f"audio/L16;codec=pcm;rate={PCM_SAMPLE_RATE}", "data": audio}}]}}]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _doubao(self, payload: dict):
+        """把 MP3 分成若干块，以 NDJSON 逐行返回 base64 数据，最后一行 code 为 20000000；TTS 延迟分摊在首块之前和各块之间。"""
+        audio = self.server.audio.mp3(payload["req_params"]["text"])
+        chunk_size = 16 * 1024
+        chunks = [audio[i:i + chunk_size] for i in range(0, len(audio), chunk_size)]
+        self._sleep(self.settings.tts_latency / 2, self.settings.tts_jitter / 2)
+        self._start_chunked("application/json")
+        for chunk in chunks:
+            line = json.dumps({"code": 0, "message": "", "data": base64.b64encode(chunk).decode("ascii")})
+            self._write_chunk(line.encode("utf-8") + b"\n")
+            time.sleep(self.settings.tts_latency / 2 / len(chunks))
+        self._write_chunk(json.dumps({"code": 20000000, "message": "OK", "data": None}).encode("utf-8") + b"\n")
+        self._end_chunked()
+
+    def _chat_completions(self, request: dict):
+        """以 SSE 流式返回概要或脚本；系统提示词中包含 podcast_transcripts 时返回脚本。"""
+        system_message = next((message.get("content", "") for message in request.get("messages", []) if message.get("role") == "system"), "")
+        model = request.get("model", "")
+        match = re.search(r"turns-(\d+)", model)
+        with self.server.rng_lock:
+            rng = random.Random(self.server.rng.random())
+        if "podcast_transcripts" in system_message:
+            content = _build_script(int(match.group(1)) if match else 20, rng)
+        else:
+            content = _build_overview(rng)
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def _event(delta: dict, finish_reason=None) -> bytes:
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        self._sleep(self.settings.llm_latency, self.settings.llm_jitter)
+        self._start_chunked("text/event-stream")
+        self._write_chunk(_event({"role": "assistant", "content": ""}))
+        for i in range(0, len(content), 4): # 约 4 个字符一个 token
+            self._write_chunk(_event({"content": content[i:i + 4]}))
+            if self.settings.llm_token_interval > 0:
+                time.sleep(self.settings.llm_token_interval)
+        self._write_chunk(_event({}, "stop"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # 客户端放弃未读完的响应（例如收到错误状态后）会重置 keep-alive 连接，不必打印
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+def create_stub_server(settings: StubSettings, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    server = _StubHTTPServer((host, port), StubRequestHandler)
+    server.daemon_threads = True
+    server.settings = settings
+    server.audio = _AudioFactory(settings.seconds_per_char)
+    server.rng = random.Random(settings.seed)
+    server.rng_lock = threading.Lock()
+    return server
+
+def _serve(settings: StubSettings, host: str, port: int, ready):
+    server = create_stub_server(settings, host, port)
+    ready.send(server.server_address[1])
+    ready.close()
+    server.serve_forever()
+
+def start_stub_process(settings: StubSettings, host: str = "127.0.0.1", port: int = 0):
+    """
+    在独立进程中启动替身服务（其 CPU 开销不计入被测进程），返回 (进程, base_url)。
+    调用方负责 terminate() 该进程。
+    """
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.get_context("spawn").Process(target=_serve, args=(settings, host, port, child_conn), daemon=True)
+    process.start()
+    child_conn.close()
+    if not parent_conn.poll(30):
+        process.terminate()
+        raise RuntimeError("Stub server did not start within 30 seconds.")
+    return process, f"http://{host}:{parent_conn.recv()}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local stand-in LLM and TTS servers used by the end-to-end benchmark.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="Mean TTS latency in seconds (default: 0.3).")
+    parser.add_argument("--tts-jitter", type=float, default=0.1, help="TTS latency jitter in seconds (default: 0.1).")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mean LLM time to first token in seconds (default: 0.5).")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="LLM time to first token jitter in seconds (default: 0.2).")
+    parser.add_argument("--llm-token-interval", type=float, default=0.005, help="Delay between streamed tokens in seconds (default: 0.005).")
+    parser.add_argument("--seconds-per-char", type=float, default=0.2, help="Synthesized audio seconds per text character (default: 0.2).")
+    parser.add_argument("--tts-error-rate", type=float, default=0.0, help="Fraction of TTS requests answered with --tts-error-status (default: 0).")
+    parser.add_argument("--tts-error-status", type=int, default=429, help="HTTP status of failed TTS requests (default: 429).")
+    args = parser.parse_args()
+
+    settings = StubSettings(args.tts_latency, args.tts_jitter, args.llm_latency, args.llm_jitter, args.llm_token_interval, args.seconds_per_char,
+                            tts_error_rate=args.tts_error_rate, tts_error_status=args.tts_error_status)
+    server = create_stub_server(settings, args.host, args.port)
+    print(f"Stub LLM/TTS server listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# config_registry.py
+
+import os
+import json
+import threading
+from typing import Dict, List, Optional
+
+# 任务配置中保存 code -> 音色索引的键，由 ProviderConfig.task_config() 写入
+VOICES_BY_CODE_KEY = "_voices_by_code"
+
+class ProviderConfig:
+    """
+    一个 TTS 服务商配置文件的解析结果，以及预先计算的音色索引（code、locale、gender）。
+    实例在各任务之间共享，data 和 voices 不应被修改；任务需要修改配置时使用 task_config() 返回的副本。
+    """
+    def __init__(self, name: str, path: str, data: dict, mtime_ns: int, size: int):
+        self.name = name
+        self.path = path
+        self.data = data
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.voices: List[dict] = data.get("voices") or []
+        self.voices_by_code: Dict[str, dict] = {voice.get("code"): voice for voice in self.voices if voice.get("code")}
+        self.voices_by_locale: Dict[str, List[dict]] = {}
+        self.voices_by_gender: Dict[str, List[dict]] = {}
+        for voice in self.voices:
+            self.voices_by_locale.setdefault(str(voice.get("locale", "")).lower(), []).append(voice)
+            self.voices_by_gender.setdefault(str(voice.get("gender", "")).lower(), []).append(voice)
+
+    def voice(self, code: str) -> Optional[dict]:
+        return self.voices_by_code.get(code)
+
+    def find_voices(self, locale: Optional[str] = None, gender: Optional[str] = None) -> List[dict]:
+        """按 locale 和/或 gender（不区分大小写）筛选音色，保持配置文件中的顺序。"""
+        if locale is None and gender is None:
+            return self.voices
+        candidates = self.voices_by_locale.get(locale.lower(), []) if locale is not None else self.voices
+        if gender is not None:
+            gender_ids = {id(voice) for voice in self.voices_by_gender.get(gender.lower(), [])}
+            candidates = [voice for voice in candidates if id(voice) in gender_ids]
+        return candidates
+
+    def task_config(self) -> dict:
+        """返回供单个任务使用的配置副本（浅拷贝），附带 tts_provider 和 code -> 音色索引。"""
+        config_data = dict(self.data)
+        config_data["tts_provider"] = self.name
+        config_data[VOICES_BY_CODE_KEY] = self.voices_by_code
+        return config_data
+
+    def validate_pod_users(self, pod_users) -> None:
+        """
+        校验 podUsers 中的每个语音 code 都存在于该服务商的 voices 配置中，且音色有可用于脚本的名称。
+
+        Raises:
+            ValueError: 如果 podUsers 格式不正确或包含未知的语音 code。
+        """
+        if not isinstance(pod_users, list) or not pod_users:
+            raise ValueError("podUsers must be a non-empty list.")
+        for speaker_id, pod_user in enumerate(pod_users):
+            code = pod_user.get("code") if isinstance(pod_user, dict) else None
+            if not code:
+                raise ValueError(f"podUsers[{speaker_id}] has no voice code.")
+            voice = self.voices_by_code.get(code)
+            if voice is None:
+                raise ValueError(f"Voice code '{code}' (speaker_id={speaker_id}) is not configured for {self.name}.")
+            if not (voice.get("usedname") or voice.get("alias") or voice.get("name")):
+                raise ValueError(f"Voice code '{code}' (speaker_id={speaker_id}) has no name or alias in the {self.name} config.")
+
+def find_voice(config_data: dict, code: str) -> Optional[dict]:
+    """在任务配置中按 code 查找音色；来自注册表的配置使用预先计算的索引，其它配置逐个查找。"""
+    voices_by_code = config_data.get(VOICES_BY_CODE_KEY)
+    if voices_by_code is not None:
+        return voices_by_code.get(code)
+    return next((voice for voice in config_data.get("voices", []) if voice.get("code") == code), None)
+
+class ConfigRegistry:
+    """
+    服务商配置文件的进程内缓存。
+
+    每个文件只解析一次；之后的每次获取只做一次 stat，文件的 mtime 或大小变化时重新加载，
+    因此修改配置文件无需重启服务。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configs: Dict[str, ProviderConfig] = {}
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, config_path: str) -> ProviderConfig:
+        """
+        Raises:
+            FileNotFoundError: 如果配置文件不存在。
+            ValueError: 如果配置文件不是有效的 JSON。
+        """
+        path = os.path.abspath(config_path)
+        try:
+            stat_result = os.stat(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Error: Configuration file not found at {config_path}")
+        with self._lock:
+            cached = self._configs.get(path)
+            if cached is not None and cached.mtime_ns == stat_result.st_mtime_ns and cached.size == stat_result.st_size:
+                self.hits += 1
+                return cached
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Error decoding JSON from {config_path}: {e}")
+        name = os.path.splitext(os.path.basename(path))[0] # 从文件名中提取 tts_provider，例如 doubao-tts.json -> doubao-tts
+        provider_config = ProviderConfig(name, config_path, data, stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            self._configs[path] = provider_config
+            self.loads += 1
+        return provider_config
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "configs": {config.name: {"voices": len(config.voices), "mtime_ns": config.mtime_ns} for config in self._configs.values()},
+                "loads": self.loads,
+                "hits": self.hits,
+            }
+
+_config_registry: Optional[ConfigRegistry] = None
+_config_registry_lock = threading.Lock()
+
+def get_config_registry() -> ConfigRegistry:
+    """返回进程级的配置注册表单例。"""
+    global _config_registry
+    with _config_registry_lock:
+        if _config_registry is None:
+            _config_registry = ConfigRegistry()
+        return _config_registry
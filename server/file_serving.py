@@ -0,0 +1,143 @@
+# file_serving.py
+
+import os
+import stat
+import hashlib
+import asyncio
+from functools import lru_cache
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+
+# 设置后由反向代理（如 nginx 的 internal location）通过 X-Accel-Redirect 直接发送文件，例如 "/internal-output/"
+download_accel_redirect_prefix = os.getenv("PODCAST_DOWNLOAD_ACCEL_REDIRECT", "")
+# 生成后的音频文件不会再改变，允许客户端长期缓存
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@lru_cache(maxsize=1024)
+def _content_etag(path: str, size: int, mtime_ns: int) -> str:
+    # size 和 mtime_ns 参与缓存键，文件被替换后会重新计算
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """请求的 If-None-Match 是否与 etag 匹配（匹配时应返回 304）。"""
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")])
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单个字节范围（bytes=start-end、bytes=start-、bytes=-suffix），返回闭区间 (start, end)。
+    格式不支持（例如多个范围）时返回 None，按完整文件响应；范围无法满足时抛出 ValueError。
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    start_text, _, end_text = (part.strip() for part in ranges.strip().partition("-"))
+    if (start_text and not start_text.isdigit()) or (end_text and not end_text.isdigit()) or not (start_text or end_text):
+        return None # 语法无效的 Range 头按规范忽略
+    if not start_text:
+        suffix_length = int(end_text)
+        if suffix_length == 0:
+            raise ValueError("Empty suffix range.")
+        return max(0, size - suffix_length), size - 1
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable.")
+    return start, min(end, size - 1)
+
+class RangeFileResponse(Response):
+    """
+    发送文件的一段字节。ASGI 服务器支持 http.response.zerocopysend 扩展时直接交给内核发送，
+    否则以固定大小的块读取发送。
+    """
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, start: int, end: int, status_code: int, headers: dict, media_type: str, send_body: bool = True):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.length = end - start + 1
+        self.send_body = send_body
+        self.headers["content-length"] = str(self.length)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f.fileno(), "offset": self.start, "count": self.length, "more_body": False})
+            return
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        # 总是以空的结束消息收尾（文件在发送过程中被截断时同样如此）
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+async def serve_immutable_file(request: Request, directory: str, file_name: str, media_type: str) -> Response:
+    """
+    发送 directory 中一个生成后不再改变的文件，支持：
+    - 基于内容哈希的强 ETag、长期 Cache-Control，以及 If-None-Match 条件请求（304）；
+    - 单个字节范围请求（206/416）及 If-Range；
+    - HEAD 请求；
+    - 配置 PODCAST_DOWNLOAD_ACCEL_REDIRECT 时由反向代理通过 X-Accel-Redirect 直接发送文件。
+
+    Raises:
+        FileNotFoundError: 如果文件名不合法或文件不存在。
+    """
+    if not file_name or os.path.basename(file_name) != file_name or file_name in (".", ".."):
+        raise FileNotFoundError(file_name)
+    path = os.path.join(directory, file_name)
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except OSError:
+        raise FileNotFoundError(file_name)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(file_name)
+
+    size = stat_result.st_size
+    etag = await asyncio.to_thread(_content_etag, path, size, stat_result.st_mtime_ns)
+    headers = {
+        "etag": etag,
+        "cache-control": IMMUTABLE_CACHE_CONTROL,
+        "accept-ranges": "bytes",
+        "content-disposition": f"attachment; filename*=utf-8''{quote(file_name)}",
+    }
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"etag": etag, "cache-control": IMMUTABLE_CACHE_CONTROL})
+
+    if download_accel_redirect_prefix:
+        # 由反向代理处理范围请求并以 sendfile 发送
+        headers["x-accel-redirect"] = download_accel_redirect_prefix.rstrip("/") + "/" + quote(file_name)
+        return Response(status_code=200, headers=headers, media_type=media_type)
+
+    start, end, status_code = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and size > 0 and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={"content-range": f"bytes */{size}", "etag": etag})
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+    return RangeFileResponse(path, start, end, status_code, headers, media_type, send_body=request.method != "HEAD")
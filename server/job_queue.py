@@ -0,0 +1,141 @@
+# job_queue.py
+
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Awaitable, Callable, Optional
+
+import metrics
+
+# 同时执行的播客生成任务数，以及排队等待的任务数上限
+job_workers = int(os.getenv("PODCAST_JOB_WORKERS", "2"))
+job_queue_max_pending = int(os.getenv("PODCAST_JOB_QUEUE_SIZE", "32"))
+# 尚无历史数据时假定的单个任务耗时（秒），用于估算开始时间
+job_default_duration = float(os.getenv("PODCAST_JOB_DEFAULT_DURATION", "180"))
+
+class QueueFullError(Exception):
+    """队列已满；retry_after 为估计的可重新提交前需等待的秒数。"""
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full. Retry after {retry_after} seconds.")
+        self.retry_after = retry_after
+
+class _Job:
+    __slots__ = ("job_id", "priority", "factory", "enqueued_at", "started_at")
+
+    def __init__(self, job_id: str, priority: int, factory: Callable[[], Awaitable]):
+        self.job_id = job_id
+        self.priority = priority
+        self.factory = factory
+        self.enqueued_at = time.time()
+        self.started_at: Optional[float] = None
+
+class JobQueue:
+    """
+    带优先级和容量上限的 asyncio 任务队列。
+
+    固定数量的 worker 协程按优先级（数值大者优先，相同优先级先到先得）取出任务执行；排队任务达到
+    max_pending 时拒绝新任务。根据近期任务耗时的滑动平均估算排队任务的位置与开始时间。
+    所有方法都须在同一个事件循环中调用。
+    """
+    def __init__(self, workers: int = job_workers, max_pending: int = job_queue_max_pending, default_duration: float = job_default_duration):
+        self.workers = max(1, workers)
+        self.max_pending = max(0, max_pending)
+        self.average_duration = default_duration
+        self._heap = []
+        self._sequence = itertools.count()
+        self._running = {}
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._worker_tasks = []
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self):
+        """在当前事件循环中启动 worker 协程。"""
+        self._ready = asyncio.Semaphore(len(self._heap))
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """取消 worker 协程（包括正在执行的任务）。"""
+        for worker_task in self._worker_tasks:
+            worker_task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def check_capacity(self):
+        """队列已满时抛出 QueueFullError。提交前调用，之后在同一事件循环轮次内 submit 必定成功。"""
+        # 空闲 worker 会立即取走的任务不计入排队数
+        waiting = len(self._heap) - max(0, self.workers - len(self._running))
+        if waiting >= self.max_pending:
+            self.rejected += 1
+            raise QueueFullError(max(1, math.ceil(self._estimate_wait(0))))
+
+    def submit(self, job_id: str, factory: Callable[[], Awaitable], priority: int = 0):
+        """
+        提交任务。factory 在任务开始时被调用，返回要执行的协程。
+
+        Raises:
+            QueueFullError: 如果排队任务已达上限。
+        """
+        self.check_capacity()
+        job = _Job(job_id, priority, factory)
+        heapq.heappush(self._heap, (-priority, next(self._sequence), job))
+        if self._ready is not None:
+            self._ready.release()
+
+    async def _worker(self):
+        while True:
+            await self._ready.acquire()
+            _, _, job = heapq.heappop(self._heap)
+            job.started_at = time.time()
+            metrics.queue_wait_seconds.observe(job.started_at - job.enqueued_at)
+            self._running[job.job_id] = job
+            try:
+                await job.factory()
+                self.completed += 1
+            except asyncio.CancelledError:
+                self._running.pop(job.job_id, None)
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"Job {job.job_id} failed: {e}")
+            self._running.pop(job.job_id, None)
+            self.average_duration = 0.8 * self.average_duration + 0.2 * (time.time() - job.started_at)
+
+    def _ordered_pending(self):
+        return [job for _, _, job in sorted(self._heap)]
+
+    def _estimate_wait(self, jobs_ahead: int) -> float:
+        """估算前面还有 jobs_ahead 个排队任务时，再提交的任务需要等待多久才能开始。"""
+        now = time.time()
+        # 各 worker 空闲的预计时间：正在执行的任务按平均耗时估算剩余时间
+        free_at = [max(0.0, self.average_duration - (now - job.started_at)) for job in self._running.values()]
+        free_at.extend([0.0] * (self.workers - len(free_at)))
+        heapq.heapify(free_at)
+        for _ in range(jobs_ahead):
+            heapq.heapreplace(free_at, free_at[0] + self.average_duration)
+        return free_at[0]
+
+    def position(self, job_id: str) -> Optional[dict]:
+        """
+        返回排队任务的位置（前面等待的任务数）和估计开始时间（Unix 时间戳）；任务不在队列中时返回 None。
+        """
+        for index, job in enumerate(self._ordered_pending()):
+            if job.job_id == job_id:
+                return {"queue_position": index, "estimated_start_time": time.time() + self._estimate_wait(index)}
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": len(self._running),
+            "queued": len(self._heap),
+            "max_pending": self.max_pending,
+            "average_duration_seconds": round(self.average_duration, 1),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -1,9 +1,9 @@
-from fastapi import FastAPI, Request, HTTPException, Depends, Form, Header
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
-from typing import Optional, Dict
+from fastapi import FastAPI, Request, HTTPException, Depends, Form, Header, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Optional, Dict, List
 import uuid
 import asyncio
-from starlette.background import BackgroundTasks
+import functools
 from uuid import UUID
 import hashlib
 import hmac
@@ -13,16 +13,23 @@ import json
 import argparse
 from enum import Enum
 import shutil
-from PIL import Image, ImageDraw
-import random
-import schedule
-import threading
 from contextlib import asynccontextmanager # 导入 asynccontextmanager
 import httpx # 导入 httpx 库
-from io import BytesIO # 导入 BytesIO
 import base64 # 导入 base64
 
-from podcast_generator import generate_podcast_audio_api
+from podcast_generator import agenerate_podcast_audio_api
+from tts_adapters import aclose_async_http_client, get_adapter_registry
+from tts_cache import get_segment_cache
+from provider_control import get_concurrency_controller
+from task_store import create_task_store, current_owner, is_owner_alive
+from job_queue import JobQueue, QueueFullError
+from process_pool import ProcessJobPool
+from file_serving import IMMUTABLE_CACHE_CONTROL, etag_matches, serve_immutable_file
+from avatar import generate_pixel_avatar, get_avatar, get_cached_avatar
+from config_registry import get_config_registry
+from retention import RetentionManager
+from segment_stream import stream_segments_enabled, stream_segments
+import metrics
 
 class TaskStatus(str, Enum):
     PENDING = "pending"
@@ -39,13 +46,18 @@ async def lifespan(app: FastAPI):
     
     # 确保输出目录存在
     os.makedirs(output_dir, exist_ok=True)
+
+    # 上次运行中被中断的任务不会再完成，标记为失败，避免其 auth_id 一直无法提交新任务
+    for orphaned_task_id in await asyncio.to_thread(task_store.fail_orphaned_tasks, is_owner_alive):
+        print(f"Marked interrupted task {orphaned_task_id} as failed.")
+
+    # 启动任务队列的 worker
+    if process_pool is not None:
+        process_pool.start()
+    job_queue.start()
     
-    # 安排清理任务每30分钟运行一次
-    schedule.every(time_after).minutes.do(clean_output_directory)
-    
-    # 在单独的线程中启动调度器
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
+    # 在事件循环中启动输出目录的清理协程（按截止时间清理过期文件，并执行磁盘配额）
+    retention.start()
     
     print("FastAPI app started. Output directory cleaning is scheduled.")
     
@@ -55,32 +67,38 @@ async def lifespan(app: FastAPI):
     # 在应用关闭时运行的代码 (等同于 shutdown_event)
     print("FastAPI app is shutting down...")
     
-    # 发送信号让调度器线程停止
-    stop_scheduler_event.set()
-    
-    # 等待调度器线程结束（可选，但推荐）
-    # 注意：在 lifespan 中，我们无法直接访问在启动部分创建的 scheduler_thread 局部变量
-    # 因此，我们仍然需要一个全局事件标志来通信。
-    # 线程本身是守护线程(daemon=True)，如果主程序退出它也会被强制终止，
-    # 但优雅地停止是更好的实践。
-    print("Signaled scheduler to stop. Main application will now exit.")
+    # 停止清理协程
+    await retention.stop()
+
+    # 停止任务队列，未完成的任务会在下次启动时被标记为失败
+    await job_queue.stop()
+    if process_pool is not None:
+        await asyncio.to_thread(process_pool.stop)
+
+    # 关闭异步 TTS 适配器共享的 HTTP 连接池
+    await aclose_async_http_client()
+    task_store.close()
+    print("Main application will now exit.")
 
 
 # 在创建 FastAPI 实例时，传入 lifespan 函数
 app = FastAPI(lifespan=lifespan)
 
-# 全局标志，用于通知调度器线程停止
-stop_scheduler_event = threading.Event()
-
 # 全局配置
 output_dir = "output"
-time_after = 30
-
-# 内存中存储任务结果
-# {task_id: {"auth_id": auth_id, "status": TaskStatus, "result": any, "timestamp": float}}
-task_results: Dict[str, Dict[UUID, Dict]] = {}
-# 新增字典对象，key为音频文件名，value为task_results[auth_id][task_id]的值
-audio_file_mapping: Dict[str, Dict] = {}
+# 生成过程中按脚本顺序发布片段的目录，每个任务一个子目录，供 /podcast-stream 渐进式播放
+stream_root_dir = os.path.join(output_dir, "streams")
+
+# 任务存储：默认为 SQLite（WAL），服务重启后任务不丢失，多个 uvicorn worker 可共享
+# 每个任务：{"task_id": str, "auth_id": str, "status": TaskStatus, "result": any, "timestamp": float, ...}
+task_store = create_task_store()
+# 播客生成任务队列：固定数量的 worker 执行任务，超出排队上限的提交返回 429
+job_queue = JobQueue()
+# 执行模式：async（默认，在本进程的事件循环中生成）或 process（在工作进程池中生成，CPU 密集的处理不争用 GIL）
+execution_mode = os.getenv("PODCAST_EXECUTION_MODE", "async")
+if execution_mode not in ("async", "process"):
+    raise ValueError(f"Unsupported PODCAST_EXECUTION_MODE: {execution_mode}. Expected 'async' or 'process'.")
+process_pool = ProcessJobPool() if execution_mode == "process" else None
 
 # 签名验证配置
 SECRET_KEY = os.getenv("PODCAST_API_SECRET_KEY", "your-super-secret-key") # 在生产环境中请务必修改!
@@ -94,75 +112,78 @@ tts_provider_map = {
     "minimax": "../config/minimax.json",
 }
 
-# 定义一个函数来清理输出目录
-def clean_output_directory():
-    """
-    清理 output 目录中的旧文件以及 task_results 中过期的任务。
-    优先清理过期的任务及其关联文件，确保内存和文件系统同步。
-    """
-    print(f"Cleaning output directory and expired tasks from memory: {output_dir}")
-    now = time.time()
-    threshold = time_after * 60  # 清理阈值，单位秒
-
-    # 第一阶段：清理 task_results 中已完成且过期的任务及其关联文件
-    # 使用 list() 创建副本以安全地在迭代时修改原始字典
-    auth_ids_to_clean = []
-    for auth_id, tasks_by_auth in list(task_results.items()):
-        task_ids_to_clean = []
-        for task_id, task_info in list(tasks_by_auth.items()):
-            # 只要 timestamp 过期，无论任务状态如何，都进行清理
-            if (now - task_info["timestamp"] > threshold):
-                task_ids_to_clean.append(task_id)
-                
-                # 尝试删除对应的音频文件
-                output_audio_filepath = task_info.get("output_audio_filepath")
-                if output_audio_filepath:
-                    full_audio_path = os.path.join(output_dir, output_audio_filepath)
-                    try:
-                        if os.path.isfile(full_audio_path):
-                            os.unlink(full_audio_path)
-                            print(f"Deleted expired audio file: {full_audio_path}")
-                        else:
-                            print(f"Expired task {task_id} audio file {full_audio_path} not found or is not a file.")
-                    except Exception as e:
-                        print(f"Failed to delete audio file {full_audio_path}. Reason: {e}")
-
-                # 从 audio_file_mapping 中删除对应的条目
-                filename_without_ext = os.path.splitext(output_audio_filepath)[0] if output_audio_filepath else None
-                if filename_without_ext and filename_without_ext in audio_file_mapping:
-                    del audio_file_mapping[filename_without_ext]
-                    print(f"Removed audio_file_mapping entry for {filename_without_ext}.")
-
-        # 清理 task_results 中的任务
-        for task_id in task_ids_to_clean:
-            if task_id in task_results[auth_id]:
-                del task_results[auth_id][task_id]
-                print(f"Removed expired task {task_id} for auth_id {auth_id} from task_results.")
-        
-        # 如果该 auth_id 下没有其他任务，则删除 auth_id 的整个条目
-        if not task_results[auth_id]:
-            auth_ids_to_clean.append(auth_id)
-    
-    for auth_id in auth_ids_to_clean:
-        if auth_id in task_results:
-            del task_results[auth_id]
-            print(f"Removed empty auth_id {auth_id} from task_results.")
-
-    # 第二阶段：清理 output 目录中可能未被任务关联的孤立文件
-    # 或者那些任务还未过期，但文件因为某种原因在内存任务清理阶段没有被删除的文件
-    for filename in os.listdir(output_dir):
-        file_path = os.path.join(output_dir, filename)
-        try:
-            if os.path.isfile(file_path) or os.path.islink(file_path):
-                # 获取最后修改时间
-                if now - os.path.getmtime(file_path) > threshold:
-                    os.unlink(file_path)
-                    print(f"Deleted old unassociated file: {file_path}")
-            elif os.path.isdir(file_path):
-                # 可选地，递归删除旧的子目录或其中的文件
-                pass
-        except Exception as e:
-            print(f"Failed to delete {file_path}. Reason: {e}")
+def _task_stream_dir(task_id: str) -> str:
+    return os.path.join(stream_root_dir, task_id)
+
+def _expire_tasks(before_timestamp: float) -> list:
+    """
+    从任务存储中删除 timestamp 早于 before_timestamp 的任务（按 timestamp 索引查询，无论任务状态如何），
+    返回其关联的输出文件和片段流目录（相对 output 目录的路径），由清理协程删除。
+    """
+    expired_paths = []
+    for task_info in task_store.pop_expired(before_timestamp):
+        task_id = task_info.get("task_id")
+        if task_info.get("output_audio_filepath"):
+            expired_paths.append(task_info["output_audio_filepath"])
+        if task_id:
+            expired_paths.append(os.path.relpath(_task_stream_dir(task_id), output_dir))
+        print(f"Removed expired task {task_id} for auth_id {task_info.get('auth_id')} from the task store.")
+    return expired_paths
+
+# 生成进度写入任务存储的最短间隔（秒）
+progress_persist_interval = 1.0
+
+class _ProgressPersister:
+    """
+    把生成进度写入任务存储：只有阶段或完成百分比变化时才写入，且最多每 progress_persist_interval 秒一次，
+    期间的更新合并为最新的一条。写入在线程中依次进行，update() 在事件循环中调用，不会阻塞。
+    """
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self._pending: Optional[dict] = None # 尚未写入的最新进度
+        self._last_key = None
+        self._last_write = 0.0
+        self._flushing = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(progress: dict):
+        done, total = progress.get("segments_done"), progress.get("segments_total")
+        percent = int(100 * done / total) if done is not None and total else None
+        return progress.get("stage"), percent
+
+    def update(self, progress: dict):
+        key = self._key(progress)
+        if key == self._last_key:
+            return
+        self._last_key = key
+        self._pending = progress
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write())
+
+    async def _write(self):
+        while self._pending is not None:
+            delay = self._last_write + progress_persist_interval - time.monotonic()
+            if delay > 0 and not self._flushing.is_set():
+                try:
+                    await asyncio.wait_for(self._flushing.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            progress, self._pending = self._pending, None
+            self._last_write = time.monotonic()
+            try:
+                await task_store.aupdate_task(self.task_id, {"progress": progress})
+            except Exception as e:
+                print(f"Warning: failed to persist progress of task {self.task_id}: {e}")
+
+    async def flush(self):
+        """立即写入尚未写入的进度，并等待写入完成；在写入任务的最终状态之前调用。"""
+        self._flushing.set()
+        if self._writer is not None:
+            await self._writer
+
+# 输出目录的保留策略：按截止时间清理过期文件和任务，可选磁盘配额（淘汰最久未下载的音频）
+retention = RetentionManager(output_dir, expire_tasks=_expire_tasks)
 
 async def get_auth_id(x_auth_id: str = Header(..., alias="X-Auth-Id")):
     """
@@ -214,13 +235,16 @@ async def _generate_podcast_task(
     usetime: Optional[str] = None,
     lang: Optional[str] = None,
 ):
-    task_results[auth_id][task_id]["status"] = TaskStatus.RUNNING
+    task_id = str(task_id)
+    await task_store.aupdate_task(task_id, {"status": TaskStatus.RUNNING})
+    task_start_time = time.perf_counter()
+    progress = _ProgressPersister(task_id)
     try:
         parser = argparse.ArgumentParser(description="Generate podcast script and audio using OpenAI and local TTS.")
         parser.add_argument("--api-key", default=api_key, help="OpenAI API key.")
         parser.add_argument("--base-url", default=base_url, help="OpenAI API base URL (default: https://api.openai.com/v1).")
         parser.add_argument("--model", default=model, help="OpenAI model to use (default: gpt-3.5-turbo).")
-        parser.add_argument("--threads", type=int, default=threads, help="Number of threads to use for audio generation (default: 1).")
+        parser.add_argument("--threads", type=int, default=threads, help="Deprecated, ignored: TTS concurrency is adapted per provider.")
         parser.add_argument("--output-language", default=output_language, help="Output language for the podcast script (default: Chinese).")
         parser.add_argument("--usetime", default=usetime, help="Time duration for the podcast script (default: 10 minutes).")
         args = parser.parse_args([])
@@ -229,49 +253,55 @@ async def _generate_podcast_task(
         if not actual_config_path:
             raise ValueError(f"Invalid tts_provider: {tts_provider}.")
 
-        podcast_generation_results = await asyncio.to_thread(
-            generate_podcast_audio_api,
+
+        generation_kwargs = dict(
             args=args,
             config_path=actual_config_path,
             input_txt_content=input_txt_content.strip(),
             tts_providers_config_content=tts_providers_config_content.strip(),
-            podUsers_json_content=podUsers_json_content.strip()
+            podUsers_json_content=podUsers_json_content.strip(),
+            stream_dir=_task_stream_dir(task_id) if stream_segments_enabled else None,
         )
-        task_results[auth_id][task_id]["status"] = TaskStatus.COMPLETED
-        task_results[auth_id][task_id].update(podcast_generation_results)
-        print(f"\nPodcast generation completed for task {task_id}. Output file: {podcast_generation_results.get('output_audio_filepath')}")
-        # 更新 audio_file_mapping
-        output_audio_filepath = podcast_generation_results.get('output_audio_filepath')
-        if output_audio_filepath:
-            # 从完整路径中提取文件名
-            filename = os.path.basename(output_audio_filepath)
-            filename = filename.split(".")[0]
-            # 将任务信息添加到 audio_file_mapping
-            audio_file_mapping[filename] = task_results[auth_id][task_id]
-
-        # 生成并编码像素头像
-        avatar_bytes = generate_pixel_avatar(str(task_id)) # 使用 task_id 作为种子
+        if process_pool is not None:
+            podcast_generation_results = await process_pool.run(task_id, generation_kwargs, progress.update)
+        else:
+            # TTS 片段由事件循环上的全局调度器并发合成，不再为每个任务占用一个线程池
+            podcast_generation_results = await agenerate_podcast_audio_api(progress_callback=progress.update, **generation_kwargs)
+        # 生成并编码像素头像（task_id 不会重复，不经过头像缓存；绘制在线程中进行，不阻塞事件循环）
+        avatar_bytes = await asyncio.to_thread(generate_pixel_avatar, task_id) # 使用 task_id 作为种子
         avatar_base64 = base64.b64encode(avatar_bytes).decode('utf-8')
-        task_results[auth_id][task_id]["avatar_base64"] = avatar_base64 # 存储 Base64 编码的头像数据
+        # 结果中的输出文件名会被任务存储索引，供 /get-audio-info 查询
+        await progress.flush()
+        await task_store.aupdate_task(task_id, dict(podcast_generation_results, status=TaskStatus.COMPLETED, avatar_base64=avatar_base64)) # 存储 Base64 编码的头像数据
+        metrics.task_seconds.observe(time.perf_counter() - task_start_time, status="completed")
+        await retention.track(podcast_generation_results["output_audio_filepath"], episode=True)
+        print(f"\nPodcast generation completed for task {task_id}. Output file: {podcast_generation_results.get('output_audio_filepath')}")
     except Exception as e:
-        task_results[auth_id][task_id]["status"] = TaskStatus.FAILED
-        task_results[auth_id][task_id]["result"] = str(e)
+        await progress.flush()
+        await task_store.aupdate_task(task_id, {"status": TaskStatus.FAILED, "result": str(e)})
+        metrics.task_seconds.observe(time.perf_counter() - task_start_time, status="failed")
         print(f"\nPodcast generation failed for task {task_id}: {e}")
+        raise # 交给任务队列计入失败任务数（回调仍在 finally 中发送）
     finally: # 无论成功或失败，都尝试调用回调
+        if stream_segments_enabled:
+            await retention.track(os.path.relpath(_task_stream_dir(task_id), output_dir))
         if callback_url:
             print(f"Attempting to send callback for task {task_id} to {callback_url}")
+            task_info = await task_store.aget_task(task_id) or {}
             callback_data = {
-                "task_id": str(task_id),
+                "task_id": task_id,
                 "auth_id": auth_id,
-                "task_results": task_results[auth_id][task_id],
+                "task_results": task_info,
                 "timestamp": int(time.time()), 
-                "status": task_results[auth_id][task_id]["status"],
+                "status": task_info.get("status"),
                 "usetime": usetime,
                 "lang": lang,
             }
             
             MAX_RETRIES = 3 # 定义最大重试次数
             RETRY_DELAY = 5 # 定义重试间隔（秒）
+            callback_start_time = time.perf_counter()
+            callback_outcome = "failed"
             
             for attempt in range(MAX_RETRIES + 1): # 尝试次数从0到MAX_RETRIES
                 try:
@@ -279,6 +309,7 @@ async def _generate_podcast_task(
                         response = await client.put(callback_url, json=callback_data, timeout=30.0)
                         response.raise_for_status() # 对 4xx/5xx 响应抛出异常
                         print(f"Callback successfully sent for task {task_id} on attempt {attempt + 1}. Status: {response.status_code}")
+                        callback_outcome = "success"
                         break # 成功发送，跳出循环
                 except httpx.RequestError as req_err:
                     print(f"Callback request failed for task {task_id} to {callback_url} on attempt {attempt + 1}: {req_err}")
@@ -292,11 +323,11 @@ async def _generate_podcast_task(
                     await asyncio.sleep(RETRY_DELAY)
                 else:
                     print(f"Callback failed for task {task_id} after {MAX_RETRIES} attempts.") 
+            metrics.callback_seconds.observe(time.perf_counter() - callback_start_time, outcome=callback_outcome)
 
 # @app.post("/generate-podcast", dependencies=[Depends(verify_signature)])
 @app.post("/generate-podcast")
 async def generate_podcast_submission(
-    background_tasks: BackgroundTasks,
     auth_id: str = Depends(get_auth_id),
     api_key: str = Form("OpenAI API key."),
     base_url: str = Form("https://api.openai.com/v1"),
@@ -304,66 +335,93 @@ async def generate_podcast_submission(
     input_txt_content: str = Form(...),
     tts_providers_config_content: str = Form(...),
     podUsers_json_content: str = Form(...),
-    threads: int = Form(1),
+    threads: int = Form(1), # 已弃用：TTS 并发由各服务商的自适应并发控制决定，该参数会被忽略
     tts_provider: str = Form("index-tts"),
     callback_url: Optional[str] = Form(None),
     output_language: Optional[str] = Form(None),
     usetime: Optional[str] = Form(None),
     lang: Optional[str] = Form(None),
+    priority: int = Form(0),
 ):
     # 1. 验证 tts_provider
     if tts_provider not in tts_provider_map:
         raise HTTPException(status_code=400, detail=f"Invalid tts_provider: {tts_provider}.")
+    if not 0 <= priority <= 9:
+        raise HTTPException(status_code=400, detail="priority must be between 0 and 9.")
+    # 提交时即校验 podUsers 的语音 code，配置错误的任务不进入队列
+    try:
+        provider_config = await asyncio.to_thread(get_config_registry().get, tts_provider_map[tts_provider])
+        provider_config.validate_pod_users(json.loads(podUsers_json_content))
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid podUsers_json_content: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 队列已满时拒绝提交，并告知客户端多久后重试
+    try:
+        job_queue.check_capacity()
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
-    # 2. 检查此 auth_id 是否有正在运行的任务
-    if auth_id in task_results:
-        for existing_task_id, existing_task_info in task_results[auth_id].items():
-            if existing_task_info["status"] in (TaskStatus.RUNNING, TaskStatus.PENDING):
-                raise HTTPException(status_code=409, detail=f"There is already a running task (ID: {existing_task_id}) for this auth_id. Please wait for it to complete.")
-
+    # 2. 检查此 auth_id 是否有正在运行的任务，没有则创建任务（同一事务内完成，多 worker 下也不会重复创建）
     task_id = uuid.uuid4()
-    if auth_id not in task_results:
-        task_results[auth_id] = {}
-    task_results[auth_id][task_id] = {
+    existing_task_id = await task_store.acreate_task_if_idle(str(task_id), {
         "status": TaskStatus.PENDING,
         "result": None,
         "timestamp": time.time(),
         "callback_url": callback_url, # 存储回调地址
         "auth_id": auth_id, # 存储 auth_id
-    }
-
-    background_tasks.add_task(
-        _generate_podcast_task,
-        task_id,
-        auth_id,
-        api_key,
-        base_url,
-        model,
-        input_txt_content,
-        tts_providers_config_content,
-        podUsers_json_content,
-        threads,
-        tts_provider,
-        callback_url,
-        output_language,
-        usetime,
-        lang,
-    )
+        "owner": current_owner(), # 执行任务的进程，用于重启后识别中断的任务
+    })
+    if existing_task_id:
+        raise HTTPException(status_code=409, detail=f"There is already a running task (ID: {existing_task_id}) for this auth_id. Please wait for it to complete.")
 
-    return {"message": "Podcast generation started.", "task_id": task_id}
+    # 创建任务时让出了事件循环，队列可能已被其它请求占满；此时将任务标记为失败，不占用该 auth_id
+    try:
+        job_queue.submit(str(task_id), functools.partial(
+            _generate_podcast_task,
+            task_id,
+            auth_id,
+            api_key,
+            base_url,
+            model,
+            input_txt_content,
+            tts_providers_config_content,
+            podUsers_json_content,
+            threads,
+            tts_provider,
+            callback_url,
+            output_language,
+            usetime,
+            lang,
+        ), priority)
+    except QueueFullError as e:
+        await task_store.aupdate_task(str(task_id), {"status": TaskStatus.FAILED, "result": str(e)})
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    queue_info = job_queue.position(str(task_id)) or {}
+    # 记录估计开始时间，供其它 worker 进程查询状态时使用
+    await task_store.aupdate_task(str(task_id), {"estimated_start_time": queue_info.get("estimated_start_time")})
+
+    stream_url = f"/podcast-stream/{task_id}" if stream_segments_enabled else None
+    return {"message": "Podcast generation started.", "task_id": task_id, "stream_url": stream_url, **queue_info}
 
 # @app.get("/podcast-status", dependencies=[Depends(verify_signature)])
 @app.get("/podcast-status")
 async def get_podcast_status(
     auth_id: str = Depends(get_auth_id)
 ):
-    if auth_id not in task_results:
+    tasks_for_auth_id = await task_store.alist_tasks(auth_id)
+    if not tasks_for_auth_id:
         return {"message": "No tasks found for this auth_id.", "tasks": []}
 
     all_tasks_for_auth_id = []
-    for task_id, task_info in task_results.get(auth_id, {}).items():
+    for task_info in tasks_for_auth_id:
+        # 排队中的任务返回当前位置和估计开始时间
+        queue_info = None
+        if task_info["status"] == TaskStatus.PENDING:
+            queue_info = job_queue.position(task_info["task_id"]) or {"queue_position": None, "estimated_start_time": task_info.get("estimated_start_time")}
         all_tasks_for_auth_id.append({
-            "task_id": task_id,
+            "task_id": task_info["task_id"],
             "status": task_info["status"],
             "podUsers": task_info.get("podUsers"),
             "output_audio_filepath": task_info.get("output_audio_filepath"),
@@ -373,153 +431,188 @@ async def get_podcast_status(
             "audio_duration": task_info.get("audio_duration"),
             "title": task_info.get("title"),
             "tags": task_info.get("tags"),
+            "merge_stats": task_info.get("merge_stats"),
+            "progress": task_info.get("progress"),
+            "stream_url": f"/podcast-stream/{task_info['task_id']}" if stream_segments_enabled else None,
             "error": task_info["result"] if task_info["status"] == TaskStatus.FAILED else None,
-            "timestamp": task_info["timestamp"]
+            "timestamp": task_info["timestamp"],
+            "queue_position": queue_info.get("queue_position") if queue_info else None,
+            "estimated_start_time": queue_info.get("estimated_start_time") if queue_info else None,
         })
     return {"message": "Tasks retrieved successfully.", "tasks": all_tasks_for_auth_id}
 
-@app.get("/download-podcast/")
-async def download_podcast(file_name: str):
-    file_path = os.path.join(output_dir, file_name)
-    if not os.path.exists(file_path):
+@app.api_route("/download-podcast/", methods=["GET", "HEAD"])
+async def download_podcast(request: Request, file_name: str):
+    """
+    下载生成的音频。生成后的文件不会再改变：支持字节范围请求（拖动进度条）、基于内容哈希的 ETag、
+    长期缓存与条件请求（304）。
+    """
+    try:
+        response = await serve_immutable_file(request, output_dir, file_name, media_type='audio/mpeg')
+        retention.touch(file_name) # 磁盘配额按最近下载时间淘汰
+        return response
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found.")
-    return FileResponse(file_path, media_type='audio/mpeg', filename=file_name)
+
+@app.get("/podcast-stream/{task_id}")
+async def stream_podcast(task_id: UUID):
+    """
+    生成过程中渐进式播放：以分块传输的 MP3 按脚本顺序发送已合成的片段，下一个片段就绪后继续发送，
+    无需等待整期合并完成。任务结束后发送完所有片段即结束；完整的音频仍通过 /download-podcast/ 下载。
+    """
+    task_id = str(task_id)
+    task_info = await task_store.aget_task(task_id)
+    stream_dir = _task_stream_dir(task_id)
+    if not stream_segments_enabled or task_info is None:
+        raise HTTPException(status_code=404, detail="Stream not found.")
+
+    async def _is_active() -> bool:
+        current_task = await task_store.aget_task(task_id)
+        return current_task is not None and current_task["status"] in (TaskStatus.PENDING, TaskStatus.RUNNING)
+
+    if not await _is_active() and not await asyncio.to_thread(os.path.isdir, stream_dir):
+        raise HTTPException(status_code=404, detail="Stream not found.")
+    return StreamingResponse(
+        stream_segments(stream_dir, _is_active),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}, # 禁止反向代理缓冲
+    )
 
 @app.get("/get-audio-info/")
 async def get_audio_info(file_name: str):
     """
-    根据文件名从 audio_file_mapping 中获取对应的任务信息。
+    根据文件名从任务存储中获取对应的任务信息（按输出文件名索引查询）。
     """
-    # 移除文件扩展名（如果存在），因为 audio_file_mapping 的键是文件名（不含扩展名）
+    # 移除文件扩展名（如果存在），因为索引的是文件名（不含扩展名）
     base_file_name = os.path.splitext(file_name)[0]
 
-    audio_info = audio_file_mapping.get(base_file_name)
+    audio_info = await task_store.aget_task_by_audio_file(base_file_name)
     if audio_info:
-        # 返回任务信息的副本，避免直接暴露内部字典引用
-        return JSONResponse(content={k: str(v) if isinstance(v, UUID) else v for k, v in audio_info.items()})
+        return JSONResponse(content=audio_info)
     else:
         raise HTTPException(status_code=404, detail="Audio file information not found.")
 
+# 批量获取头像时单次请求的用户名数量上限
+max_batch_avatars = 100
+
 @app.get("/avatar/{username}")
-async def get_avatar(username: str):
+async def get_user_avatar(request: Request, username: str):
+    """
+    根据用户名生成并返回一个像素头像。相同用户名的头像不会改变，响应可被长期缓存。
     """
-    根据用户名生成并返回一个像素头像。
+    # 命中缓存时直接返回，未命中时在线程中绘制，不阻塞事件循环
+    avatar = get_cached_avatar(username) or await asyncio.to_thread(get_avatar, username)
+    avatar_bytes, etag = avatar
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=avatar_bytes, media_type="image/png", headers=headers)
+
+@app.get("/avatars")
+async def get_user_avatars(request: Request, usernames: List[str] = Query(...)):
     """
-    avatar_bytes = generate_pixel_avatar(username)
-    return StreamingResponse(BytesIO(avatar_bytes), media_type="image/png")
+    批量获取像素头像，返回 {"avatars": {用户名: Base64 编码的 PNG}}，供列表页一次请求取回所有头像。
+    """
+    usernames = list(dict.fromkeys(usernames))
+    if len(usernames) > max_batch_avatars:
+        raise HTTPException(status_code=400, detail=f"At most {max_batch_avatars} usernames per request.")
+    # 未缓存的头像需要绘制，整批在线程中完成
+    rendered = await asyncio.to_thread(lambda: [get_avatar(username) for username in usernames])
+    etag = '"' + hashlib.sha256("".join(avatar_etag for _, avatar_etag in rendered).encode('utf-8')).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    avatars = {username: base64.b64encode(avatar_bytes).decode('utf-8') for username, (avatar_bytes, _) in zip(usernames, rendered)}
+    return JSONResponse({"avatars": avatars}, headers=headers)
 
 @app.get("/get-voices")
-async def get_voices(tts_provider: str = "tts"):
+async def get_voices(tts_provider: str = "tts", locale: Optional[str] = None, gender: Optional[str] = None):
+    """
+    返回服务商的音色列表，可按 locale、gender 筛选。配置文件由配置注册表缓存，修改后自动重新加载。
+    """
     config_path = tts_provider_map.get(tts_provider)
     if not config_path:
         raise HTTPException(status_code=400, detail=f"Invalid tts_provider: {tts_provider}.")
 
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
-            
-        voices = config_data.get("voices")
-        if voices is None:
-            raise HTTPException(status_code=404, detail=f"No 'voices' key found in config for {tts_provider}.")
-
-        return {"tts_provider": tts_provider, "voices": voices}
+        provider_config = await asyncio.to_thread(get_config_registry().get, config_path)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Config file not found for {tts_provider}: {config_path}")
-    except json.JSONDecodeError:
+    except ValueError:
         raise HTTPException(status_code=500, detail=f"Error decoding JSON from config file for {tts_provider}: {config_path}. Please check file format.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
 
-@app.get("/")
-async def read_root():
-    return {"message": "FastAPI server is running!"}
+    if provider_config.data.get("voices") is None:
+        raise HTTPException(status_code=404, detail=f"No 'voices' key found in config for {tts_provider}.")
+    return {"tts_provider": tts_provider, "voices": provider_config.find_voices(locale, gender)}
 
-def generate_pixel_avatar(seed_string: str) -> bytes:
+@app.get("/admin/tts-cache", dependencies=[Depends(verify_signature)])
+async def get_tts_cache_stats():
     """
-    根据给定的字符串生成一个48x48像素的像素头像。
-    头像具有确定性（相同输入字符串生成相同头像）和对称性。
+    返回 TTS 片段缓存的命中/未命中计数和占用情况。
     """
-    size = 48
-    pixel_grid_size = 5 # 内部像素网格大小 (例如 5x5)
-    
-    # 使用SHA256哈希作为随机种子，确保确定性
-    hash_object = hashlib.sha256(seed_string.encode('utf-8'))
-    hash_hex = hash_object.hexdigest()
-    
-    # 将哈希值转换为整数，作为随机数生成器的种子
-    random.seed(int(hash_hex, 16))
-    
-    # 创建一个空白的48x48 RGBA图像
-    img = Image.new('RGBA', (size, size), (255, 255, 255, 0)) # 透明背景
-    draw = ImageDraw.Draw(img)
-    
-    # 随机生成头像的主颜色 (饱和度较高，亮度适中)
-    hue = random.randint(0, 360)
-    saturation = random.randint(70, 100) # 高饱和度
-    lightness = random.randint(40, 60)   # 适中亮度
-    
-    # 将HSL转换为RGB
-    def hsl_to_rgb(h, s, l):
-        h /= 360
-        s /= 100
-        l /= 100
-        
-        if s == 0:
-            return (int(l * 255), int(l * 255), int(l * 255), 255)
-        
-        def hue_to_rgb(p, q, t):
-            if t < 0: t += 1
-            if t > 1: t -= 1
-            if t < 1/6: return p + (q - p) * 6 * t
-            if t < 1/2: return q
-            if t < 2/3: return p + (q - p) * (2/3 - t) * 6
-            return p
-        
-        q = l * (1 + s) if l < 0.5 else l + s - l * s
-        p = 2 * l - q
-        
-        r = hue_to_rgb(p, q, h + 1/3)
-        g = hue_to_rgb(p, q, h)
-        b = hue_to_rgb(p, q, h - 1/3)
-        
-        return (int(r * 255), int(g * 255), int(b * 255), 255)
-        
-    main_color = hsl_to_rgb(hue, saturation, lightness)
-    
-    # 生成像素网格
-    # 只需生成一半的网格，然后对称复制
-    pixels = [[0 for _ in range(pixel_grid_size)] for _ in range(pixel_grid_size)]
-    
-    for y in range(pixel_grid_size):
-        for x in range((pixel_grid_size + 1) // 2): # 只生成左半部分或中间列
-            if random.random() > 0.5: # 50% 的几率填充像素
-                pixels[y][x] = 1 # 填充
-                pixels[y][pixel_grid_size - 1 - x] = 1 # 对称填充
-    
-    # 计算每个内部像素在最终图像中的大小
-    pixel_width = size // pixel_grid_size
-    pixel_height = size // pixel_grid_size
-    
-    # 绘制像素
-    for y in range(pixel_grid_size):
-        for x in range(pixel_grid_size):
-            if pixels[y][x] == 1:
-                draw.rectangle(
-                    [x * pixel_width, y * pixel_height, (x + 1) * pixel_width, (y + 1) * pixel_height],
-                    fill=main_color
-                )
-    
-    # 将图像转换为字节流
-    from io import BytesIO
-    byte_io = BytesIO()
-    img.save(byte_io, format='PNG')
-    return byte_io.getvalue()
-
-def run_scheduler():
-    """在循环中运行调度器，直到设置停止事件。"""
-    while not stop_scheduler_event.is_set():
-        schedule.run_pending()
-        time.sleep(1) # 每秒检查一次新任务或停止事件
+    return get_segment_cache().stats()
+
+@app.get("/admin/tts-adapters", dependencies=[Depends(verify_signature)])
+async def get_tts_adapter_stats():
+    """
+    返回 TTS 适配器注册表的复用情况，以及各服务商的请求数、新建连接数和连接复用率。
+    """
+    return get_adapter_registry().stats()
+
+@app.get("/admin/tts-concurrency", dependencies=[Depends(verify_signature)])
+async def get_tts_concurrency():
+    """
+    返回各 TTS 服务商当前的自适应并发限制、在途请求数和延迟统计，以及请求对冲、重试预算和熔断器的状态。
+    """
+    return get_concurrency_controller().snapshot()
+
+@app.get("/admin/job-queue", dependencies=[Depends(verify_signature)])
+async def get_job_queue_stats():
+    """
+    返回本进程任务队列的 worker 数、执行中与排队任务数以及平均任务耗时。
+    """
+    stats = job_queue.stats()
+    stats["execution_mode"] = execution_mode
+    if process_pool is not None:
+        stats["process_pool"] = process_pool.stats()
+    return stats
+
+@app.get("/admin/retention", dependencies=[Depends(verify_signature)])
+async def get_retention_stats():
+    """
+    返回输出目录保留策略的状态：跟踪的条目数、下一个截止时间、成品音频占用以及清理/淘汰计数。
+    """
+    return retention.stats()
+
+def _task_counts() -> dict:
+    stats = job_queue.stats()
+    return {("running",): stats["running"], ("pending",): stats["queued"]}
+
+def _tts_inflight() -> dict:
+    return {(provider,): snapshot["inflight"] for provider, snapshot in get_concurrency_controller().snapshot().items()}
+
+_CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+def _tts_circuit_states() -> dict:
+    return {(provider,): _CIRCUIT_STATE_VALUES[state] for provider, state in get_concurrency_controller().breaker_states().items()}
+
+metrics.get_metrics_registry().register(metrics.Gauge("podcast_tasks", "Podcast generation tasks of this API process by state.", ("state",), _task_counts))
+metrics.get_metrics_registry().register(metrics.Gauge("podcast_tts_inflight", "In-flight TTS requests per provider in this process.", ("provider",), _tts_inflight))
+metrics.get_metrics_registry().register(metrics.Gauge("podcast_tts_circuit_state", "Circuit breaker state per TTS provider in this process (0 closed, 1 half-open, 2 open).", ("provider",), _tts_circuit_states))
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    以 Prometheus 文本格式返回各阶段的耗时直方图（概要/脚本 LLM、各服务商 TTS、裁剪、音效、合并、排队、回调），
+    以及执行中/排队任务数和各服务商在途 TTS 请求数。进程池模式下工作进程的观测值会汇总到这里。
+    """
+    return Response(metrics.get_metrics_registry().render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/")
+async def read_root():
+    return {"message": "FastAPI server is running!"}
 
 if __name__ == "__main__":
     import uvicorn
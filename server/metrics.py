@@ -0,0 +1,181 @@
+# metrics.py
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# 默认的耗时分桶（秒），覆盖从单个 TTS 请求到整期播客生成
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+# 音频大小分桶（字节）
+BYTES_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels.items()) + "}"
+
+class Histogram:
+    """按标签分组的累积分桶直方图（Prometheus histogram 语义）。"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, list] = {} # 标签值 -> [各分桶计数..., sum]
+
+    def observe(self, value: float, **labels):
+        _registry.record(self.name, labels, value)
+
+    def _record(self, labels: dict, value: float):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """记录 with 语句块的耗时（无论是否抛出异常）。"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(dict(labels, le=_format_value(bound)))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-1])}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+class Counter:
+    """按标签分组的单调递增计数器。"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        _registry.record(self.name, labels, amount)
+
+    def _record(self, labels: dict, value: float):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def collect(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = dict(self._values)
+        for key, value in sorted(snapshot.items()):
+            yield f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+
+class Gauge:
+    """抓取时由回调计算当前值的仪表；回调返回 {标签值元组: 数值}。"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), callback: Optional[Callable[[], Dict[tuple, float]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def collect(self) -> Iterable[str]:
+        if self.callback is None:
+            return
+        try:
+            values = self.callback()
+        except Exception as e:
+            print(f"Warning: failed to collect gauge {self.name}: {e}")
+            return
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+
+class MetricsRegistry:
+    """
+    进程内的指标注册表，以 Prometheus 文本格式输出。
+
+    设置 forwarder 后，记录的观测值不在本进程累计，而是交给 forwarder 转发（用于进程池的工作进程，
+    由 API 进程调用 record 汇总）。
+    """
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self.forwarder: Optional[Callable[[str, dict, float], None]] = None
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def record(self, name: str, labels: dict, value: float):
+        forwarder = self.forwarder
+        if forwarder is not None:
+            try:
+                forwarder(name, labels, value)
+            except Exception as e:
+                print(f"Warning: failed to forward metric {name}: {e}")
+            return
+        metric = self._metrics.get(name)
+        if metric is not None:
+            metric._record(labels, value)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+_registry = MetricsRegistry()
+
+def get_metrics_registry() -> MetricsRegistry:
+    """返回进程级的指标注册表。"""
+    return _registry
+
+# --- 播客生成各阶段的指标 ---
+overview_llm_seconds = _registry.register(Histogram("podcast_overview_llm_seconds", "Latency of the overview LLM call."))
+script_llm_seconds = _registry.register(Histogram("podcast_script_llm_seconds", "Latency of the streamed podcast script LLM call."))
+script_llm_first_token_seconds = _registry.register(Histogram("podcast_script_llm_first_token_seconds", "Time to the first streamed token of the podcast script LLM call."))
+tts_request_seconds = _registry.register(Histogram("podcast_tts_request_seconds", "Latency of TTS requests per provider, including decoding and effects.", ("provider", "outcome")))
+tts_first_byte_seconds = _registry.register(Histogram("podcast_tts_first_byte_seconds", "Time from sending a streamed TTS request to its first audio chunk, per provider.", ("provider",)))
+tts_last_byte_seconds = _registry.register(Histogram("podcast_tts_last_byte_seconds", "Time from sending a streamed TTS request to its last audio chunk, per provider.", ("provider",)))
+tts_hedges = _registry.register(Counter("podcast_tts_hedges_total", "Hedged TTS requests per provider by outcome: won/lost against the original request, failed (both failed), or skipped by the hedge rate cap.", ("provider", "outcome")))
+tts_retries = _registry.register(Counter("podcast_tts_retries_total", "TTS retries per provider by outcome: allowed, or denied because the provider's shared retry budget was exhausted.", ("provider", "outcome")))
+tts_circuit_transitions = _registry.register(Counter("podcast_tts_circuit_transitions_total", "Circuit breaker state changes per TTS provider, by the state entered (open, half_open, closed).", ("provider", "state")))
+tts_circuit_rejections = _registry.register(Counter("podcast_tts_circuit_rejections_total", "TTS requests not sent because the provider's circuit breaker was open.", ("provider",)))
+tts_audio_bytes = _registry.register(Histogram("podcast_tts_audio_bytes", "Size of the audio returned by TTS requests per provider.", ("provider",), BYTES_BUCKETS))
+trim_seconds = _registry.register(Histogram("podcast_trim_seconds", "Duration of trimming silence from a segment."))
+effects_seconds = _registry.register(Histogram("podcast_effects_seconds", "Duration of applying volume/speed effects inside TTS adapters (the generation pipeline applies them while trimming)."))
+merge_seconds = _registry.register(Histogram("podcast_merge_seconds", "Duration of merging segments into the episode MP3.", ("mode",)))
+queue_wait_seconds = _registry.register(Histogram("podcast_queue_wait_seconds", "Time tasks spend in the job queue before starting."))
+task_seconds = _registry.register(Histogram("podcast_task_seconds", "Duration of podcast generation tasks.", ("status",)))
+callback_seconds = _registry.register(Histogram("podcast_callback_seconds", "Time to deliver task callbacks, including retries.", ("outcome",)))
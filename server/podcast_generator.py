@@ -13,13 +13,31 @@ from datetime import datetime
 from openai_cli import OpenAICli # Moved to top for proper import
 import urllib.parse # For URL encoding
 import re # For regular expression operations
-from typing import Optional, Tuple
-from tts_adapters import TTSAdapter, IndexTTSAdapter, EdgeTTSAdapter, FishAudioAdapter, MinimaxAdapter, DoubaoTTSAdapter, GeminiTTSAdapter # Import TTS adapters
+import random
+import heapq
+import itertools
+import threading
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from concurrent.futures import Future
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, Optional, Tuple, Union
+from tts_adapters import TTSAdapter, AsyncTTSAdapter, AdapterRegistry, get_adapter_registry, IndexTTSAdapter, EdgeTTSAdapter, FishAudioAdapter, MinimaxAdapter, DoubaoTTSAdapter, GeminiTTSAdapter # Import TTS adapters
+from tts_cache import SegmentCache, get_segment_cache # Content-addressed TTS segment cache
+from script_stream import TranscriptStreamParser # Incremental podcast script parser
+from config_registry import find_voice, get_config_registry # Parsed provider configs with voice indexes
+from segment_stream import SegmentStreamWriter # Progressive playback of the contiguous segment prefix
+from segment_planner import SegmentPlanner # Splits long dialogs and coalesces tiny ones before TTS
+from provider_control import CircuitOpenError, RequestCancelled, RequestHedger, get_concurrency_controller # Per-provider adaptive TTS concurrency, hedging, retry budget and circuit breaker
+from audio_processing import PCM_SAMPLE_RATE, PCM_CHANNELS, AudioBuffer, StreamingAudioDecoder, canonical_wav_frames, decode_audio_buffer, decode_audio_file, effects_filter, encode_canonical_wavs, save_audio_buffer, trim_silence, write_wav # In-process PCM processing
+import metrics # Per-stage latency histograms exposed on /metrics
 
 # Global configuration
 output_dir = "output"
 # file_list_path is now generated uniquely for each merge operation
 tts_providers_config_path = '../config/tts_providers.json'
+# Maximum in-flight async TTS requests across all tasks of the process
+tts_max_inflight = int(os.getenv("PODCAST_TTS_MAX_INFLIGHT", "64"))
 
 def read_file_content(filepath):
     """Reads content from a given file path."""
@@ -29,16 +47,6 @@ def read_file_content(filepath):
     except FileNotFoundError:
         raise FileNotFoundError(f"Error: File not found at {filepath}")
 
-def _load_json_config(file_path: str) -> dict:
-    """Loads a JSON configuration file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Error: Configuration file not found at {file_path}")
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Error decoding JSON from {file_path}: {e}")
-
 def select_json_config(config_dir='../config', return_file_path=False):
     """
     Reads JSON files from the specified directory and allows the user to select one.
@@ -111,7 +119,23 @@ def generate_speaker_id_text(pod_users, voices_list):
 
     return "。".join(speaker_info) + "。"
 
-def merge_audio_files(file_list_path: str):
+def merge_audio_files(file_list_path: str, merge_mode: str = "stream") -> Tuple[str, dict]:
+    """
+    Merges the audio files listed in file_list_path into the final MP3.
+
+    merge_mode:
+        "stream" (default): a single ffmpeg pass encodes the MP3 directly, without any full-length intermediate
+                            file. When every segment is a canonical PCM WAV (as produced by trim_audio_silence),
+                            their samples are copied straight into the encoder, so the episode is encoded exactly
+                            once and nothing is decoded or resampled during the merge.
+        "wav": the legacy two-pass mode, concatenating into a 44.1 kHz stereo WAV and then encoding it.
+
+    Returns a tuple of (MP3 filename, merge stats). The stats report the bytes read and written
+    during the merge and the peak disk usage of the merge in output_dir.
+    """
+    if merge_mode not in ("stream", "wav"):
+        raise ValueError(f"Unsupported merge_mode: {merge_mode}. Expected 'stream' or 'wav'.")
+
     # 生成一个唯一的UUID
     unique_id = str(uuid.uuid4())
     unique_id = unique_id.replace("-", "")
@@ -130,40 +154,93 @@ def merge_audio_files(file_list_path: str):
     except FileNotFoundError:
         raise RuntimeError("FFmpeg is not installed or not in your PATH. Please install FFmpeg to merge audio files. You can download FFmpeg from: https://ffmpeg.org/download.html")
 
-    print(f"\nMerging audio files into {output_audio_filename_wav}...")
+    segment_bytes = _sum_listed_file_sizes(file_list_path)
+    merge_start_time = time.time()
+    segment_paths = [os.path.join(output_dir, filename) for filename in _read_listed_files(file_list_path)]
+    segment_frames = [canonical_wav_frames(path) for path in segment_paths]
+    pcm_copy = merge_mode == "stream" and None not in segment_frames
+    audio_seconds = None
     try:
-        command = [
-            "ffmpeg",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", os.path.basename(file_list_path),  # Use the passed file_list_path
-            "-acodec", "pcm_s16le",
-            "-ar", "44100",
-            "-ac", "2",
-            output_audio_filename_wav # Output to WAV first
-        ]
-        # Execute ffmpeg from the output_dir to correctly resolve file paths in file_list.txt
-        process = subprocess.run(command, check=True, cwd=output_dir, capture_output=True, text=True)
-        print(f"Audio files merged successfully into {output_audio_filepath_wav}!")
-        print("FFmpeg stdout:\n", process.stdout)
-        print("FFmpeg stderr:\n", process.stderr)
-
-        # Convert WAV to MP3
-        print(f"Converting {output_audio_filename_wav} to {output_audio_filename_mp3} (high quality)...")
-        mp3_command = [
-            "ffmpeg",
-            "-i", output_audio_filename_wav,
-            "-vn", # No video
-            "-b:a", "192k", # Audio bitrate to 192kbps for high quality
-            "-acodec", "libmp3lame", # Use libmp3lame for MP3 encoding
-            output_audio_filename_mp3
-        ]
-        mp3_process = subprocess.run(mp3_command, check=True, cwd=output_dir, capture_output=True, text=True)
-        print(f"Conversion to MP3 successful! Output: {output_audio_filepath_mp3}")
-        print("FFmpeg MP3 stdout:\n", mp3_process.stdout)
-        print("FFmpeg MP3 stderr:\n", mp3_process.stderr)
-        
-        return output_audio_filename_mp3 # Return the MP3 filename
+        if pcm_copy:
+            print(f"\nCopying canonical PCM of {len(segment_paths)} segments into a single {output_audio_filename_mp3} encode...")
+            total_frames = encode_canonical_wavs(segment_paths, output_audio_filepath_mp3, [
+                "-ar", "44100",
+                "-ac", "2",
+                "-b:a", "192k", # Audio bitrate to 192kbps for high quality
+                "-acodec", "libmp3lame", # Use libmp3lame for MP3 encoding
+            ])
+            audio_seconds = total_frames / PCM_SAMPLE_RATE
+            print(f"Audio files merged successfully into {output_audio_filepath_mp3}!")
+            intermediate_bytes = 0
+        elif merge_mode == "stream":
+            print(f"\nMerging and encoding audio files into {output_audio_filename_mp3} in a single pass...")
+            command = [
+                "ffmpeg",
+                "-f", "concat",
+                "-safe", "0",
+                "-i", os.path.basename(file_list_path),  # Use the passed file_list_path
+                "-vn", # No video
+                "-ar", "44100",
+                "-ac", "2",
+                "-b:a", "192k", # Audio bitrate to 192kbps for high quality
+                "-acodec", "libmp3lame", # Use libmp3lame for MP3 encoding
+                output_audio_filename_mp3
+            ]
+            # Execute ffmpeg from the output_dir to correctly resolve file paths in file_list.txt
+            process = subprocess.run(command, check=True, cwd=output_dir, capture_output=True, text=True)
+            print(f"Audio files merged successfully into {output_audio_filepath_mp3}!")
+            print("FFmpeg stderr:\n", process.stderr)
+            intermediate_bytes = 0
+        else:
+            print(f"\nMerging audio files into {output_audio_filename_wav}...")
+            command = [
+                "ffmpeg",
+                "-f", "concat",
+                "-safe", "0",
+                "-i", os.path.basename(file_list_path),  # Use the passed file_list_path
+                "-acodec", "pcm_s16le",
+                "-ar", "44100",
+                "-ac", "2",
+                output_audio_filename_wav # Output to WAV first
+            ]
+            # Execute ffmpeg from the output_dir to correctly resolve file paths in file_list.txt
+            process = subprocess.run(command, check=True, cwd=output_dir, capture_output=True, text=True)
+            print(f"Audio files merged successfully into {output_audio_filepath_wav}!")
+            print("FFmpeg stdout:\n", process.stdout)
+            print("FFmpeg stderr:\n", process.stderr)
+            intermediate_bytes = os.path.getsize(output_audio_filepath_wav)
+
+            # Convert WAV to MP3
+            print(f"Converting {output_audio_filename_wav} to {output_audio_filename_mp3} (high quality)...")
+            mp3_command = [
+                "ffmpeg",
+                "-i", output_audio_filename_wav,
+                "-vn", # No video
+                "-b:a", "192k", # Audio bitrate to 192kbps for high quality
+                "-acodec", "libmp3lame", # Use libmp3lame for MP3 encoding
+                output_audio_filename_mp3
+            ]
+            mp3_process = subprocess.run(mp3_command, check=True, cwd=output_dir, capture_output=True, text=True)
+            print(f"Conversion to MP3 successful! Output: {output_audio_filepath_mp3}")
+            print("FFmpeg MP3 stdout:\n", mp3_process.stdout)
+            print("FFmpeg MP3 stderr:\n", mp3_process.stderr)
+
+        output_bytes = os.path.getsize(output_audio_filepath_mp3)
+        merge_stats = {
+            "mode": merge_mode,
+            "pcm_copy": pcm_copy, # 片段为规范 PCM，合并时直接复制采样数据
+            "segment_count": len(segment_paths),
+            "bytes_read": segment_bytes + intermediate_bytes, # 片段读取 + 中间 WAV 回读
+            "bytes_written": intermediate_bytes + output_bytes,
+            "intermediate_bytes": intermediate_bytes,
+            "output_bytes": output_bytes,
+            "peak_disk_bytes": segment_bytes + intermediate_bytes + output_bytes, # 清理前片段、中间文件与输出同时存在
+            "duration_seconds": round(time.time() - merge_start_time, 3),
+            "audio_seconds": round(audio_seconds, 3) if audio_seconds is not None else None,
+        }
+        metrics.merge_seconds.observe(time.time() - merge_start_time, mode=merge_mode)
+        print(f"Merge stats: {merge_stats}")
+        return output_audio_filename_mp3, merge_stats # Return the MP3 filename and merge stats
     except subprocess.CalledProcessError as e:
         raise RuntimeError(f"Error merging or converting audio files with FFmpeg: {e.stderr}")
     finally:
@@ -171,19 +248,14 @@ def merge_audio_files(file_list_path: str):
         try:
             # Read the file list and delete the audio files listed
             if os.path.exists(file_list_path):
-                with open(file_list_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        # Parse lines like: file 'temp_audio_12345.mp3'
-                        if line.startswith("file "):
-                            # Extract the filename, removing quotes
-                            filename = line[5:].strip().strip("'\"")
-                            filepath = os.path.join(output_dir, filename)
-                            try:
-                                if os.path.exists(filepath):
-                                    os.remove(filepath)
-                                    print(f"Deleted audio file: {filename}")
-                            except OSError as e:
-                                print(f"Error removing audio file {filename}: {e}")
+                for filename in _read_listed_files(file_list_path):
+                    filepath = os.path.join(output_dir, filename)
+                    try:
+                        if os.path.exists(filepath):
+                            os.remove(filepath)
+                            print(f"Deleted audio file: {filename}")
+                    except OSError as e:
+                        print(f"Error removing audio file {filename}: {e}")
                 
                 # Delete the file list itself
                 try:
@@ -204,6 +276,27 @@ def merge_audio_files(file_list_path: str):
         
         print("Cleaned up temporary files.")
 
+def _read_listed_files(file_list_path: str) -> list:
+    """Returns the filenames listed in an ffmpeg concat file list."""
+    filenames = []
+    with open(file_list_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            # Parse lines like: file 'temp_audio_12345.mp3'
+            if line.startswith("file "):
+                # Extract the filename, removing quotes
+                filenames.append(line[5:].strip().strip("'\""))
+    return filenames
+
+def _sum_listed_file_sizes(file_list_path: str) -> int:
+    """Returns the total size in bytes of the files listed in an ffmpeg concat file list."""
+    total = 0
+    for filename in _read_listed_files(file_list_path):
+        try:
+            total += os.path.getsize(os.path.join(output_dir, filename))
+        except OSError:
+            pass
+    return total
+
 def get_audio_duration(filepath: str) -> Optional[float]:
     """
     Uses ffprobe to get the duration of an audio file in seconds.
@@ -237,16 +330,62 @@ def get_audio_duration(filepath: str) -> Optional[float]:
         print(f"An unexpected error occurred while getting audio duration for {filepath}: {e}")
         return None
 
-def trim_audio_silence(input_filepath: str, output_filepath: str, silence_threshold_db: float = -60, min_silence_duration: float = 0.5):
+def trim_audio_silence(input_filepath: Union[str, AudioBuffer], output_filepath: str, silence_threshold_db: float = -60, min_silence_duration: float = 0.5, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0):
     """
-    Removes leading and trailing silence from an audio file using ffmpeg.
-    
+    Removes leading and trailing silence from an audio file, optionally applying volume and speed adjustments.
+
+    The input is decoded once into canonical PCM, with the volume/speed adjustments applied in the same
+    decode, and the silence bounds are found with vectorized RMS math in-process, so no ffmpeg/ffprobe is
+    spawned for detection or trimming. The trimmed samples are written to output_filepath as a canonical
+    PCM WAV (no lossy re-encode). Falls back to the FFmpeg silencedetect chain when numpy is not installed.
+
     Args:
-        input_filepath (str): Path to the input audio file.
-        output_filepath (str): Path where the trimmed audio file will be saved.
+        input_filepath (str | AudioBuffer): Path to the input audio file, or the in-memory audio returned by
+                                            a TTS adapter (decoded straight from memory, never written to disk).
+        output_filepath (str): Path where the trimmed WAV file will be saved.
         silence_threshold_db (float): Silence threshold in dB. Audio below this level is considered silence.
         min_silence_duration (float): Minimum duration of silence to detect, in seconds.
+        volume_adjustment (float): Gain in dB applied while decoding.
+        speed_adjustment (float): Speed change in percent (10 means +10%) applied while decoding.
     """
+    if isinstance(input_filepath, AudioBuffer):
+        audio = input_filepath
+        input_filepath = f"{len(audio)} bytes of in-memory {audio.format} audio"
+    else:
+        audio = None
+    print(f"Trimming silence from {input_filepath}...")
+    try:
+        if audio is not None:
+            samples = decode_audio_buffer(audio, volume_adjustment=volume_adjustment, speed_adjustment=speed_adjustment)
+        else:
+            samples = decode_audio_file(input_filepath, volume_adjustment=volume_adjustment, speed_adjustment=speed_adjustment)
+    except ImportError as e:
+        print(f"Warning: {e} Falling back to FFmpeg silence trimming.")
+        if audio is None:
+            return _trim_audio_silence_ffmpeg(input_filepath, output_filepath, silence_threshold_db, min_silence_duration, volume_adjustment, speed_adjustment)
+        # The ffmpeg chain needs a seekable input file, so the buffer is spilled to disk only on this path
+        spilled_audio_file = os.path.join(os.path.dirname(output_filepath) or ".", f"temp_audio_{uuid.uuid4()}{audio.extension}")
+        save_audio_buffer(audio, spilled_audio_file)
+        try:
+            return _trim_audio_silence_ffmpeg(spilled_audio_file, output_filepath, silence_threshold_db, min_silence_duration, volume_adjustment, speed_adjustment)
+        finally:
+            os.remove(spilled_audio_file)
+
+    try:
+        trimmed_samples = trim_silence(samples, PCM_SAMPLE_RATE, silence_threshold_db, min_silence_duration)
+        write_wav(output_filepath, trimmed_samples, PCM_SAMPLE_RATE)
+        print(f"Trimmed audio saved to {output_filepath}. Original duration: {len(samples) / PCM_SAMPLE_RATE:.2f}s, Trimmed duration: {len(trimmed_samples) / PCM_SAMPLE_RATE:.2f}s")
+    except Exception as e:
+        raise RuntimeError(f"An unexpected error occurred during audio trimming for {input_filepath}: {e}")
+
+def _trim_audio_silence_ffmpeg(input_filepath: str, output_filepath: str, silence_threshold_db: float = -60, min_silence_duration: float = 0.5, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0):
+    """
+    Removes leading and trailing silence from an audio file using the ffmpeg silencedetect chain.
+    Used when numpy is unavailable; the output is a canonical PCM WAV like trim_audio_silence, with the
+    volume/speed adjustments applied in the same ffmpeg pass that writes it.
+    """
+    audio_filter = effects_filter(volume_adjustment, speed_adjustment)
+    wav_output_args = (["-af", audio_filter] if audio_filter else []) + ["-acodec", "pcm_s16le", "-ar", str(PCM_SAMPLE_RATE), "-ac", str(PCM_CHANNELS)]
     try:
         # Check if ffmpeg is available
         subprocess.run(["ffmpeg", "-version"], check=True, capture_output=True)
@@ -289,7 +428,7 @@ def trim_audio_silence(input_filepath: str, output_filepath: str, silence_thresh
         current_audio_duration = get_audio_duration(input_filepath)
         if current_audio_duration is None:
             print(f"Warning: Could not get duration for {input_filepath}. Skipping silence trim.")
-            subprocess.run(["ffmpeg", "-i", input_filepath, "-c", "copy", output_filepath], check=True)
+            subprocess.run(["ffmpeg", "-i", input_filepath, *wav_output_args, output_filepath], check=True)
             return
 
         start_trim_val = 0.0 # Initialize start_trim_val
@@ -309,17 +448,16 @@ def trim_audio_silence(input_filepath: str, output_filepath: str, silence_thresh
         if (end_trim_val - start_trim_val) <= 0.01: # Add a small epsilon to avoid issues with very short audios
             print(f"Skipping trim for {input_filepath}: trimmed duration too short or negative. Copying original.")
             # If trimming would result in empty or near-empty file, just copy the original
-            subprocess.run(["ffmpeg", "-i", input_filepath, "-c", "copy", output_filepath], check=True)
+            subprocess.run(["ffmpeg", "-i", input_filepath, *wav_output_args, output_filepath], check=True)
         else:
             # Perform the actual trim using detected silence points
             trim_command = [
                 "ffmpeg",
                 "-ss", str(start_trim_val), # Move -ss before -i for accurate seeking
+                "-t", str(end_trim_val - start_trim_val), # Input duration, so a speed adjustment does not shift the cut
                 "-i", input_filepath,
-                "-to", str(end_trim_val),
                 "-avoid_negative_ts", "auto", # Add to handle potential time stamp issues
-                "-c:a", "libmp3lame",  # Re-encode to MP3 for consistency and smaller size
-                "-q:a", "2",           # High quality
+                *wav_output_args, # Canonical PCM WAV, same as the in-process trimmer
                 output_filepath
             ]
             subprocess.run(trim_command, check=True, capture_output=True, text=True)
@@ -339,7 +477,7 @@ def _parse_arguments():
     parser.add_argument("--api-key", help="OpenAI API key.")
     parser.add_argument("--base-url", default="https://api.openai.com/v1", help="OpenAI API base URL (default: https://api.openai.com/v1).")
     parser.add_argument("--model", default="gpt-3.5-turbo", help="OpenAI model to use (default: gpt-3.5-turbo).")
-    parser.add_argument("--threads", type=int, default=1, help="Number of threads to use for audio generation (default: 1).")
+    parser.add_argument("--threads", type=int, default=None, help="Deprecated: maximum worker threads for audio generation. TTS concurrency is adapted per provider (default: adaptive).")
     parser.add_argument("--output-language", type=str, default=None, help="Language for the podcast overview and script (default: Chinese).")
     parser.add_argument("--usetime", type=str, default=None, help="Specific time to be mentioned in the podcast script, e.g., 10 minutes, 1 hour.")
 
@@ -361,17 +499,13 @@ def _load_configuration():
     return config_data
 
 def _load_configuration_path(config_path: str) -> dict:
-    """Loads JSON configuration from a specified path and infers tts_provider from the file name."""
-    config_data = _load_json_config(config_path)
-    
-    # 从文件名中提取 tts_provider
-    file_name = os.path.basename(config_path)
-    tts_provider = os.path.splitext(file_name)[0] # 移除 .json 扩展名
-    
-    config_data["tts_provider"] = tts_provider # 将 tts_provider 添加到配置数据中
-    
-    print(f"\nLoaded Configuration: {tts_provider} from {config_path}")
-    return config_data    
+    """
+    Returns a per-task copy of the configuration at config_path, with tts_provider inferred from the file name.
+    The file is parsed once by the config registry and reloaded only when it changes.
+    """
+    config_data = get_config_registry().get(config_path).task_config()
+    print(f"\nLoaded Configuration: {config_data['tts_provider']} from {config_path}")
+    return config_data
 
 def _prepare_openai_settings(args, config_data):
     """Determines final OpenAI API key, base URL, and model based on priority."""
@@ -436,8 +570,9 @@ def _generate_overview_content(api_key, base_url, model, overview_prompt, input_
         formatted_overview_prompt = overview_prompt.replace("{{outlang}}", output_language if output_language is not None else "Make sure the input language is set as the output language")
         
         openai_client_overview = OpenAICli(api_key=api_key, base_url=base_url, model=model, system_message=formatted_overview_prompt)
-        overview_response_generator = openai_client_overview.chat_completion(messages=[{"role": "user", "content": input_prompt}])
-        overview_content = "".join([chunk.choices[0].delta.content for chunk in overview_response_generator if chunk.choices and chunk.choices[0].delta.content])
+        with metrics.overview_llm_seconds.time():
+            overview_response_generator = openai_client_overview.chat_completion(messages=[{"role": "user", "content": input_prompt}])
+            overview_content = "".join([chunk.choices[0].delta.content for chunk in overview_response_generator if chunk.choices and chunk.choices[0].delta.content])
 
         # Extract title (first line) and tags (second line)
         lines = overview_content.strip().split('\n')
@@ -463,6 +598,26 @@ def _generate_overview_content(api_key, base_url, model, overview_prompt, input_
     except Exception as e:
         raise RuntimeError(f"Error generating overview: {e}")
 
+def _find_podcast_script_json(podscript_json_str: str) -> Tuple[Optional[dict], str]:
+    """Finds the first JSON object with a 'podcast_transcripts' key in the raw LLM response."""
+    decoder = json.JSONDecoder()
+    idx = 0
+
+    while idx < len(podscript_json_str):
+        try:
+            obj, end = decoder.raw_decode(podscript_json_str[idx:])
+            if isinstance(obj, dict) and "podcast_transcripts" in obj:
+                return obj, podscript_json_str[idx : idx + end]
+            idx += end
+        except json.JSONDecodeError:
+            idx += 1
+            next_brace = podscript_json_str.find('{', idx)
+            if next_brace != -1:
+                idx = next_brace
+            else:
+                break
+    return None, ""
+
 def _generate_podcast_script(api_key, base_url, model, podscript_prompt, overview_content):
     """Generates and parses podcast script JSON using OpenAI CLI."""
     print("\nGenerating podcast script with OpenAI CLI...")
@@ -473,26 +628,7 @@ def _generate_podcast_script(api_key, base_url, model, podscript_prompt, overvie
         # Generate the response string first
         podscript_json_str = "".join([chunk.choices[0].delta.content for chunk in openai_client_podscript.chat_completion(messages=[{"role": "user", "content": overview_content}]) if chunk.choices and chunk.choices[0].delta.content])
 
-        podcast_script = None
-        decoder = json.JSONDecoder()
-        idx = 0
-        valid_json_str = ""
-
-        while idx < len(podscript_json_str):
-            try:
-                obj, end = decoder.raw_decode(podscript_json_str[idx:])
-                if isinstance(obj, dict) and "podcast_transcripts" in obj:
-                    podcast_script = obj
-                    valid_json_str = podscript_json_str[idx : idx + end]
-                    break
-                idx += end
-            except json.JSONDecodeError:
-                idx += 1
-                next_brace = podscript_json_str.find('{', idx)
-                if next_brace != -1:
-                    idx = next_brace
-                else:
-                    break
+        podcast_script, valid_json_str = _find_podcast_script_json(podscript_json_str)
 
         if podcast_script is None:
             raise ValueError(f"Error: Could not find a valid podcast script JSON object with 'podcast_transcripts' key in response. Raw response: {podscript_json_str}")
@@ -507,8 +643,56 @@ def _generate_podcast_script(api_key, base_url, model, podscript_prompt, overvie
     except Exception as e:
         raise RuntimeError(f"Error generating podcast script: {e}")
 
-def generate_audio_for_item(item, config_data, tts_adapter: TTSAdapter, max_retries: int = 3):
-    """Generate audio for a single podcast transcript item using the provided TTS adapter."""
+def _stream_podcast_script(api_key, base_url, model, podscript_prompt, overview_content, podcast_script: dict):
+    """
+    Streams the podcast script from OpenAI CLI and yields each transcript item as soon as its JSON object closes,
+    so TTS can start while the LLM is still generating.
+
+    Yielded items are also appended to podcast_script["podcast_transcripts"]. When the stream ends the full
+    response is parsed as in _generate_podcast_script; that parse is authoritative, so podcast_script is updated
+    with it and any items the incremental parser missed are yielded at the end.
+    """
+    print("\nStreaming podcast script with OpenAI CLI...")
+    podcast_script.setdefault("podcast_transcripts", [])
+    parser = TranscriptStreamParser()
+    llm_start_time = time.perf_counter()
+    first_token_seen = False
+    try:
+        openai_client_podscript = OpenAICli(api_key=api_key, base_url=base_url, model=model, system_message=podscript_prompt)
+        for chunk in openai_client_podscript.chat_completion(messages=[{"role": "user", "content": overview_content}]):
+            if chunk.choices and chunk.choices[0].delta.content:
+                if not first_token_seen:
+                    first_token_seen = True
+                    metrics.script_llm_first_token_seconds.observe(time.perf_counter() - llm_start_time)
+                for item in parser.feed(chunk.choices[0].delta.content):
+                    podcast_script["podcast_transcripts"].append(item)
+                    yield item
+    except Exception as e:
+        raise RuntimeError(f"Error generating podcast script: {e}")
+    finally:
+        # 包含消费者处理已产出条目的时间（只是提交到线程池或创建协程，可以忽略）
+        metrics.script_llm_seconds.observe(time.perf_counter() - llm_start_time)
+
+    streamed_count = len(podcast_script["podcast_transcripts"])
+    full_script, valid_json_str = _find_podcast_script_json(parser.text)
+    if full_script is None:
+        if streamed_count == 0:
+            raise ValueError(f"Error: Could not find a valid podcast script JSON object with 'podcast_transcripts' key in response. Raw response: {parser.text}")
+        print("Warning: Full podcast script JSON could not be parsed; using the incrementally parsed transcripts.")
+    else:
+        podcast_script.update(full_script)
+        full_transcripts = full_script.get("podcast_transcripts") or []
+        podcast_script["podcast_transcripts"] = full_transcripts
+        for item in full_transcripts[streamed_count:]:
+            yield item
+        print(valid_json_str[:100] + "...")
+
+    print("\nGenerated Podcast Script Length:" + str(len(podcast_script["podcast_transcripts"])))
+    if not podcast_script["podcast_transcripts"]:
+        raise ValueError("Error: 'podcast_transcripts' array is empty or not found in the generated script. Nothing to convert to audio.")
+
+def _resolve_item_request(item, config_data):
+    """Resolves the speaker's voice code and adjustments for a transcript item and sanitizes its dialog."""
     speaker_id = item.get("speaker_id")
     dialog = item.get("dialog")
 
@@ -520,10 +704,10 @@ def generate_audio_for_item(item, config_data, tts_adapter: TTSAdapter, max_retr
     if config_data and "podUsers" in config_data and 0 <= speaker_id < len(config_data["podUsers"]):
         pod_user_entry = config_data["podUsers"][speaker_id]
         voice_code = pod_user_entry.get("code")
-        # 从 voices 列表中获取对应的 volume_adjustment
-        voice_map = {voice.get("code"): voice for voice in config_data.get("voices", []) if voice.get("code")}
-        volume_adjustment = voice_map.get(voice_code, {}).get("volume_adjustment", 0.0)
-        speed_adjustment = voice_map.get(voice_code, {}).get("speed_adjustment", 0.0)
+        # 从 voices 配置中获取对应的 volume_adjustment（使用预先计算的 code 索引）
+        voice = find_voice(config_data, voice_code) or {}
+        volume_adjustment = voice.get("volume_adjustment", 0.0)
+        speed_adjustment = voice.get("speed_adjustment", 0.0)
 
     if not voice_code:
         raise ValueError(f"No voice code found for speaker_id {speaker_id}. Cannot generate audio for this dialog.")
@@ -531,65 +715,432 @@ def generate_audio_for_item(item, config_data, tts_adapter: TTSAdapter, max_retr
     # print(f"dialog-before: {dialog}")
     dialog = re.sub(r'[^\w\s\-,，.。?？!！\u4e00-\u9fa5]', '', dialog)
     print(f"dialog: {dialog}")
-    
+    return speaker_id, voice_code, dialog, volume_adjustment, speed_adjustment
+
+def _segment_cache_key(config_data, tts_adapter, voice_code: str, dialog: str) -> str:
+    # The cache holds the provider's unadjusted audio, so one entry serves every volume/speed setting of a voice
+    return SegmentCache.make_key(config_data.get("tts_provider", type(tts_adapter).__name__), voice_code, dialog, 0.0, 0.0, tts_adapter.cache_fingerprint())
+
+def _retry_wait_time(attempt: int, error: BaseException) -> float:
+    """
+    Exponential backoff with full jitter (averaging 2 ** attempt seconds), so the retries of concurrent segments
+    spread out instead of arriving together; extended to the provider's Retry-After when it asks for longer.
+    """
+    return max(random.uniform(0, 2 ** (attempt + 1)), getattr(error, "retry_after", None) or 0)
+
+def _check_retry_allowed(tts_adapter, breaker, retry_budget, speaker_id, voice_code):
+    """Raises instead of retrying when the provider's circuit breaker is open or its shared retry budget is spent."""
+    if breaker.fails_fast:
+        raise CircuitOpenError(f"Circuit breaker of TTS provider {tts_adapter.provider_name} is open; giving up on speaker {speaker_id} ({voice_code}).")
+    if not retry_budget.try_retry():
+        raise RuntimeError(f"Retry budget of TTS provider {tts_adapter.provider_name} is exhausted; giving up on speaker {speaker_id} ({voice_code}).")
+
+def _observe_tts_success(tts_adapter, request_start_time: float, audio: AudioBuffer):
+    """Records the latency and audio size of a successful TTS request."""
+    metrics.tts_request_seconds.observe(time.perf_counter() - request_start_time, provider=tts_adapter.provider_name, outcome="success")
+    metrics.tts_audio_bytes.observe(len(audio), provider=tts_adapter.provider_name)
+
+class _StreamedAudioSink:
+    """
+    Forwards streamed TTS audio chunks to a StreamingAudioDecoder, timing the first and last chunk of the request.
+    Once cancelled (the request lost to a hedged duplicate) it no longer touches the decoder and aborts the stream.
+    """
+    def __init__(self, decoder: StreamingAudioDecoder):
+        self.decoder = decoder
+        self.start_time = time.perf_counter()
+        self.first_byte_seconds: Optional[float] = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Resets the decoder and starts its ffmpeg process when the request is about to be sent (blocking)."""
+        with self._lock:
+            if self.cancelled:
+                raise RequestCancelled("Streamed TTS request was abandoned before it started.")
+            self.decoder.reset()
+            self.decoder.start()
+            self.start_time = time.perf_counter()
+
+    def __call__(self, chunk: bytes):
+        with self._lock:
+            if self.cancelled:
+                raise RequestCancelled("Streamed TTS request was abandoned.")
+            if self.first_byte_seconds is None:
+                self.first_byte_seconds = time.perf_counter() - self.start_time
+            self.decoder.write(chunk)
+
+    def cancel(self):
+        """Stops forwarding chunks; afterwards the decoder belongs to the caller again (blocking)."""
+        with self._lock:
+            self.cancelled = True
+
+    def observe(self, provider: str):
+        if self.first_byte_seconds is not None:
+            metrics.tts_first_byte_seconds.observe(self.first_byte_seconds, provider=provider)
+            metrics.tts_last_byte_seconds.observe(time.perf_counter() - self.start_time, provider=provider)
+
+def _run_in_thread(fn, *args) -> Future:
+    """Runs fn in a new daemon thread and returns a Future for its result."""
+    future = Future()
+
+    def _run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_run, daemon=True).start()
+    return future
+
+class _HedgeTimer:
+    """
+    Process-wide timer thread that fires hedged TTS requests at their deadlines, so a request that finishes in time
+    costs no extra thread. Callbacks run on the timer thread and must return quickly.
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._entries = [] # heap of [deadline, sequence, callback]; cancelled entries have callback None
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> list:
+        entry = [time.monotonic() + delay, next(self._sequence), callback]
+        with self._condition:
+            heapq.heappush(self._entries, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tts-hedge-timer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return entry
+
+    def cancel(self, entry: list):
+        with self._condition:
+            entry[2] = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    while self._entries and self._entries[0][2] is None:
+                        heapq.heappop(self._entries)
+                    if not self._entries:
+                        self._condition.wait()
+                        continue
+                    remaining = self._entries[0][0] - time.monotonic()
+                    if remaining <= 0:
+                        callback = heapq.heappop(self._entries)[2]
+                        break
+                    self._condition.wait(remaining)
+            try:
+                callback()
+            except Exception as e:
+                print(f"Warning: hedged TTS request could not be started: {e}")
+
+_hedge_timer: Optional[_HedgeTimer] = None
+_hedge_timer_lock = threading.Lock()
+
+def _get_hedge_timer() -> _HedgeTimer:
+    """Returns the process-wide hedge timer."""
+    global _hedge_timer
+    with _hedge_timer_lock:
+        if _hedge_timer is None:
+            _hedge_timer = _HedgeTimer()
+        return _hedge_timer
+
+def _request_audio(tts_adapter: TTSAdapter, limiter, dialog: str, voice_code: str, audio_sink: Optional[_StreamedAudioSink] = None, abandoned: Optional[threading.Event] = None) -> AudioBuffer:
+    """Sends one TTS request while holding a slot of the provider's concurrency limiter."""
+    with limiter.slot(len(dialog)):
+        if abandoned is not None and abandoned.is_set():
+            raise RequestCancelled("TTS request was abandoned before it started.")
+        if audio_sink is None:
+            return tts_adapter.synthesize(text=dialog, voice_code=voice_code)
+        audio_sink.start()
+        try:
+            audio = tts_adapter.synthesize_streaming(dialog, voice_code, audio_sink)
+        except Exception:
+            if audio_sink.cancelled: # the adapter wraps the sink's RequestCancelled
+                raise RequestCancelled("Streamed TTS request was abandoned.")
+            raise
+        audio_sink.observe(tts_adapter.provider_name)
+        return audio
+
+def _hedged_request_audio(tts_adapter: TTSAdapter, limiter, hedger: RequestHedger, dialog: str, voice_code: str, audio_decoder: Optional[StreamingAudioDecoder] = None) -> AudioBuffer:
+    """
+    Sends the TTS request of one attempt, hedging it when the provider has hedging enabled.
+
+    The request runs on the calling thread. If it is still running after the provider's percentile latency for a
+    text of this length and the hedge rate cap allows it, the hedge timer starts an identical request on a new thread
+    and the first success wins. The duplicate never streams into audio_decoder; when it wins, the streamed request is
+    abandoned at its next chunk and the segment is decoded from the returned buffer. A request that is still waiting
+    for the provider's whole response cannot be interrupted, so the calling thread returns the duplicate's audio once
+    that request returns. If both requests fail, the original request's error is raised.
+    """
+    audio_sink = _StreamedAudioSink(audio_decoder) if audio_decoder is not None else None
+    delay = hedger.hedge_delay(len(dialog))
+    if delay is None:
+        return _request_audio(tts_adapter, limiter, dialog, voice_code, audio_sink)
+
+    lock = threading.Lock()
+    primary_done = False
+    hedge: Optional[Future] = None
+    primary_abandoned = threading.Event()
+    hedge_abandoned = threading.Event()
+
+    def _on_hedge_done(future: Future):
+        if future.exception() is not None:
+            return
+        with lock:
+            if primary_done:
+                return
+            primary_abandoned.set()
+        if audio_sink is not None:
+            audio_sink.cancel()
+
+    def _fire_hedge():
+        nonlocal hedge
+        with lock:
+            if primary_done:
+                return
+            if not hedger.try_hedge():
+                metrics.tts_hedges.inc(provider=tts_adapter.provider_name, outcome="skipped")
+                return
+            print(f"TTS request for voice {voice_code} exceeded {delay:.2f}s, sending a hedged request...")
+            hedge = _run_in_thread(_request_audio, tts_adapter, limiter, dialog, voice_code, None, hedge_abandoned)
+        hedge.add_done_callback(_on_hedge_done)
+
+    timer = _get_hedge_timer()
+    timer_entry = timer.schedule(delay, _fire_hedge)
+    audio = None
+    primary_error: Optional[BaseException] = None
+    try:
+        audio = _request_audio(tts_adapter, limiter, dialog, voice_code, audio_sink, primary_abandoned)
+    except Exception as e:
+        primary_error = e
+    finally:
+        timer.cancel(timer_entry)
+        with lock:
+            primary_done = True
+
+    if hedge is None:
+        if primary_error is not None:
+            raise primary_error
+        return audio
+    if primary_error is None and not primary_abandoned.is_set():
+        hedge_abandoned.set()
+        metrics.tts_hedges.inc(provider=tts_adapter.provider_name, outcome="lost")
+        return audio
+
+    # The original request failed or was abandoned because the duplicate succeeded first
+    try:
+        audio = hedge.result()
+    except Exception:
+        metrics.tts_hedges.inc(provider=tts_adapter.provider_name, outcome="failed")
+        raise primary_error
+    if audio_sink is not None:
+        audio_sink.cancel()
+    hedger.record_win()
+    metrics.tts_hedges.inc(provider=tts_adapter.provider_name, outcome="won")
+    print(f"Hedged TTS request for voice {voice_code} finished first.")
+    return audio
+
+def generate_audio_for_item(item, config_data, tts_adapter: TTSAdapter, max_retries: int = 3, apply_effects: bool = True, audio_decoder: Optional[StreamingAudioDecoder] = None, process: Optional[Callable[[AudioBuffer], Any]] = None):
+    """
+    Generate audio for a single podcast transcript item using the provided TTS adapter.
+
+    The audio is returned as an in-memory AudioBuffer (adapter.synthesize); nothing is written to output_dir.
+    With apply_effects=False the voice's volume/speed adjustments are left to the caller (the generation
+    pipeline applies them while decoding for trimming) and the provider's audio is returned unchanged.
+    If audio_decoder is given, the audio is also fed to it chunk by chunk as it arrives (adapter.synthesize_streaming),
+    so decoding overlaps the provider's stream; it is reset before every attempt and left untouched on a cache hit.
+    If process is given (the pipeline's decode and silence trim), its result is returned instead of the audio, and
+    the provider's audio is only cached once process succeeded; a cached entry that process fails on is dropped and
+    synthesized again.
+    """
+    speaker_id, voice_code, dialog, volume_adjustment, speed_adjustment = _resolve_item_request(item, config_data)
+    if not apply_effects:
+        volume_adjustment = speed_adjustment = 0.0
+
+    # 先查询片段缓存，相同输入无需再次调用付费 TTS
+    segment_cache = get_segment_cache()
+    cache_key = _segment_cache_key(config_data, tts_adapter, voice_code, dialog)
+    audio = segment_cache.get(cache_key)
+    if audio is not None:
+        print(f"TTS cache hit for speaker {speaker_id} ({voice_code}): {len(audio)} bytes of {audio.format} audio")
+        try:
+            audio = tts_adapter._apply_audio_effects(audio, volume_adjustment, speed_adjustment)
+            return process(audio) if process is not None else audio
+        except Exception as e:
+            print(f"Dropping unusable TTS cache entry for speaker {speaker_id} ({voice_code}): {e}")
+            segment_cache.discard(cache_key)
+
+    # 按服务商的自适应并发限制发起请求，慢请求按服务商的对冲策略补发；重试受服务商共享的重试预算和熔断器约束
+    controller = get_concurrency_controller()
+    limiter = controller.limiter(tts_adapter.provider_name, config_data.get("tts_concurrency"))
+    hedger = controller.hedger(tts_adapter.provider_name, config_data.get("tts_hedging"))
+    retry_budget = controller.retry_budget(tts_adapter.provider_name, config_data.get("tts_retry_budget"))
+    breaker = controller.circuit_breaker(tts_adapter.provider_name, config_data.get("tts_circuit_breaker"))
+    retry_budget.record_request()
     for attempt in range(max_retries):
         try:
             print(f"Calling TTS API for speaker {speaker_id} ({voice_code}) (Attempt {attempt + 1}/{max_retries})...")
-            temp_audio_file = tts_adapter.generate_audio(
-                text=dialog,
-                voice_code=voice_code,
-                output_dir=output_dir,
-                volume_adjustment=volume_adjustment, # 传递音量调整参数
-                speed_adjustment=speed_adjustment # 传递速度调整参数
-            )
-            return temp_audio_file
+            with breaker.guard():
+                request_start_time = time.perf_counter()
+                try:
+                    audio = _hedged_request_audio(tts_adapter, limiter, hedger, dialog, voice_code, audio_decoder)
+                except Exception:
+                    metrics.tts_request_seconds.observe(time.perf_counter() - request_start_time, provider=tts_adapter.provider_name, outcome="error")
+                    raise
+            hedger.observe(time.perf_counter() - request_start_time, len(dialog))
+            _observe_tts_success(tts_adapter, request_start_time, audio)
+            print(f"Generated {len(audio)} bytes of {audio.format} audio for speaker {speaker_id} ({voice_code})")
+            break
+        except CircuitOpenError:
+            raise
         except RuntimeError as e: # Catch specific RuntimeError from TTS adapters
             print(f"Error generating audio for speaker {speaker_id} ({voice_code}) on attempt {attempt + 1}: {e}")
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
+            if attempt >= max_retries - 1:
                 raise RuntimeError(f"Max retries ({max_retries}) reached for speaker {speaker_id} ({voice_code}). Audio generation failed.")
+            _check_retry_allowed(tts_adapter, breaker, retry_budget, speaker_id, voice_code)
+            wait_time = _retry_wait_time(attempt, e)
+            print(f"Retrying in {wait_time:.2f} seconds...")
+            time.sleep(wait_time)
         except Exception as e: # Catch other unexpected errors
             raise RuntimeError(f"An unexpected error occurred for speaker {speaker_id} ({voice_code}) on attempt {attempt + 1}: {e}")
 
-def _generate_all_audio_files(podcast_script, config_data, tts_adapter: TTSAdapter, threads):
-    """Orchestrates the generation of individual audio files."""
+    # 只有解码（以及 process 的裁剪）成功的音频才写入缓存，错误响应或截断的音频不会被后续请求复用
+    result = tts_adapter._apply_audio_effects(audio, volume_adjustment, speed_adjustment)
+    if process is not None:
+        result = process(result)
+    segment_cache.put(cache_key, audio)
+    return result
+
+def _item_effects(item, config_data) -> Tuple[float, float]:
+    """Returns the (volume_adjustment, speed_adjustment) configured for the voice of the item's speaker."""
+    pod_users = config_data.get("podUsers") or []
+    speaker_id = item.get("speaker_id")
+    if not isinstance(speaker_id, int) or not 0 <= speaker_id < len(pod_users):
+        return 0.0, 0.0
+    voice = find_voice(config_data, pod_users[speaker_id].get("code")) or {}
+    return voice.get("volume_adjustment", 0.0), voice.get("speed_adjustment", 0.0)
+
+def _trim_segment(audio: AudioBuffer, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
+    """
+    Trims a synthesized segment, decoded straight from memory, into a canonical WAV in output_dir.
+    Volume and speed adjustments are applied in the same decode, without intermediate files.
+    """
+    trimmed_audio_file = os.path.join(output_dir, f"trimmed_{uuid.uuid4()}.wav")
+    with metrics.trim_seconds.time():
+        trim_audio_silence(audio, trimmed_audio_file, volume_adjustment=volume_adjustment, speed_adjustment=speed_adjustment)
+    return trimmed_audio_file
+
+def _create_audio_decoder(tts_adapter, volume_adjustment: float, speed_adjustment: float) -> Optional[StreamingAudioDecoder]:
+    """Returns a streaming decoder for adapters that deliver audio as it arrives (None for the others, or without numpy)."""
+    if not getattr(tts_adapter, "streams_audio", False):
+        return None
+    try:
+        return StreamingAudioDecoder(volume_adjustment=volume_adjustment, speed_adjustment=speed_adjustment)
+    except ImportError:
+        return None
+
+def _trim_streamed_segment(audio_decoder: Optional[StreamingAudioDecoder], audio: AudioBuffer, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
+    """
+    Trims a segment whose audio was fed to audio_decoder while it streamed in, so only the tail is left to decode.
+    Falls back to _trim_segment when the decoder did not receive the whole audio (e.g. a segment cache hit).
+    """
+    if audio_decoder is None or audio_decoder.bytes_written != len(audio):
+        if audio_decoder is not None:
+            audio_decoder.abort()
+        return _trim_segment(audio, volume_adjustment, speed_adjustment)
+    trimmed_audio_file = os.path.join(output_dir, f"trimmed_{uuid.uuid4()}.wav")
+    with metrics.trim_seconds.time():
+        samples = audio_decoder.finish()
+        trimmed_samples = trim_silence(samples, PCM_SAMPLE_RATE)
+        write_wav(trimmed_audio_file, trimmed_samples, PCM_SAMPLE_RATE)
+    print(f"Trimmed streamed audio saved to {trimmed_audio_file}. Original duration: {len(samples) / PCM_SAMPLE_RATE:.2f}s, Trimmed duration: {len(trimmed_samples) / PCM_SAMPLE_RATE:.2f}s")
+    return trimmed_audio_file
+
+def _synthesize_segment(item, config_data, tts_adapter: TTSAdapter, max_retries: int) -> str:
+    """Generates and trims the audio for a single transcript item, returning the trimmed segment path."""
+    volume_adjustment, speed_adjustment = _item_effects(item, config_data)
+    audio_decoder = _create_audio_decoder(tts_adapter, volume_adjustment, speed_adjustment)
+    try:
+        return generate_audio_for_item(
+            item, config_data, tts_adapter, max_retries, apply_effects=False, audio_decoder=audio_decoder,
+            process=lambda audio: _trim_streamed_segment(audio_decoder, audio, volume_adjustment, speed_adjustment),
+        )
+    finally:
+        if audio_decoder is not None:
+            audio_decoder.abort()
+
+def _report_progress(progress_callback: Optional[Callable[[dict], None]], stage: str, **fields):
+    """Reports generation progress ({"stage": ..., ...}) to the optional callback; a failing callback never fails the task."""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(dict(fields, stage=stage))
+    except Exception as e:
+        print(f"Warning: progress callback failed: {e}")
+
+def _generate_all_audio_files(transcripts: Iterable[dict], config_data, tts_adapter: TTSAdapter, threads: Optional[int] = None, progress_callback: Optional[Callable[[dict], None]] = None, segment_stream: Optional[SegmentStreamWriter] = None):
+    """
+    Orchestrates the generation of individual audio files.
+
+    transcripts may be a list or a generator such as _stream_podcast_script; each item is submitted to the
+    worker pool as soon as it is produced, so synthesis overlaps with script generation. How many TTS requests
+    run at once is decided by the provider's adaptive concurrency limiter; threads only caps the worker pool.
+    If segment_stream is given, each trimmed segment is also published to it for progressive playback.
+    """
     os.makedirs(output_dir, exist_ok=True)
     print("\nGenerating audio files...")
-    # test script
-    # podcast_script = json.loads("{\"podcast_transcripts\":[{\"speaker_id\":0,\"dialog\":\"欢迎收听，来生小酒馆，客官不进来喝点吗？今天咱们来唠唠AI。 小希，你有什么新鲜事来分享吗？\"},{\"speaker_id\":1,\"dialog\":\"当然了， AI 编程工具 Cursor 给开发者送上了一份大礼，付费用户现在可以限时免费体验 GPT 5 的强大编码能力\"}]}")
-    transcripts = podcast_script.get("podcast_transcripts", [])
-    
     max_retries = config_data.get("tts_max_retries", 3) # 从配置中获取最大重试次数，默认3次
     
     from concurrent.futures import ThreadPoolExecutor, as_completed
     
     audio_files_dict = {}
-    
-    with ThreadPoolExecutor(max_workers=threads) as executor:
-        future_to_index = {
-            executor.submit(generate_audio_for_item, item, config_data, tts_adapter, max_retries): i
-            for i, item in enumerate(transcripts)
-        }
+    failure_event = threading.Event()
+    progress_lock = threading.Lock()
+    segments_done = 0
+
+    def _on_segment_done(future):
+        nonlocal segments_done
+        if not future.cancelled() and future.exception() is not None:
+            failure_event.set()
+            return
+        with progress_lock:
+            segments_done += 1
+            _report_progress(progress_callback, "synthesizing", segments_done=segments_done, segments_total=len(future_to_index))
+
+    def _run_segment(index: int, item: dict) -> str:
+        trimmed_audio_file = _synthesize_segment(item, config_data, tts_adapter, max_retries)
+        if segment_stream is not None:
+            segment_stream.publish(index, trimmed_audio_file)
+        return trimmed_audio_file
+
+    limiter = get_concurrency_controller().limiter(tts_adapter.provider_name, config_data.get("tts_concurrency"))
+    max_workers = min(threads, limiter.max_limit) if threads else limiter.max_limit
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_index = {}
+        try:
+            for i, item in enumerate(transcripts):
+                if failure_event.is_set():
+                    break # A segment already failed, stop consuming the script stream
+                future = executor.submit(_run_segment, i, item)
+                future_to_index[future] = i
+                future.add_done_callback(_on_segment_done)
+        except Exception:
+            # The script stream failed, cancel pending segments before propagating the error.
+            for f in future_to_index:
+                f.cancel()
+            raise
         
         exception_caught = None
         for future in as_completed(future_to_index):
             index = future_to_index[future]
             try:
-                original_audio_file = future.result()
-                if original_audio_file:
-                    # Define a path for the trimmed audio file
-                    trimmed_audio_file = os.path.join(output_dir, f"trimmed_{os.path.basename(original_audio_file)}")
-                    trim_audio_silence(original_audio_file, trimmed_audio_file)
-                    # Use the trimmed file for the final merge
-                    audio_files_dict[index] = trimmed_audio_file
-                    # Clean up the original untrimmed file
-                    try:
-                        os.remove(original_audio_file)
-                    except OSError as e:
-                        print(f"Error removing untrimmed audio file {original_audio_file}: {e}")
+                # Use the trimmed file for the final merge
+                audio_files_dict[index] = future.result()
             except Exception as e:
                 exception_caught = RuntimeError(f"Error generating or trimming audio for item {index}: {e}")
                 # An error occurred, we should stop.
@@ -606,8 +1157,245 @@ def _generate_all_audio_files(podcast_script, config_data, tts_adapter: TTSAdapt
     audio_files = [audio_files_dict[i] for i in sorted(audio_files_dict.keys())]
     
     print(f"\nFinished generating individual audio files. Total files: {len(audio_files)}")
+    print(f"TTS cache stats: {get_segment_cache().stats()}")
     return audio_files
 
+async def _arequest_audio(tts_adapter: AsyncTTSAdapter, limiter, dialog: str, voice_code: str, audio_sink: Optional[_StreamedAudioSink] = None) -> AudioBuffer:
+    """Async counterpart of _request_audio, also holding a slot of the process-wide SegmentScheduler."""
+    async with limiter.aslot(len(dialog)), get_segment_scheduler().slot():
+        if audio_sink is None:
+            return await tts_adapter.asynthesize(text=dialog, voice_code=voice_code)
+        await asyncio.to_thread(audio_sink.start)
+        audio = await tts_adapter.asynthesize_streaming(dialog, voice_code, audio_sink)
+        audio_sink.observe(tts_adapter.provider_name)
+        return audio
+
+async def _ahedged_request_audio(tts_adapter: AsyncTTSAdapter, limiter, hedger: RequestHedger, dialog: str, voice_code: str, audio_decoder: Optional[StreamingAudioDecoder] = None) -> AudioBuffer:
+    """Async counterpart of _hedged_request_audio; the losing request is cancelled instead of abandoned."""
+    audio_sink = _StreamedAudioSink(audio_decoder) if audio_decoder is not None else None
+    delay = hedger.hedge_delay(len(dialog))
+    if delay is None:
+        return await _arequest_audio(tts_adapter, limiter, dialog, voice_code, audio_sink)
+
+    primary = asyncio.ensure_future(_arequest_audio(tts_adapter, limiter, dialog, voice_code, audio_sink))
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return primary.result()
+        if not hedger.try_hedge():
+            metrics.tts_hedges.inc(provider=tts_adapter.provider_name, outcome="skipped")
+            return await primary
+
+        print(f"TTS request for voice {voice_code} exceeded {delay:.2f}s, sending a hedged request...")
+        hedge = asyncio.ensure_future(_arequest_audio(tts_adapter, limiter, dialog, voice_code))
+        tasks.append(hedge)
+        pending = set(tasks)
+        winner = None
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            succeeded = [task for task in done if task.exception() is None]
+            if succeeded:
+                winner = primary if primary in succeeded else hedge
+        if winner is None:
+            metrics.tts_hedges.inc(provider=tts_adapter.provider_name, outcome="failed")
+            return primary.result()
+
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if winner is hedge:
+            if audio_sink is not None:
+                await asyncio.to_thread(audio_sink.cancel)
+            hedger.record_win()
+            metrics.tts_hedges.inc(provider=tts_adapter.provider_name, outcome="won")
+            print(f"Hedged TTS request for voice {voice_code} finished first.")
+        else:
+            metrics.tts_hedges.inc(provider=tts_adapter.provider_name, outcome="lost")
+        return winner.result()
+    finally:
+        unfinished = [task for task in tasks if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+async def agenerate_audio_for_item(item, config_data, tts_adapter: AsyncTTSAdapter, max_retries: int = 3, apply_effects: bool = True, audio_decoder: Optional[StreamingAudioDecoder] = None, process: Optional[Callable[[AudioBuffer], Awaitable]] = None):
+    """Async counterpart of generate_audio_for_item, calling the adapter's asynthesize on the event loop; process is awaited."""
+    speaker_id, voice_code, dialog, volume_adjustment, speed_adjustment = _resolve_item_request(item, config_data)
+    if not apply_effects:
+        volume_adjustment = speed_adjustment = 0.0
+
+    # 先查询片段缓存，相同输入无需再次调用付费 TTS
+    segment_cache = get_segment_cache()
+    cache_key = _segment_cache_key(config_data, tts_adapter, voice_code, dialog)
+    audio = await asyncio.to_thread(segment_cache.get, cache_key)
+    if audio is not None:
+        print(f"TTS cache hit for speaker {speaker_id} ({voice_code}): {len(audio)} bytes of {audio.format} audio")
+        try:
+            audio = await tts_adapter._aapply_audio_effects(audio, volume_adjustment, speed_adjustment)
+            return await process(audio) if process is not None else audio
+        except Exception as e:
+            print(f"Dropping unusable TTS cache entry for speaker {speaker_id} ({voice_code}): {e}")
+            await asyncio.to_thread(segment_cache.discard, cache_key)
+
+    # 按服务商的自适应并发限制发起请求，慢请求按服务商的对冲策略补发；重试受服务商共享的重试预算和熔断器约束
+    controller = get_concurrency_controller()
+    limiter = controller.limiter(tts_adapter.provider_name, config_data.get("tts_concurrency"))
+    hedger = controller.hedger(tts_adapter.provider_name, config_data.get("tts_hedging"))
+    retry_budget = controller.retry_budget(tts_adapter.provider_name, config_data.get("tts_retry_budget"))
+    breaker = controller.circuit_breaker(tts_adapter.provider_name, config_data.get("tts_circuit_breaker"))
+    retry_budget.record_request()
+    for attempt in range(max_retries):
+        try:
+            print(f"Calling TTS API for speaker {speaker_id} ({voice_code}) (Attempt {attempt + 1}/{max_retries})...")
+            async with breaker.aguard():
+                request_start_time = time.perf_counter()
+                try:
+                    audio = await _ahedged_request_audio(tts_adapter, limiter, hedger, dialog, voice_code, audio_decoder)
+                except Exception:
+                    metrics.tts_request_seconds.observe(time.perf_counter() - request_start_time, provider=tts_adapter.provider_name, outcome="error")
+                    raise
+            hedger.observe(time.perf_counter() - request_start_time, len(dialog))
+            _observe_tts_success(tts_adapter, request_start_time, audio)
+            print(f"Generated {len(audio)} bytes of {audio.format} audio for speaker {speaker_id} ({voice_code})")
+            break
+        except CircuitOpenError:
+            raise
+        except RuntimeError as e: # Catch specific RuntimeError from TTS adapters
+            print(f"Error generating audio for speaker {speaker_id} ({voice_code}) on attempt {attempt + 1}: {e}")
+            if attempt >= max_retries - 1:
+                raise RuntimeError(f"Max retries ({max_retries}) reached for speaker {speaker_id} ({voice_code}). Audio generation failed.")
+            _check_retry_allowed(tts_adapter, breaker, retry_budget, speaker_id, voice_code)
+            wait_time = _retry_wait_time(attempt, e)
+            print(f"Retrying in {wait_time:.2f} seconds...")
+            await asyncio.sleep(wait_time)
+        except Exception as e: # Catch other unexpected errors
+            raise RuntimeError(f"An unexpected error occurred for speaker {speaker_id} ({voice_code}) on attempt {attempt + 1}: {e}")
+
+    result = await tts_adapter._aapply_audio_effects(audio, volume_adjustment, speed_adjustment)
+    if process is not None:
+        result = await process(result)
+    await asyncio.to_thread(segment_cache.put, cache_key, audio)
+    return result
+
+class SegmentScheduler:
+    """
+    Process-wide asyncio scheduler for TTS segments.
+
+    Every TTS request made on the event loop holds a slot here, so all episodes share one cap on in-flight
+    TTS requests (tts_max_inflight) and hundreds of concurrent requests need no thread per request.
+    """
+    def __init__(self, max_inflight: int):
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self._semaphore = asyncio.Semaphore(max_inflight)
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._semaphore:
+            self.inflight += 1
+            try:
+                yield
+            finally:
+                self.inflight -= 1
+
+_segment_schedulers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def get_segment_scheduler() -> SegmentScheduler:
+    """Returns the segment scheduler of the running event loop."""
+    loop = asyncio.get_running_loop()
+    scheduler = _segment_schedulers.get(loop)
+    if scheduler is None:
+        scheduler = SegmentScheduler(tts_max_inflight)
+        _segment_schedulers[loop] = scheduler
+    return scheduler
+
+async def _aiterate_in_thread(iterable: Iterable):
+    """Consumes a blocking iterable (e.g. the LLM script stream) in a worker thread and yields its items on the event loop."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop_event = threading.Event()
+    end_of_stream = object()
+
+    def _produce():
+        try:
+            for item in iterable:
+                if stop_event.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (end_of_stream, e))
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, (end_of_stream, None))
+
+    loop.run_in_executor(None, _produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is end_of_stream:
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        stop_event.set()
+
+async def _agenerate_all_audio_files(transcripts: AsyncIterable[dict], config_data, tts_adapter: AsyncTTSAdapter, progress_callback: Optional[Callable[[dict], None]] = None, segment_stream: Optional[SegmentStreamWriter] = None) -> list:
+    """
+    Async counterpart of _generate_all_audio_files.
+
+    Segments are synthesized as asyncio tasks through the process-wide SegmentScheduler; the provider's adaptive
+    concurrency limiter decides how many requests are in flight. Trimming runs in the default executor.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    print("\nGenerating audio files (async)...")
+    max_retries = config_data.get("tts_max_retries", 3) # 从配置中获取最大重试次数，默认3次
+    failure_event = asyncio.Event()
+    segments_done = 0
+
+    async def _run_segment(index: int, item: dict) -> str:
+        nonlocal segments_done
+        try:
+            volume_adjustment, speed_adjustment = _item_effects(item, config_data)
+            audio_decoder = _create_audio_decoder(tts_adapter, volume_adjustment, speed_adjustment)
+            try:
+                trimmed_audio_file = await agenerate_audio_for_item(
+                    item, config_data, tts_adapter, max_retries, apply_effects=False, audio_decoder=audio_decoder,
+                    process=lambda audio: asyncio.to_thread(_trim_streamed_segment, audio_decoder, audio, volume_adjustment, speed_adjustment),
+                )
+            finally:
+                if audio_decoder is not None:
+                    await asyncio.to_thread(audio_decoder.abort)
+            if segment_stream is not None:
+                await asyncio.to_thread(segment_stream.publish, index, trimmed_audio_file)
+            segments_done += 1
+            _report_progress(progress_callback, "synthesizing", segments_done=segments_done, segments_total=len(segment_tasks))
+            return trimmed_audio_file
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            failure_event.set()
+            raise RuntimeError(f"Error generating or trimming audio for item {index}: {e}")
+
+    segment_tasks = []
+    try:
+        async for item in transcripts:
+            if failure_event.is_set():
+                break # A segment already failed, stop consuming the script stream
+            segment_tasks.append(asyncio.create_task(_run_segment(len(segment_tasks), item)))
+        audio_files = await asyncio.gather(*segment_tasks)
+    except BaseException as e:
+        print(f"An error occurred: {e}. Cancelling outstanding tasks.")
+        for segment_task in segment_tasks:
+            segment_task.cancel()
+        await asyncio.gather(*segment_tasks, return_exceptions=True)
+        raise
+
+    print(f"\nFinished generating individual audio files. Total files: {len(audio_files)}")
+    print(f"TTS cache stats: {get_segment_cache().stats()}")
+    return list(audio_files)
+
 def _create_ffmpeg_file_list(audio_files, expected_count: int):
     """Creates the file list for FFmpeg concatenation."""
     if not audio_files:
@@ -656,6 +1444,14 @@ def _initialize_tts_adapter(config_data: dict, tts_providers_config_content: Opt
     # 获取当前 tts_provider 的额外参数
     current_tts_extra_params = tts_providers_config.get(tts_provider.split('-')[0], {}) # 例如 'doubao-tts' -> 'doubao'
 
+    # 相同配置（含凭据）的任务复用注册表中的适配器及其 keep-alive 连接池
+    registry_key = AdapterRegistry.make_key(tts_provider, config_data.get("apiUrl"), config_data.get("headers"), config_data.get("request_payload"), current_tts_extra_params)
+    return get_adapter_registry().get_or_create(registry_key, lambda: _create_tts_adapter(tts_provider, config_data, current_tts_extra_params))
+
+def _create_tts_adapter(tts_provider: str, config_data: dict, current_tts_extra_params: dict) -> TTSAdapter:
+    """
+    根据服务商名称创建新的 TTS 适配器实例。
+    """
     if tts_provider == "index-tts":
         api_url = config_data.get("apiUrl")
         if not api_url:
@@ -712,43 +1508,35 @@ def generate_podcast_audio():
     print(f"\nPodscript Prompt (prompt-podscript.txt):\n{podscript_prompt[:1000]}...")
 
     overview_content, title, tags = _generate_overview_content(api_key, base_url, model, overview_prompt, input_prompt, args.output_language)
-    podcast_script = _generate_podcast_script(api_key, base_url, model, podscript_prompt, overview_content)
 
     tts_adapter = _initialize_tts_adapter(config_data) # 初始化 TTS 适配器
 
-    audio_files = _generate_all_audio_files(podcast_script, config_data, tts_adapter, args.threads)
-    file_list_path_created = _create_ffmpeg_file_list(audio_files, len(podcast_script.get("podcast_transcripts", [])))
-    output_audio_filepath = merge_audio_files(file_list_path_created)
+    # 脚本条目一生成就经片段规划送入 TTS 线程池
+    podcast_script = {}
+    planner = SegmentPlanner.from_config(config_data)
+    transcripts = planner.plan(_stream_podcast_script(api_key, base_url, model, podscript_prompt, overview_content, podcast_script))
+    audio_files = _generate_all_audio_files(transcripts, config_data, tts_adapter, args.threads)
+    file_list_path_created = _create_ffmpeg_file_list(audio_files, planner.planned)
+    output_audio_filepath, merge_stats = merge_audio_files(file_list_path_created, config_data.get("merge_mode", "stream"))
     return {
         "output_audio_filepath": output_audio_filepath,
         "overview_content": overview_content,
         "podcast_script": podcast_script,
         "podUsers": pod_users,
+        "merge_stats": merge_stats,
     }
 
 
-def generate_podcast_audio_api(args, config_path: str, input_txt_content: str, tts_providers_config_content: str, podUsers_json_content: str) -> dict:
-    """
-    Generates a podcast audio file based on the provided parameters.
-
-    Args:
-        api_key (str): OpenAI API key.
-        base_url (str): OpenAI API base URL.
-        model (str): OpenAI model to use.
-        threads (int): Number of threads for audio generation.
-        config_path (str): Path to the configuration JSON file.
-        input_txt_content (str): Content of the input prompt.
-        output_language (str): Language for the podcast overview and script (default: Chinese).
-
-    Returns:
-        str: The path to the generated audio file.
-    """
-    print("Starting podcast audio generation...")
-    config_data = _load_configuration_path(config_path)
+def _prepare_api_generation(args, config_path: str, input_txt_content: str, podUsers_json_content: str):
+    """Loads the provider configuration and podUsers and prepares the OpenAI settings and prompts for an API request."""
+    provider_config = get_config_registry().get(config_path)
     podUsers = json.loads(podUsers_json_content)
+    # 在调用 LLM 之前校验语音 code，配置错误时立即失败
+    provider_config.validate_pod_users(podUsers)
+    config_data = _load_configuration_path(config_path)
     config_data["podUsers"] = podUsers
 
-    final_api_key, final_base_url, final_model = _prepare_openai_settings(args, config_data)
+    openai_settings = _prepare_openai_settings(args, config_data)
     input_prompt, overview_prompt, original_podscript_prompt = _read_prompt_files()
     custom_content, input_prompt = _extract_custom_content(input_txt_content)
     # Assuming `output_language` is passed directly to the function
@@ -757,17 +1545,17 @@ def generate_podcast_audio_api(args, config_path: str, input_txt_content: str, t
     print(f"\nInput Prompt (from provided content):\n{input_prompt[:100]}...")
     print(f"\nOverview Prompt (prompt-overview.txt):\n{overview_prompt[:100]}...")
     print(f"\nPodscript Prompt (prompt-podscript.txt):\n{podscript_prompt[:1000]}...")
+    return config_data, podUsers, openai_settings, overview_prompt, input_prompt, podscript_prompt
 
-    overview_content, title, tags = _generate_overview_content(final_api_key, final_base_url, final_model, overview_prompt, input_prompt, args.output_language)
-    podcast_script = _generate_podcast_script(final_api_key, final_base_url, final_model, podscript_prompt, overview_content)
-    
-    tts_adapter = _initialize_tts_adapter(config_data, tts_providers_config_content) # 初始化 TTS 适配器
-
-    audio_files = _generate_all_audio_files(podcast_script, config_data, tts_adapter, args.threads)
-    file_list_path_created = _create_ffmpeg_file_list(audio_files, len(podcast_script.get("podcast_transcripts", [])))
-    output_audio_filepath = merge_audio_files(file_list_path_created)
+def _finalize_api_generation(config_data, podcast_script, audio_files, expected_segments, overview_content, podUsers, title, tags) -> dict:
+    """Merges the generated segments and builds the task results returned by the API."""
+    file_list_path_created = _create_ffmpeg_file_list(audio_files, expected_segments)
+    output_audio_filepath, merge_stats = merge_audio_files(file_list_path_created, config_data.get("merge_mode", "stream"))
     
-    audio_duration_seconds = get_audio_duration(os.path.join(output_dir, output_audio_filepath))
+    # PCM 拼接合并时已知准确时长，否则用 ffprobe 读取
+    audio_duration_seconds = merge_stats.get("audio_seconds")
+    if audio_duration_seconds is None:
+        audio_duration_seconds = get_audio_duration(os.path.join(output_dir, output_audio_filepath))
     formatted_duration = "00:00"
     if audio_duration_seconds is not None:
         minutes = int(audio_duration_seconds // 60)
@@ -782,9 +1570,86 @@ def generate_podcast_audio_api(args, config_path: str, input_txt_content: str, t
         "audio_duration": formatted_duration,
         "title": title,
         "tags": tags,
+        "merge_stats": merge_stats,
     }
     return task_results
 
+def generate_podcast_audio_api(args, config_path: str, input_txt_content: str, tts_providers_config_content: str, podUsers_json_content: str, progress_callback: Optional[Callable[[dict], None]] = None, stream_dir: Optional[str] = None) -> dict:
+    """
+    Generates a podcast audio file based on the provided parameters.
+
+    Args:
+        api_key (str): OpenAI API key.
+        base_url (str): OpenAI API base URL.
+        model (str): OpenAI model to use.
+        threads (int): Number of threads for audio generation.
+        config_path (str): Path to the configuration JSON file.
+        input_txt_content (str): Content of the input prompt.
+        output_language (str): Language for the podcast overview and script (default: Chinese).
+        progress_callback (callable): Optional, called with {"stage": ..., ...} dicts as generation progresses.
+        stream_dir (str): Optional, directory where segments are published in transcript order for progressive playback.
+
+    Returns:
+        str: The path to the generated audio file.
+    """
+    print("Starting podcast audio generation...")
+    config_data, podUsers, (final_api_key, final_base_url, final_model), overview_prompt, input_prompt, podscript_prompt = _prepare_api_generation(args, config_path, input_txt_content, podUsers_json_content)
+
+    _report_progress(progress_callback, "overview")
+    overview_content, title, tags = _generate_overview_content(final_api_key, final_base_url, final_model, overview_prompt, input_prompt, args.output_language)
+    
+    tts_adapter = _initialize_tts_adapter(config_data, tts_providers_config_content) # 初始化 TTS 适配器
+
+    # 脚本条目一生成就经片段规划送入 TTS 线程池
+    _report_progress(progress_callback, "synthesizing", segments_done=0, segments_total=0)
+    podcast_script = {}
+    planner = SegmentPlanner.from_config(config_data)
+    transcripts = planner.plan(_stream_podcast_script(final_api_key, final_base_url, final_model, podscript_prompt, overview_content, podcast_script))
+    segment_stream = SegmentStreamWriter(stream_dir) if stream_dir else None
+    try:
+        audio_files = _generate_all_audio_files(transcripts, config_data, tts_adapter, args.threads, progress_callback, segment_stream)
+    finally:
+        if segment_stream is not None:
+            segment_stream.finish()
+    _report_progress(progress_callback, "merging", segments_done=len(audio_files), segments_total=len(audio_files))
+    return _finalize_api_generation(config_data, podcast_script, audio_files, planner.planned, overview_content, podUsers, title, tags)
+
+async def agenerate_podcast_audio_api(args, config_path: str, input_txt_content: str, tts_providers_config_content: str, podUsers_json_content: str, progress_callback: Optional[Callable[[dict], None]] = None, stream_dir: Optional[str] = None) -> dict:
+    """
+    Async counterpart of generate_podcast_audio_api for the FastAPI process.
+
+    TTS segments are synthesized with the adapters' asynthesize through the process-wide SegmentScheduler
+    instead of a per-task thread pool; blocking steps (LLM calls, trimming, merging) run in worker threads.
+    Takes the same arguments and returns the same task results.
+    """
+    print("Starting podcast audio generation (async)...")
+    config_data, podUsers, (final_api_key, final_base_url, final_model), overview_prompt, input_prompt, podscript_prompt = await asyncio.to_thread(
+        _prepare_api_generation, args, config_path, input_txt_content, podUsers_json_content
+    )
+
+    _report_progress(progress_callback, "overview")
+    overview_content, title, tags = await asyncio.to_thread(
+        _generate_overview_content, final_api_key, final_base_url, final_model, overview_prompt, input_prompt, args.output_language
+    )
+
+    tts_adapter = _initialize_tts_adapter(config_data, tts_providers_config_content) # 初始化 TTS 适配器
+    if not isinstance(tts_adapter, AsyncTTSAdapter):
+        raise ValueError(f"TTS provider {config_data.get('tts_provider')} does not support async generation.")
+
+    # 脚本条目一生成就经片段规划作为 asyncio 任务送入调度器
+    _report_progress(progress_callback, "synthesizing", segments_done=0, segments_total=0)
+    podcast_script = {}
+    planner = SegmentPlanner.from_config(config_data)
+    transcripts = planner.aplan(_aiterate_in_thread(_stream_podcast_script(final_api_key, final_base_url, final_model, podscript_prompt, overview_content, podcast_script)))
+    segment_stream = SegmentStreamWriter(stream_dir) if stream_dir else None
+    try:
+        audio_files = await _agenerate_all_audio_files(transcripts, config_data, tts_adapter, progress_callback, segment_stream)
+    finally:
+        if segment_stream is not None:
+            await asyncio.to_thread(segment_stream.finish)
+    _report_progress(progress_callback, "merging", segments_done=len(audio_files), segments_total=len(audio_files))
+    return await asyncio.to_thread(_finalize_api_generation, config_data, podcast_script, audio_files, planner.planned, overview_content, podUsers, title, tags)
+
 
 if __name__ == "__main__":
     start_time = time.time()
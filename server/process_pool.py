@@ -0,0 +1,257 @@
+# process_pool.py
+
+import os
+import queue
+from collections import deque
+import asyncio
+import threading
+import multiprocessing
+from typing import Callable, Optional
+
+from metrics import get_metrics_registry
+
+# 进程池配置：工作进程数（默认与任务队列的 worker 数相同）、每个进程最多执行的任务数、常驻内存上限（MB）
+process_workers = int(os.getenv("PODCAST_PROCESS_WORKERS", os.getenv("PODCAST_JOB_WORKERS", "2")))
+process_max_jobs_per_worker = int(os.getenv("PODCAST_PROCESS_MAX_JOBS", "20"))
+process_max_rss_mb = float(os.getenv("PODCAST_PROCESS_MAX_RSS_MB", "1024"))
+
+def _current_rss_mb() -> float:
+    """返回当前进程的常驻内存（MB）；无法获取时返回 0。"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource # 非 Linux 平台退回到峰值常驻内存
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024 # macOS 以字节为单位，Linux 以 KB 为单位
+
+def _worker_main(task_queue, result_queue, max_jobs: int, max_rss_mb: float):
+    """
+    工作进程主循环：从自己的 task_queue 逐个执行 generate_podcast_audio_api 任务，通过 result_queue 回传进度和结果；
+    空闲时发送 ready 领取下一个任务。执行满 max_jobs 个任务或常驻内存超过 max_rss_mb 后退出，由进程池启动新的进程替换。
+    """
+    from podcast_generator import generate_podcast_audio_api # 在子进程中导入
+
+    # 各阶段耗时的观测值转发给 API 进程汇总，由其 /metrics 输出
+    get_metrics_registry().forwarder = lambda name, labels, value: result_queue.put(("metric", name, (labels, value)))
+
+    pid = os.getpid()
+    jobs_done = 0
+    result_queue.put(("ready", pid, None))
+    while True:
+        message = task_queue.get()
+        if message is None:
+            break
+        job_id, kwargs = message
+
+        def _progress(info: dict):
+            result_queue.put(("progress", job_id, info))
+
+        try:
+            result = generate_podcast_audio_api(progress_callback=_progress, **kwargs)
+            result_queue.put(("done", job_id, result))
+        except Exception as e:
+            result_queue.put(("error", job_id, str(e)))
+
+        jobs_done += 1
+        rss_mb = _current_rss_mb()
+        if jobs_done >= max_jobs or (max_rss_mb > 0 and rss_mb > max_rss_mb):
+            result_queue.put(("recycle", pid, {"jobs_done": jobs_done, "rss_mb": round(rss_mb, 1)}))
+            break
+        result_queue.put(("ready", pid, None))
+
+class ProcessJobPool:
+    """
+    执行播客生成任务的工作进程池。
+
+    每个任务在一个独立的工作进程中运行 generate_podcast_audio_api，CPU 密集的音频处理、JSON 解析等不再与
+    API 进程争用 GIL。任务由进程池分派给发送了 ready 的空闲进程（每个进程一个任务队列），分派时即记录任务所属的进程，
+    因此进程在开始执行前退出（例如内存不足被杀死）时任务同样会以错误结束，不会一直处于运行状态。
+    工作进程在执行一定数量的任务或内存超限后被回收并替换；进度与结果通过队列回传，由后台线程转发到事件循环。
+    """
+    def __init__(self, workers: int = process_workers, max_jobs_per_worker: int = process_max_jobs_per_worker, max_rss_mb: float = process_max_rss_mb):
+        self.workers = max(1, workers)
+        self.max_jobs_per_worker = max(1, max_jobs_per_worker)
+        self.max_rss_mb = max_rss_mb
+        self._context = multiprocessing.get_context("spawn")
+        self._result_queue = None
+        self._processes = {}
+        self._task_queues = {} # pid -> 该进程的任务队列
+        self._idle = deque() # 已发送 ready、尚未分派任务的进程
+        self._backlog = deque() # 等待空闲进程的 (job_id, kwargs)
+        self._job_owners = {} # job_id -> pid
+        self._pending = {} # job_id -> (loop, future, progress_callback)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self.completed = 0
+        self.failed = 0
+        self.recycled = 0
+        self.crashed = 0
+
+    def start(self):
+        self._result_queue = self._context.Queue()
+        for _ in range(self.workers):
+            self._spawn_worker()
+        self._listener = threading.Thread(target=self._listen, name="process-pool-listener", daemon=True)
+        self._listener.start()
+
+    def _spawn_worker(self):
+        task_queue = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(task_queue, self._result_queue, self.max_jobs_per_worker, self.max_rss_mb),
+            daemon=True,
+        )
+        process.start()
+        with self._lock:
+            self._processes[process.pid] = process
+            self._task_queues[process.pid] = task_queue
+
+    def _assign_locked(self):
+        """把积压的任务分派给空闲进程，并记录任务所属的进程。"""
+        while self._backlog and self._idle:
+            pid = self._idle.popleft()
+            task_queue = self._task_queues.get(pid)
+            if task_queue is None: # 进程已退出
+                continue
+            job_id, kwargs = self._backlog.popleft()
+            self._job_owners[job_id] = pid
+            task_queue.put((job_id, kwargs))
+
+    async def run(self, job_id: str, kwargs: dict, progress_callback: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        在工作进程中执行 generate_podcast_audio_api(**kwargs) 并返回其结果；progress_callback 在事件循环中被调用。
+
+        Raises:
+            RuntimeError: 如果任务失败或工作进程意外退出。
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._pending[job_id] = (loop, future, progress_callback)
+            self._backlog.append((job_id, kwargs))
+            self._assign_locked()
+        try:
+            return await future
+        finally:
+            with self._lock:
+                self._pending.pop(job_id, None)
+                # 尚未分派的任务不再执行
+                self._backlog = deque(job for job in self._backlog if job[0] != job_id)
+
+    def _dispatch(self, job_id: str, kind: str, payload):
+        with self._lock:
+            pending = self._pending.get(job_id)
+        if pending is None:
+            return
+        loop, future, progress_callback = pending
+
+        def _deliver():
+            if future.done():
+                return
+            if kind == "progress":
+                if progress_callback is not None:
+                    progress_callback(payload)
+            elif kind == "done":
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+        try:
+            loop.call_soon_threadsafe(_deliver)
+        except RuntimeError: # 事件循环已关闭
+            pass
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            try:
+                kind, key, payload = self._result_queue.get(timeout=0.5)
+            except queue.Empty:
+                self._reap_workers()
+                continue
+            except (EOFError, OSError):
+                break
+
+            if kind == "metric":
+                get_metrics_registry().record(key, *payload)
+            elif kind == "ready":
+                with self._lock:
+                    if key in self._processes:
+                        self._idle.append(key)
+                        self._assign_locked()
+            elif kind == "progress":
+                self._dispatch(key, "progress", payload)
+            elif kind in ("done", "error"):
+                with self._lock:
+                    self._job_owners.pop(key, None)
+                    if kind == "done":
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                self._dispatch(key, kind, payload)
+            elif kind == "recycle":
+                print(f"Recycling podcast worker process {key}: {payload}")
+                with self._lock:
+                    self.recycled += 1
+                with self._lock:
+                    process = self._processes.get(key)
+                if process is not None:
+                    process.join(timeout=5)
+                self._reap_workers()
+
+    def _reap_workers(self):
+        """替换已退出的工作进程，并让分派给意外退出的进程的任务以错误结束。"""
+        with self._lock:
+            processes = list(self._processes.items())
+        for pid, process in processes:
+            if process.is_alive():
+                continue
+            with self._lock:
+                del self._processes[pid]
+                del self._task_queues[pid]
+                if pid in self._idle:
+                    self._idle.remove(pid)
+                orphaned_jobs = [job_id for job_id, owner in self._job_owners.items() if owner == pid]
+                for job_id in orphaned_jobs:
+                    del self._job_owners[job_id]
+                if orphaned_jobs:
+                    self.crashed += 1
+                    self.failed += len(orphaned_jobs)
+            for job_id in orphaned_jobs:
+                self._dispatch(job_id, "error", f"Worker process {pid} exited unexpectedly (exit code {process.exitcode}).")
+            if not self._stopping.is_set():
+                self._spawn_worker()
+
+    def stop(self, timeout: float = 10):
+        """通知工作进程退出；超时仍未退出的进程会被终止。"""
+        self._stopping.set()
+        with self._lock:
+            task_queues = list(self._task_queues.values())
+            processes = list(self._processes.values())
+        for task_queue in task_queues:
+            task_queue.put(None)
+        for process in processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+        if self._listener is not None:
+            self._listener.join(timeout=2)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "alive": sum(1 for process in self._processes.values() if process.is_alive()),
+                "running": len(self._job_owners),
+                "max_jobs_per_worker": self.max_jobs_per_worker,
+                "max_rss_mb": self.max_rss_mb,
+                "completed": self.completed,
+                "failed": self.failed,
+                "recycled": self.recycled,
+                "crashed": self.crashed,
+            }
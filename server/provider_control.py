@@ -0,0 +1,623 @@
+# provider_control.py
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Optional
+
+import metrics
+
+# 每个 TTS 服务商的默认并发控制参数，可在服务商配置文件的 tts_concurrency 中覆盖
+default_initial_limit = int(os.getenv("PODCAST_TTS_CONCURRENCY_INITIAL", "4"))
+default_min_limit = int(os.getenv("PODCAST_TTS_CONCURRENCY_MIN", "1"))
+default_max_limit = int(os.getenv("PODCAST_TTS_CONCURRENCY_MAX", "32"))
+
+# 请求对冲的默认参数，可在服务商配置文件的 tts_hedging 中覆盖；max_rate 为 0 表示不对冲
+default_hedge_max_rate = float(os.getenv("PODCAST_TTS_HEDGE_MAX_RATE", "0"))
+default_hedge_percentile = float(os.getenv("PODCAST_TTS_HEDGE_PERCENTILE", "0.95"))
+default_hedge_min_samples = int(os.getenv("PODCAST_TTS_HEDGE_MIN_SAMPLES", "20"))
+
+# 重试预算与熔断器的默认参数，可在服务商配置文件的 tts_retry_budget / tts_circuit_breaker 中覆盖
+default_retry_budget_ratio = float(os.getenv("PODCAST_TTS_RETRY_BUDGET_RATIO", "0.2"))
+default_retry_budget_min = int(os.getenv("PODCAST_TTS_RETRY_BUDGET_MIN", "10"))
+default_breaker_failures = int(os.getenv("PODCAST_TTS_BREAKER_FAILURES", "5"))
+default_breaker_open_seconds = float(os.getenv("PODCAST_TTS_BREAKER_OPEN_SECONDS", "30"))
+default_breaker_park_seconds = float(os.getenv("PODCAST_TTS_BREAKER_PARK_SECONDS", "0"))
+
+# 归一化延迟时附加的工作量，抵消每次请求的固定开销，避免短文本的单位延迟被高估
+_LATENCY_WORK_OFFSET = 40
+# 对冲延迟统计保留的最近成功请求数
+_HEDGE_LATENCY_WINDOW = 200
+# 对冲额度最多积累的请求数，空闲一段时间后也只允许有限的突发对冲
+_HEDGE_BURST_REQUESTS = 100
+
+class RequestCancelled(Exception):
+    """请求被主动放弃（例如对冲请求中落后的一方），不计入服务商的成功或失败。"""
+
+def is_overload_error(error: BaseException) -> bool:
+    """429、5xx 和超时视为服务商过载信号（见 tts_adapters.TTSRequestError.overloaded）。"""
+    return bool(getattr(error, "overloaded", False))
+
+def is_outage_error(error: BaseException) -> bool:
+    """过载信号以及没有收到任何 HTTP 响应的请求错误（连接失败等）视为服务商故障，熔断器据此计数。"""
+    if is_overload_error(error):
+        return True
+    return hasattr(error, "overloaded") and getattr(error, "status_code", None) is None
+
+class CircuitOpenError(RuntimeError):
+    """服务商的熔断器处于打开状态，请求未发出即失败。"""
+
+class _AsyncWaiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop, future):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+class AIMDLimiter:
+    """
+    单个 TTS 服务商的自适应并发限制（加性增、乘性减）。
+
+    请求成功且单位文本延迟不超过基线的 latency_tolerance 倍时，限制每个“窗口”（约 limit 个成功请求）加 1；
+    遇到 429/5xx/超时或延迟明显升高时，限制乘以 decrease_factor，且每个 cooldown 秒内最多下调一次。
+    同一个限制器可同时被线程（acquire）和事件循环（aacquire）使用。
+    """
+    def __init__(self, provider: str, initial_limit: int = default_initial_limit, min_limit: int = default_min_limit, max_limit: int = default_max_limit,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0, cooldown: float = 1.0):
+        self.provider = provider
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+
+        self.inflight = 0
+        self.latency_ewma: Optional[float] = None # 单位文本延迟（秒/字符）
+        self.latency_baseline: Optional[float] = None
+        self.successes = 0
+        self.overloads = 0
+        self.errors = 0
+        self.increases = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._async_waiters = deque()
+
+    def _has_capacity(self) -> bool:
+        return self.inflight < int(self.limit)
+
+    def acquire(self):
+        """阻塞直到获得一个并发名额。"""
+        with self._condition:
+            while self._async_waiters or not self._has_capacity():
+                self._condition.wait()
+            self.inflight += 1
+
+    async def aacquire(self):
+        """acquire 的异步版本，等待期间不占用线程。"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._async_waiters and self._has_capacity():
+                self.inflight += 1
+                return
+            waiter = _AsyncWaiter(loop, loop.create_future())
+            self._async_waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._condition:
+                if waiter.granted: # 名额已分配但任务被取消，归还名额
+                    self._release_locked()
+                else:
+                    self._async_waiters.remove(waiter)
+            raise
+
+    def _release_locked(self):
+        self.inflight -= 1
+        self._wake_locked()
+
+    def _wake_locked(self):
+        # 异步等待者按到达顺序优先分配，剩余名额唤醒同步等待者
+        while self._async_waiters and self._has_capacity():
+            waiter = self._async_waiters.popleft()
+            waiter.granted = True
+            self.inflight += 1
+            try:
+                waiter.loop.call_soon_threadsafe(_resolve_waiter, waiter.future)
+            except RuntimeError: # 事件循环已关闭
+                self.inflight -= 1
+        self._condition.notify_all()
+
+    def release(self, latency: Optional[float] = None, work: int = 1, error: Optional[BaseException] = None):
+        """
+        归还名额并根据本次结果调整限制。
+
+        Args:
+            latency (float): 成功请求的耗时（秒）。
+            work (int): 请求的工作量（文本字符数），用于把延迟归一化为单位文本延迟。
+            error (BaseException): 请求失败时的异常；只有过载类错误会下调限制。
+        """
+        with self._condition:
+            now = time.monotonic()
+            if error is not None:
+                if is_overload_error(error):
+                    self.overloads += 1
+                    self._decrease_locked(now)
+                else:
+                    self.errors += 1
+            elif latency is not None:
+                self.successes += 1
+                unit_latency = latency / (max(0, work) + _LATENCY_WORK_OFFSET)
+                self.latency_ewma = unit_latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * unit_latency
+                # 基线跟踪较低的延迟，并缓慢上浮以适应服务商整体变慢
+                if self.latency_baseline is None or unit_latency < self.latency_baseline:
+                    self.latency_baseline = unit_latency
+                else:
+                    self.latency_baseline *= 1.01
+                if self.latency_ewma > self.latency_baseline * self.latency_tolerance:
+                    self._decrease_locked(now)
+                elif self.limit < self.max_limit:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                    self.increases += 1
+            self._release_locked()
+
+    def _decrease_locked(self, now: float):
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        new_limit = max(self.min_limit, self.limit * self.decrease_factor)
+        if new_limit < self.limit:
+            self.limit = new_limit
+            self.decreases += 1
+
+    @contextmanager
+    def slot(self, work: int = 1):
+        """占用一个名额执行一次请求，结束后按耗时或异常调整限制。"""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except RequestCancelled:
+            self.release() # 放弃的请求不计入成功或失败
+            raise
+        except BaseException as e:
+            self.release(error=e)
+            raise
+        self.release(latency=time.monotonic() - start, work=work)
+
+    @asynccontextmanager
+    async def aslot(self, work: int = 1):
+        """slot 的异步版本。"""
+        await self.aacquire()
+        start = time.monotonic()
+        try:
+            yield
+        except (asyncio.CancelledError, RequestCancelled):
+            self.release() # 取消不计入成功或失败
+            raise
+        except BaseException as e:
+            self.release(error=e)
+            raise
+        self.release(latency=time.monotonic() - start, work=work)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "limit_exact": round(self.limit, 3),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "inflight": self.inflight,
+                "waiting": len(self._async_waiters),
+                "latency_ms_per_char": round(self.latency_ewma * 1000, 3) if self.latency_ewma is not None else None,
+                "baseline_ms_per_char": round(self.latency_baseline * 1000, 3) if self.latency_baseline is not None else None,
+                "successes": self.successes,
+                "overloads": self.overloads,
+                "errors": self.errors,
+                "increases": self.increases,
+                "decreases": self.decreases,
+            }
+
+def _resolve_waiter(future):
+    if not future.done():
+        future.set_result(None)
+
+class RequestHedger:
+    """
+    单个 TTS 服务商的请求对冲策略。
+
+    记录最近成功请求的单位文本延迟；一次请求超过其文本长度对应的 percentile 分位延迟仍未完成时，
+    允许再发一个相同的请求，先成功的一方胜出，另一方被取消。对冲额度按令牌桶发放：每个请求增加
+    max_rate 个令牌，每次对冲消耗一个，因此对冲请求数不超过请求总数的 max_rate。
+    样本少于 min_samples 时不对冲。
+    """
+    def __init__(self, provider: str, max_rate: float = default_hedge_max_rate, percentile: float = default_hedge_percentile, min_samples: int = default_hedge_min_samples):
+        self.provider = provider
+        self.max_rate = min(max(0.0, max_rate), 1.0)
+        self.percentile = min(max(0.5, percentile), 0.999)
+        self.min_samples = max(1, min_samples)
+
+        self.requests = 0
+        self.hedges = 0 # 已发出的对冲请求
+        self.hedge_wins = 0 # 对冲请求先于原请求成功
+        self.skipped = 0 # 超过原请求的分位延迟但因额度不足未对冲
+        self._tokens = 1.0
+        self._latencies = deque(maxlen=_HEDGE_LATENCY_WINDOW) # 单位文本延迟（秒/字符）
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_rate > 0
+
+    def observe(self, latency: float, work: int = 1):
+        """记录一次成功请求的耗时（秒）及其工作量（文本字符数）。"""
+        with self._lock:
+            self._latencies.append(latency / (max(0, work) + _LATENCY_WORK_OFFSET))
+
+    def hedge_delay(self, work: int = 1) -> Optional[float]:
+        """
+        开始一次请求时调用，返回等待多久（秒）后考虑对冲；未启用或样本不足时返回 None。
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self._tokens + self.max_rate, max(1.0, self.max_rate * _HEDGE_BURST_REQUESTS))
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        unit_latency = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+        return unit_latency * (max(0, work) + _LATENCY_WORK_OFFSET)
+
+    def try_hedge(self) -> bool:
+        """请求超过分位延迟时调用；额度足够时消耗一个令牌并返回 True。"""
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.hedges += 1
+                return True
+            self.skipped += 1
+            return False
+
+    def record_win(self):
+        """对冲请求先于原请求成功时调用。"""
+        with self._lock:
+            self.hedge_wins += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ordered = sorted(self._latencies)
+            unit_latency = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))] if ordered else None
+            return {
+                "max_rate": self.max_rate,
+                "percentile": self.percentile,
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "skipped": self.skipped,
+                "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+                "percentile_ms_per_char": round(unit_latency * 1000, 3) if unit_latency is not None else None,
+            }
+
+class RetryBudget:
+    """
+    单个 TTS 服务商在进程内共享的重试预算（令牌桶）。
+
+    每个新请求（首次尝试）存入 ratio 个令牌，每次重试取出一个；桶最多保存 min_tokens 个令牌且初始为满。
+    因此服务商故障时，所有任务的重试总数不超过 min_tokens 加上请求数的 ratio 倍，而不是每条台词各自重试。
+    """
+    def __init__(self, provider: str, ratio: float = default_retry_budget_ratio, min_tokens: int = default_retry_budget_min):
+        self.provider = provider
+        self.ratio = max(0.0, ratio)
+        self.capacity = float(max(1, min_tokens))
+        self.tokens = self.capacity
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        """一个新请求开始（不含重试）时调用。"""
+        with self._lock:
+            self.requests += 1
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def try_retry(self) -> bool:
+        """预算足够时取出一个令牌并返回 True。"""
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                self.retries += 1
+                allowed = True
+            else:
+                self.denied += 1
+                allowed = False
+        metrics.tts_retries.inc(provider=self.provider, outcome="allowed" if allowed else "budget_exhausted")
+        return allowed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "ratio": self.ratio,
+                "tokens": round(self.tokens, 3),
+                "capacity": self.capacity,
+                "requests": self.requests,
+                "retries": self.retries,
+                "denied": self.denied,
+            }
+
+class CircuitBreaker:
+    """
+    单个 TTS 服务商在进程内共享的熔断器。
+
+    连续 failure_threshold 次请求以服务商故障（见 is_outage_error）结束后打开，open_seconds 内的请求不再发出：
+    park_seconds 为 0 时立即以 CircuitOpenError 失败，否则最多等待 park_seconds 秒，期间熔断器恢复则继续请求。
+    打开 open_seconds 后进入半开状态，只放行一个探测请求：成功则关闭，仍然故障则重新打开。
+    服务商返回的其他错误（如 4xx）说明服务可达，按成功计。同一个熔断器可同时被线程和事件循环使用。
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _ASYNC_POLL_INTERVAL = 0.25
+
+    def __init__(self, provider: str, failure_threshold: int = default_breaker_failures, open_seconds: float = default_breaker_open_seconds, park_seconds: float = default_breaker_park_seconds):
+        self.provider = provider
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = max(0.0, open_seconds)
+        self.park_seconds = max(0.0, park_seconds)
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opens = 0
+        self.rejections = 0
+        self._opened_at = 0.0
+        self._probe_inflight = False
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+    def _set_state_locked(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        if state == self.OPEN:
+            self.opens += 1
+            self._opened_at = time.monotonic()
+            print(f"TTS provider {self.provider}: circuit breaker opened after {self.consecutive_failures} consecutive failures.")
+        elif state == self.CLOSED:
+            print(f"TTS provider {self.provider}: circuit breaker closed.")
+        metrics.tts_circuit_transitions.inc(provider=self.provider, state=state)
+        self._condition.notify_all()
+
+    def _try_acquire_locked(self) -> Optional[float]:
+        """放行时返回 None，否则返回建议的等待秒数。"""
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                return remaining
+            self._set_state_locked(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probe_inflight:
+                return self.open_seconds or self._ASYNC_POLL_INTERVAL
+            self._probe_inflight = True
+        return None
+
+    def _reject_locked(self):
+        self.rejections += 1
+        metrics.tts_circuit_rejections.inc(provider=self.provider)
+        raise CircuitOpenError(f"Circuit breaker of TTS provider {self.provider} is open after repeated failures; request not sent.")
+
+    @property
+    def fails_fast(self) -> bool:
+        """熔断器打开且不等待时为 True，此时重试没有意义。"""
+        with self._lock:
+            return self.park_seconds <= 0 and self.state == self.OPEN and time.monotonic() < self._opened_at + self.open_seconds
+
+    def acquire(self):
+        """请求发出前调用；熔断器打开时最多等待 park_seconds 秒，仍未恢复则抛出 CircuitOpenError。"""
+        deadline = time.monotonic() + self.park_seconds
+        with self._condition:
+            while True:
+                wait_time = self._try_acquire_locked()
+                if wait_time is None:
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._reject_locked()
+                self._condition.wait(min(wait_time, remaining))
+
+    async def aacquire(self):
+        """acquire 的异步版本，等待期间不占用线程。"""
+        deadline = time.monotonic() + self.park_seconds
+        while True:
+            with self._lock:
+                wait_time = self._try_acquire_locked()
+                if wait_time is None:
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._reject_locked()
+            await asyncio.sleep(min(wait_time, remaining, self._ASYNC_POLL_INTERVAL))
+
+    def release(self, error: Optional[BaseException] = None, cancelled: bool = False):
+        """请求结束后调用，根据结果更新状态；cancelled 为 True 时只归还探测名额。"""
+        with self._condition:
+            probe = self._probe_inflight and self.state == self.HALF_OPEN
+            if probe:
+                self._probe_inflight = False
+            if cancelled:
+                self._condition.notify_all()
+                return
+            if error is not None and is_outage_error(error):
+                self.consecutive_failures += 1
+                if probe:
+                    self._set_state_locked(self.OPEN)
+                elif self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                    self._set_state_locked(self.OPEN)
+            else:
+                self.consecutive_failures = 0
+                if self.state != self.CLOSED:
+                    self._set_state_locked(self.CLOSED)
+            self._condition.notify_all()
+
+    @contextmanager
+    def guard(self):
+        """在熔断器的保护下执行一次请求，结束后按结果更新状态。"""
+        self.acquire()
+        try:
+            yield
+        except RequestCancelled:
+            self.release(cancelled=True)
+            raise
+        except BaseException as e:
+            self.release(error=e)
+            raise
+        self.release()
+
+    @asynccontextmanager
+    async def aguard(self):
+        """guard 的异步版本。"""
+        await self.aacquire()
+        try:
+            yield
+        except (asyncio.CancelledError, RequestCancelled):
+            self.release(cancelled=True)
+            raise
+        except BaseException as e:
+            self.release(error=e)
+            raise
+        self.release()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            open_remaining = self._opened_at + self.open_seconds - time.monotonic() if self.state == self.OPEN else 0.0
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "open_seconds_remaining": round(max(0.0, open_remaining), 3),
+                "opens": self.opens,
+                "rejections": self.rejections,
+            }
+
+class ConcurrencyController:
+    """
+    进程级的按服务商并发控制器，每个 TTS 服务商（index-tts、edge-tts、fish-audio、minimax、doubao-tts、gemini-tts）
+    各自维护一个 AIMDLimiter。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limiters = {}
+        self._hedgers = {}
+        self._retry_budgets = {}
+        self._breakers = {}
+
+    def limiter(self, provider: str, settings: Optional[dict] = None) -> AIMDLimiter:
+        """
+        返回服务商的限制器，首次使用时按 settings（服务商配置中的 tts_concurrency：initial/min/max）创建。
+        """
+        with self._lock:
+            limiter = self._limiters.get(provider)
+            if limiter is None:
+                settings = settings or {}
+                limiter = AIMDLimiter(
+                    provider,
+                    initial_limit=int(settings.get("initial", default_initial_limit)),
+                    min_limit=int(settings.get("min", default_min_limit)),
+                    max_limit=int(settings.get("max", default_max_limit)),
+                )
+                self._limiters[provider] = limiter
+            return limiter
+
+    def hedger(self, provider: str, settings: Optional[dict] = None) -> RequestHedger:
+        """
+        返回服务商的请求对冲策略，首次使用时按 settings（服务商配置中的 tts_hedging：max_rate/percentile/min_samples）创建。
+        """
+        with self._lock:
+            hedger = self._hedgers.get(provider)
+            if hedger is None:
+                settings = settings or {}
+                hedger = RequestHedger(
+                    provider,
+                    max_rate=float(settings.get("max_rate", default_hedge_max_rate)),
+                    percentile=float(settings.get("percentile", default_hedge_percentile)),
+                    min_samples=int(settings.get("min_samples", default_hedge_min_samples)),
+                )
+                self._hedgers[provider] = hedger
+            return hedger
+
+    def retry_budget(self, provider: str, settings: Optional[dict] = None) -> RetryBudget:
+        """
+        返回服务商的重试预算，首次使用时按 settings（服务商配置中的 tts_retry_budget：ratio/min_tokens）创建。
+        """
+        with self._lock:
+            budget = self._retry_budgets.get(provider)
+            if budget is None:
+                settings = settings or {}
+                budget = RetryBudget(
+                    provider,
+                    ratio=float(settings.get("ratio", default_retry_budget_ratio)),
+                    min_tokens=int(settings.get("min_tokens", default_retry_budget_min)),
+                )
+                self._retry_budgets[provider] = budget
+            return budget
+
+    def circuit_breaker(self, provider: str, settings: Optional[dict] = None) -> CircuitBreaker:
+        """
+        返回服务商的熔断器，首次使用时按 settings（服务商配置中的 tts_circuit_breaker：failure_threshold/open_seconds/park_seconds）创建。
+        """
+        with self._lock:
+            breaker = self._breakers.get(provider)
+            if breaker is None:
+                settings = settings or {}
+                breaker = CircuitBreaker(
+                    provider,
+                    failure_threshold=int(settings.get("failure_threshold", default_breaker_failures)),
+                    open_seconds=float(settings.get("open_seconds", default_breaker_open_seconds)),
+                    park_seconds=float(settings.get("park_seconds", default_breaker_park_seconds)),
+                )
+                self._breakers[provider] = breaker
+            return breaker
+
+    def breaker_states(self) -> dict:
+        """返回 {服务商: 熔断器状态}。"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {provider: breaker.state for provider, breaker in sorted(breakers.items())}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            limiters = dict(self._limiters)
+            hedgers = dict(self._hedgers)
+            retry_budgets = dict(self._retry_budgets)
+            breakers = dict(self._breakers)
+        snapshot = {provider: limiter.snapshot() for provider, limiter in sorted(limiters.items())}
+        for provider, hedger in hedgers.items():
+            if hedger.enabled and provider in snapshot:
+                snapshot[provider]["hedging"] = hedger.snapshot()
+        for provider, budget in retry_budgets.items():
+            if provider in snapshot:
+                snapshot[provider]["retry_budget"] = budget.snapshot()
+        for provider, breaker in breakers.items():
+            if provider in snapshot:
+                snapshot[provider]["circuit_breaker"] = breaker.snapshot()
+        return snapshot
+
+_concurrency_controller: Optional[ConcurrencyController] = None
+_concurrency_controller_lock = threading.Lock()
+
+def get_concurrency_controller() -> ConcurrencyController:
+    """返回进程级的并发控制器单例。"""
+    global _concurrency_controller
+    with _concurrency_controller_lock:
+        if _concurrency_controller is None:
+            _concurrency_controller = ConcurrencyController()
+        return _concurrency_controller
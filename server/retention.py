@@ -0,0 +1,264 @@
+# retention.py
+
+import os
+import time
+import heapq
+import shutil
+import asyncio
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional
+
+# 输出文件（音频、片段流）的保留时间（分钟）
+output_ttl_minutes = float(os.getenv("PODCAST_OUTPUT_TTL_MINUTES", "30"))
+# 磁盘配额：成品音频总字节数上限、输出目录所在卷的最小剩余空间（字节），<=0 表示不限制
+output_max_bytes = int(os.getenv("PODCAST_OUTPUT_MAX_BYTES", "0"))
+output_min_free_bytes = int(os.getenv("PODCAST_OUTPUT_MIN_FREE_BYTES", "0"))
+# 两次清理之间的最长间隔（秒），以及重新扫描输出目录、登记未跟踪文件的间隔（分钟）
+retention_sweep_interval = float(os.getenv("PODCAST_RETENTION_SWEEP_INTERVAL", "60"))
+retention_rescan_minutes = float(os.getenv("PODCAST_RETENTION_RESCAN_MINUTES", "360"))
+
+# 刚生成或刚被下载的音频不会因磁盘配额被淘汰（秒）
+_MIN_EVICTION_AGE = 300
+
+class ExpiryIndex:
+    """
+    按截止时间排序的最小堆。更新或删除条目时，旧的堆元素惰性作废；弹出过期条目只触及已过期的元素。
+    """
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._deadlines
+
+    def set(self, key: str, deadline: float):
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            # 作废元素过多时重建堆
+            self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def discard(self, key: str):
+        self._deadlines.pop(key, None)
+
+    def next_deadline(self) -> Optional[float]:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now: float) -> List[str]:
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                del self._deadlines[key]
+                expired.append(key)
+        return expired
+
+def _path_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _remove_path(path: str):
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Failed to delete {path}. Reason: {e}")
+
+def _scan_entries(root_dir: str) -> list:
+    """返回输出目录中的文件以及一级子目录中的条目（如 streams/<task_id>）的 (相对路径, mtime, 大小, 是否为文件)。"""
+    entries = []
+    for entry in os.scandir(root_dir):
+        try:
+            if entry.is_file(follow_symlinks=False) or entry.is_symlink():
+                stat_result = entry.stat(follow_symlinks=False)
+                entries.append((entry.name, stat_result.st_mtime, stat_result.st_size, True))
+            elif entry.is_dir():
+                for child in os.scandir(entry.path):
+                    entries.append((os.path.join(entry.name, child.name), child.stat(follow_symlinks=False).st_mtime, 0, False))
+        except OSError:
+            continue
+    return entries
+
+class RetentionManager:
+    """
+    输出目录的保留策略，运行在 asyncio 事件循环中。
+
+    - 文件和目录登记时按截止时间放入 ExpiryIndex，清理协程睡眠到最近的截止时间（最长 sweep_interval），
+      每次只处理已过期的条目；过期任务由 expire_tasks 回调从任务存储中取出（按 timestamp 索引）。
+    - 成品音频按最近下载时间排成 LRU；超过磁盘配额（总字节数或卷剩余空间）时淘汰最久未下载的音频。
+    - 启动时以及每隔 rescan_interval 扫描一次输出目录，登记未被跟踪的文件（例如失败任务遗留的片段）。
+    文件系统操作都在线程中执行，不阻塞请求；所有方法都须在同一个事件循环中调用。
+    """
+    def __init__(
+        self,
+        root_dir: str,
+        ttl_seconds: float = output_ttl_minutes * 60,
+        max_bytes: int = output_max_bytes,
+        min_free_bytes: int = output_min_free_bytes,
+        expire_tasks: Optional[Callable[[float], Iterable[str]]] = None,
+        sweep_interval: float = retention_sweep_interval,
+        rescan_interval: float = retention_rescan_minutes * 60,
+    ):
+        self.root_dir = root_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.min_free_bytes = min_free_bytes
+        self.expire_tasks = expire_tasks
+        self.sweep_interval = max(1.0, sweep_interval)
+        self.rescan_interval = rescan_interval
+        self._expiry = ExpiryIndex()
+        self._episodes: "OrderedDict[str, list]" = OrderedDict() # name -> [size, last_used]，最久未下载的在前
+        self._episode_bytes = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sweeps = 0
+        self.expired = 0
+        self.evicted = 0
+        self.evicted_bytes = 0
+
+    def start(self):
+        """在当前事件循环中启动清理协程。"""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def track(self, name: str, episode: bool = False):
+        """
+        登记输出目录中的文件或目录 name（相对路径），ttl_seconds 后删除；已登记的条目刷新截止时间。
+        episode=True 表示成品音频，参与磁盘配额淘汰。
+        """
+        now = time.time()
+        self._expiry.set(name, now + self.ttl_seconds)
+        if episode:
+            size = await asyncio.to_thread(_path_size, os.path.join(self.root_dir, name))
+            self._add_episode(name, size, now)
+            if self._wakeup is not None:
+                self._wakeup.set() # 立即检查磁盘配额
+
+    def touch(self, name: str):
+        """记录成品音频的一次下载。"""
+        episode = self._episodes.get(name)
+        if episode is not None:
+            episode[1] = time.time()
+            self._episodes.move_to_end(name)
+
+    def _add_episode(self, name: str, size: int, last_used: float):
+        previous = self._episodes.pop(name, None)
+        if previous is not None:
+            self._episode_bytes -= previous[0]
+        self._episodes[name] = [size, last_used]
+        self._episode_bytes += size
+
+    def _forget(self, name: str):
+        self._expiry.discard(name)
+        episode = self._episodes.pop(name, None)
+        if episode is not None:
+            self._episode_bytes -= episode[0]
+
+    async def _remove(self, names: List[str]):
+        for name in names:
+            self._forget(name)
+        if names:
+            await asyncio.to_thread(lambda: [_remove_path(os.path.join(self.root_dir, name)) for name in names])
+
+    async def _run(self):
+        try:
+            await self.rescan()
+        except Exception as e:
+            print(f"Output retention rescan failed: {e}")
+        next_rescan = time.time() + self.rescan_interval
+        self._wakeup.set() # 启动后立即清理一次
+        while True:
+            timeout = self.sweep_interval
+            next_deadline = self._expiry.next_deadline()
+            if next_deadline is not None:
+                timeout = max(0.0, min(timeout, next_deadline - time.time()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.sweep()
+                if self.rescan_interval > 0 and time.time() >= next_rescan:
+                    await self.rescan()
+                    next_rescan = time.time() + self.rescan_interval
+            except Exception as e:
+                print(f"Output retention sweep failed: {e}")
+
+    async def sweep(self):
+        """删除已过期的条目和过期任务的文件，然后执行磁盘配额。"""
+        now = time.time()
+        expired = self._expiry.pop_expired(now)
+        if self.expire_tasks is not None:
+            expired.extend(await asyncio.to_thread(lambda: list(self.expire_tasks(now - self.ttl_seconds))))
+        if expired:
+            print(f"Deleting {len(expired)} expired output entries.")
+            self.expired += len(expired)
+            await self._remove(expired)
+        await self._enforce_quota(now)
+        self.sweeps += 1
+
+    async def _enforce_quota(self, now: float):
+        if self.max_bytes <= 0 and self.min_free_bytes <= 0:
+            return
+        excess = self._episode_bytes - self.max_bytes if self.max_bytes > 0 else 0
+        if self.min_free_bytes > 0:
+            free_bytes = (await asyncio.to_thread(shutil.disk_usage, self.root_dir)).free
+            excess = max(excess, self.min_free_bytes - free_bytes)
+        victims = []
+        for name, (size, last_used) in self._episodes.items():
+            if excess <= 0 or now - last_used < _MIN_EVICTION_AGE:
+                break
+            victims.append(name)
+            excess -= size
+            self.evicted_bytes += size
+        if victims:
+            print(f"Disk quota exceeded, evicting least recently downloaded episodes: {victims}")
+            self.evicted += len(victims)
+            await self._remove(victims)
+
+    async def rescan(self):
+        """扫描输出目录，登记未被跟踪的条目（截止时间按 mtime 计算），并移除已不存在的成品音频。"""
+        entries = await asyncio.to_thread(_scan_entries, self.root_dir)
+        existing = set()
+        for name, mtime, size, is_file in sorted(entries, key=lambda entry: entry[1]):
+            existing.add(name)
+            if name not in self._expiry:
+                self._expiry.set(name, mtime + self.ttl_seconds)
+            if is_file and name.endswith(".mp3") and name not in self._episodes:
+                self._add_episode(name, size, mtime)
+        for name in [name for name in self._episodes if name not in existing]:
+            self._forget(name)
+
+    def stats(self) -> dict:
+        return {
+            "tracked": len(self._expiry),
+            "next_deadline": self._expiry.next_deadline(),
+            "episodes": len(self._episodes),
+            "episode_bytes": self._episode_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "max_bytes": self.max_bytes,
+            "min_free_bytes": self.min_free_bytes,
+            "sweeps": self.sweeps,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "evicted_bytes": self.evicted_bytes,
+        }
@@ -0,0 +1,83 @@
+# script_stream.py
+
+import json
+
+class TranscriptStreamParser:
+    """
+    增量解析 LLM 流式返回的播客脚本 JSON。
+
+    每次 feed 一段文本，返回其中新闭合的 podcast_transcripts 数组元素（例如 {"speaker_id": 0, "dialog": "..."}），
+    不必等待整个 JSON 生成完毕。解析器只跟踪字符串、转义和花括号深度，因此对 ```json 代码块等
+    前后缀文本不敏感；完整文本保存在 text 属性中，供流结束后做完整校验。
+    """
+    TRANSCRIPTS_KEY = '"podcast_transcripts"'
+
+    def __init__(self):
+        self.text = ""
+        self.done = False # 已读到数组结尾的 ']'
+        self._state = "seek_key" # seek_key -> seek_array -> in_array
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = -1
+
+    def feed(self, chunk: str) -> list:
+        """追加一段流式文本，返回本次新闭合的脚本条目列表。"""
+        items = []
+        if not chunk or self.done:
+            return items
+        self.text += chunk
+        text = self.text
+
+        if self._state == "seek_key":
+            key_index = text.find(self.TRANSCRIPTS_KEY, max(0, self._pos - len(self.TRANSCRIPTS_KEY)))
+            if key_index == -1:
+                self._pos = len(text)
+                return items
+            self._pos = key_index + len(self.TRANSCRIPTS_KEY)
+            self._state = "seek_array"
+
+        if self._state == "seek_array":
+            array_index = text.find('[', self._pos)
+            if array_index == -1:
+                self._pos = len(text)
+                return items
+            self._pos = array_index + 1
+            self._state = "in_array"
+
+        i = self._pos
+        length = len(text)
+        while i < length:
+            char = text[i]
+            if self._depth == 0:
+                if char == '{':
+                    self._depth = 1
+                    self._object_start = i
+                elif char == ']':
+                    self.done = True
+                    i += 1
+                    break
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        item = json.loads(text[self._object_start:i + 1])
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict) and "dialog" in item:
+                        items.append(item)
+            i += 1
+        self._pos = i
+        return items
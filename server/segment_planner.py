@@ -0,0 +1,159 @@
+# segment_planner.py
+
+import os
+import re
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional
+
+# 默认的片段规划参数，可在服务商配置文件的 tts_segment_plan 中覆盖（0 表示关闭对应的处理）
+default_max_chars = int(os.getenv("PODCAST_TTS_SEGMENT_MAX_CHARS", "200"))
+default_min_chars = int(os.getenv("PODCAST_TTS_SEGMENT_MIN_CHARS", "12"))
+
+# 句末标点（含其后的引号、括号）与分句标点，切分点位于标点之后
+_SENTENCE_END = re.compile(r'[。！？!?；;…]+["”’」』）)]*\s*|\.(?=\s)\s*|\n+')
+_CLAUSE_END = re.compile(r'[，,、：:]\s*|\s+')
+
+def _split_after(pattern, text: str) -> List[str]:
+    """在 pattern 的每个匹配之后切分，保留标点和空白，拼接后与原文相同。"""
+    pieces = []
+    start = 0
+    for match in pattern.finditer(text):
+        if match.end() > start:
+            pieces.append(text[start:match.end()])
+            start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+def _join(left: str, right: str) -> str:
+    """拼接同一说话人的相邻片段；前一段没有以标点结尾时补一个逗号，保留原来的停顿。"""
+    left = left.rstrip()
+    right = right.lstrip()
+    if not left or not right:
+        return left + right
+    if left[-1].isalnum():
+        separator = ", " if left[-1].isascii() else "，"
+    else:
+        separator = " " if left[-1].isascii() and right[0].isascii() else ""
+    return left + separator + right
+
+class SegmentPlanner:
+    """
+    在脚本与 TTS 之间规划合成请求。
+
+    超过 max_chars 的台词在句末标点处切分为多个片段（单句仍过长时依次退到分句标点、空白和硬切分），
+    各片段作为独立的 TTS 请求并行合成，合并时按顺序拼回；切分尽量均匀，避免出现很短的尾段。
+    短于 min_chars 的台词会等待下一条，与同一说话人的相邻台词合并为一个请求（合并后不超过 max_chars），
+    减少零碎请求的固定开销。只有过短的台词会被暂缓，其余条目仍在生成后立即交给 TTS。
+
+    planned 为已输出的片段数，合并音频时据此校验片段文件数量。
+    """
+    def __init__(self, max_chars: int = default_max_chars, min_chars: int = default_min_chars):
+        self.max_chars = max(0, int(max_chars))
+        self.min_chars = max(0, int(min_chars))
+        self.planned = 0 # 已输出的片段数
+        self.split_items = 0 # 被切分的台词数
+        self.merged_items = 0 # 被合并到前一条的台词数
+
+    @classmethod
+    def from_config(cls, config_data: Optional[dict]) -> "SegmentPlanner":
+        """按服务商配置中的 tts_segment_plan（max_chars/min_chars）创建规划器。"""
+        settings = (config_data or {}).get("tts_segment_plan") or {}
+        return cls(
+            max_chars=settings.get("max_chars", default_max_chars),
+            min_chars=settings.get("min_chars", default_min_chars),
+        )
+
+    def split(self, dialog: str) -> List[str]:
+        """把一条台词切分为不超过 max_chars 的片段；无需切分时原样返回。"""
+        text = dialog.strip()
+        if not self.max_chars or len(text) <= self.max_chars:
+            return [dialog]
+        units = []
+        for sentence in _split_after(_SENTENCE_END, text):
+            if len(sentence) <= self.max_chars:
+                units.append(sentence)
+                continue
+            for clause in _split_after(_CLAUSE_END, sentence):
+                units.extend(clause[start:start + self.max_chars] for start in range(0, len(clause), self.max_chars))
+
+        # 按均分后的目标长度装箱，各片段长度接近，并行合成时不会被一个长片段拖慢
+        count = -(-len(text) // self.max_chars)
+        target = -(-len(text) // count)
+        chunks = []
+        current = ""
+        for unit in units:
+            if current and (len(current) >= target or len(current) + len(unit) > self.max_chars):
+                chunks.append(current)
+                current = ""
+            current += unit
+        if current:
+            chunks.append(current)
+        return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+    def _expand(self, item: dict) -> List[dict]:
+        dialog = item.get("dialog")
+        if not isinstance(dialog, str):
+            return [item]
+        chunks = self.split(dialog)
+        if len(chunks) == 1:
+            return [item]
+        self.split_items += 1
+        print(f"Split a {len(dialog)}-character dialog of speaker {item.get('speaker_id')} into {len(chunks)} TTS segments.")
+        return [dict(item, dialog=chunk) for chunk in chunks]
+
+    def _is_fragment(self, item: dict) -> bool:
+        dialog = item.get("dialog")
+        return isinstance(dialog, str) and len(dialog.strip()) < self.min_chars
+
+    def _try_merge(self, pending: dict, item: dict) -> Optional[dict]:
+        """pending 与 item 属于同一说话人且合并后不超过 max_chars 时返回合并后的条目。"""
+        if pending.get("speaker_id") != item.get("speaker_id") or not isinstance(item.get("dialog"), str):
+            return None
+        dialog = _join(pending["dialog"], item["dialog"])
+        if self.max_chars and len(dialog) > self.max_chars:
+            return None
+        self.merged_items += 1
+        return dict(pending, dialog=dialog)
+
+    def _feed(self, pending: Optional[dict], item: dict):
+        """处理一条台词，返回 (可以输出的片段列表, 暂缓的片段)。"""
+        segments = self._expand(item)
+        ready = []
+        for segment in segments:
+            if pending is not None:
+                merged = self._try_merge(pending, segment)
+                if merged is None:
+                    ready.append(pending)
+                else:
+                    segment = merged
+                pending = None
+            if self._is_fragment(segment):
+                pending = segment
+            else:
+                ready.append(segment)
+        self.planned += len(ready)
+        return ready, pending
+
+    def _flush(self, pending: Optional[dict]) -> List[dict]:
+        if pending is None:
+            return []
+        self.planned += 1
+        return [pending]
+
+    def plan(self, transcripts: Iterable[dict]) -> Iterator[dict]:
+        """逐条规划 transcripts（列表或生成器），输出实际发给 TTS 的片段。"""
+        pending = None
+        for item in transcripts:
+            ready, pending = self._feed(pending, item)
+            yield from ready
+        yield from self._flush(pending)
+
+    async def aplan(self, transcripts: AsyncIterable[dict]) -> AsyncIterator[dict]:
+        """plan 的异步版本。"""
+        pending = None
+        async for item in transcripts:
+            ready, pending = self._feed(pending, item)
+            for segment in ready:
+                yield segment
+        for segment in self._flush(pending):
+            yield segment
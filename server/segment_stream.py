@@ -0,0 +1,116 @@
+# segment_stream.py
+
+import os
+import asyncio
+import threading
+import subprocess
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+# 渐进式播放：片段按脚本顺序编码为 MP3，连续的前缀一就绪即可收听。每个片段需要额外一次 MP3 编码，
+# 默认关闭，设为 1 开启
+stream_segments_enabled = os.getenv("PODCAST_STREAM_SEGMENTS", "0") == "1"
+# 播放端等待下一个片段时的轮询间隔（秒）
+stream_poll_interval = float(os.getenv("PODCAST_STREAM_POLL_INTERVAL", "0.5"))
+
+STREAM_END_MARKER = "END"
+
+def _segment_filename(index: int) -> str:
+    return f"{index:05d}.mp3"
+
+class SegmentStreamWriter:
+    """
+    把合成好的片段发布到流目录，供生成过程中的渐进式播放。
+
+    片段完成顺序不定：每个片段先在各自的线程中编码为 MP3（与最终合并使用相同的采样率、声道和码率，
+    不写 Xing/ID3 头，便于直接拼接），只有当它之前的片段都已发布时才按序号重命名为正式文件，因此目录中
+    的文件总是脚本顺序的一个连续前缀。finish() 写入结束标记，播放端读完全部片段后结束。
+    目录位于文件系统上，生成任务运行在工作进程中时 API 进程同样可以读取。
+    """
+    def __init__(self, stream_dir: str):
+        self.stream_dir = stream_dir
+        self._lock = threading.Lock()
+        self._ready = {} # index -> 已编码的临时文件路径，None 表示编码失败
+        self._next_index = 0
+        self.published = 0
+        self.skipped = 0
+        os.makedirs(stream_dir, exist_ok=True)
+
+    def publish(self, index: int, audio_file: str):
+        """编码第 index 个片段，并发布所有已就绪的连续片段。编码失败时发布空片段（播放端跳过），不影响生成任务。"""
+        part_path = os.path.join(self.stream_dir, f".part_{_segment_filename(index)}")
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-i", audio_file,
+            "-vn",
+            "-ar", "44100",
+            "-ac", "2",
+            "-b:a", "192k",
+            "-acodec", "libmp3lame",
+            "-write_xing", "0",
+            "-id3v2_version", "0",
+            "-f", "mp3",
+            part_path,
+        ]
+        try:
+            subprocess.run(command, check=True, capture_output=True, text=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Warning: failed to encode stream segment {index}: {getattr(e, 'stderr', None) or e}")
+            part_path = None
+
+        with self._lock:
+            self._ready[index] = part_path
+            while self._next_index in self._ready:
+                ready_path = self._ready.pop(self._next_index)
+                segment_path = os.path.join(self.stream_dir, _segment_filename(self._next_index))
+                if ready_path is None:
+                    open(segment_path, "wb").close() # 发布空片段，播放端直接跳过
+                    self.skipped += 1
+                else:
+                    os.replace(ready_path, segment_path)
+                    self.published += 1
+                self._next_index += 1
+
+    def finish(self):
+        """写入结束标记（已发布的片段数），播放端读完这些片段后结束。"""
+        with self._lock:
+            with open(os.path.join(self.stream_dir, STREAM_END_MARKER), "w", encoding="utf-8") as f:
+                f.write(str(self._next_index))
+
+async def stream_segments(stream_dir: str, is_active: Callable[[], Awaitable[bool]], chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    按顺序读取流目录中的片段并逐块产出；下一个片段尚未就绪时轮询等待。
+    下一个片段不存在，且已有结束标记或 is_active() 返回 False（任务失败、被清理）时结束。
+    """
+    index = 0
+    while True:
+        segment_path = os.path.join(stream_dir, _segment_filename(index))
+        try:
+            segment_file = await asyncio.to_thread(open, segment_path, "rb")
+        except FileNotFoundError:
+            segment_file = None
+        if segment_file is not None:
+            try:
+                while True:
+                    chunk = await asyncio.to_thread(segment_file.read, chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                segment_file.close()
+            index += 1
+            continue
+
+        # 结束标记在所有片段发布之后写入
+        if await asyncio.to_thread(_read_end_marker, stream_dir) is not None or not await is_active():
+            # 再检查一次，避免结束前刚好发布的片段被漏掉
+            if not await asyncio.to_thread(os.path.exists, segment_path):
+                return
+            continue
+        await asyncio.sleep(stream_poll_interval)
+
+def _read_end_marker(stream_dir: str) -> Optional[int]:
+    try:
+        with open(os.path.join(stream_dir, STREAM_END_MARKER), "r", encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
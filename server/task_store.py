@@ -0,0 +1,296 @@
+# task_store.py
+
+import os
+import json
+import asyncio
+import uuid
+import socket
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+
+# 任务存储配置：sqlite（默认，可多 worker 共享）或 memory（仅单进程）
+task_store_backend = os.getenv("PODCAST_TASK_STORE", "sqlite")
+task_db_path = os.getenv("PODCAST_TASK_DB_PATH", os.path.join("data", "tasks.db"))
+
+ACTIVE_STATUSES = ("pending", "running")
+# 区分同一 PID 的不同进程实例（容器重启后 PID 往往相同）
+_process_token = uuid.uuid4().hex[:12]
+
+def current_owner() -> str:
+    """当前进程的标识（主机名:PID:实例令牌），记录在任务上，用于重启后识别被中断的任务。"""
+    return f"{socket.gethostname()}:{os.getpid()}:{_process_token}"
+
+def _output_filename(task_info: dict) -> Optional[str]:
+    """audio_file_mapping 的键：不含扩展名的输出文件名。"""
+    output_audio_filepath = task_info.get("output_audio_filepath")
+    if not output_audio_filepath:
+        return None
+    return os.path.basename(output_audio_filepath).split(".")[0]
+
+class TaskStore(ABC):
+    """
+    任务存储接口。任务以 dict 形式保存（task_id、auth_id、status、timestamp 以及生成结果等字段），
+    按 auth_id、status、timestamp 和输出文件名查询。
+    """
+    @abstractmethod
+    def create_task_if_idle(self, task_id: str, task_info: dict) -> Optional[str]:
+        """
+        如果该 auth_id 没有 pending/running 的任务则创建任务并返回 None，否则返回已有任务的 ID。
+        检查与创建在同一事务中完成，多个 worker 同时提交时也只有一个会成功。
+        """
+
+    @abstractmethod
+    def update_task(self, task_id: str, fields: dict):
+        """合并更新任务字段。"""
+
+    @abstractmethod
+    def get_task(self, task_id: str) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    def list_tasks(self, auth_id: str) -> List[dict]:
+        """按提交时间顺序返回该 auth_id 的全部任务。"""
+
+    @abstractmethod
+    def get_task_by_audio_file(self, filename_without_ext: str) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    def pop_expired(self, before_timestamp: float) -> List[dict]:
+        """删除并返回 timestamp 早于 before_timestamp 的任务。"""
+
+    @abstractmethod
+    def list_active(self) -> List[dict]:
+        """返回全部 pending/running 任务。"""
+
+    def fail_orphaned_tasks(self, is_owner_alive: Callable[[str], bool]) -> List[str]:
+        """
+        将所属进程已不存在的 pending/running 任务标记为失败（例如服务重启时被中断的任务），返回这些任务的 ID。
+        """
+        orphaned = []
+        for task_info in self.list_active():
+            owner = task_info.get("owner")
+            if owner and not is_owner_alive(owner):
+                self.update_task(task_info["task_id"], {"status": "failed", "result": "Task interrupted by a server restart."})
+                orphaned.append(task_info["task_id"])
+        return orphaned
+
+    def close(self):
+        pass
+
+    # 异步版本：在线程中执行，SQLite 事务（可能等待写锁）不会阻塞事件循环
+    async def acreate_task_if_idle(self, task_id: str, task_info: dict) -> Optional[str]:
+        return await asyncio.to_thread(self.create_task_if_idle, task_id, task_info)
+
+    async def aupdate_task(self, task_id: str, fields: dict):
+        await asyncio.to_thread(self.update_task, task_id, fields)
+
+    async def aget_task(self, task_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.get_task, task_id)
+
+    async def alist_tasks(self, auth_id: str) -> List[dict]:
+        return await asyncio.to_thread(self.list_tasks, auth_id)
+
+    async def aget_task_by_audio_file(self, filename_without_ext: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.get_task_by_audio_file, filename_without_ext)
+
+class MemoryTaskStore(TaskStore):
+    """进程内的任务存储，重启后任务丢失，也不能在多个 worker 间共享。"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    def create_task_if_idle(self, task_id: str, task_info: dict) -> Optional[str]:
+        auth_id = task_info["auth_id"]
+        with self._lock:
+            for existing in self._tasks.values():
+                if existing["auth_id"] == auth_id and existing["status"] in ACTIVE_STATUSES:
+                    return existing["task_id"]
+            self._tasks[task_id] = dict(task_info, task_id=task_id)
+            return None
+
+    def update_task(self, task_id: str, fields: dict):
+        with self._lock:
+            if task_id in self._tasks:
+                self._tasks[task_id].update(fields)
+
+    def get_task(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            task_info = self._tasks.get(task_id)
+            return dict(task_info) if task_info else None
+
+    def list_tasks(self, auth_id: str) -> List[dict]:
+        with self._lock:
+            return [dict(t) for t in self._tasks.values() if t["auth_id"] == auth_id]
+
+    def get_task_by_audio_file(self, filename_without_ext: str) -> Optional[dict]:
+        with self._lock:
+            for task_info in self._tasks.values():
+                if _output_filename(task_info) == filename_without_ext:
+                    return dict(task_info)
+            return None
+
+    def pop_expired(self, before_timestamp: float) -> List[dict]:
+        with self._lock:
+            expired = [task_id for task_id, t in self._tasks.items() if t["timestamp"] < before_timestamp]
+            return [self._tasks.pop(task_id) for task_id in expired]
+
+    def list_active(self) -> List[dict]:
+        with self._lock:
+            return [dict(t) for t in self._tasks.values() if t["status"] in ACTIVE_STATUSES]
+
+class SQLiteTaskStore(TaskStore):
+    """
+    基于 SQLite（WAL 模式）的任务存储。
+
+    auth_id、status、timestamp 和输出文件名为带索引的列，其余字段以 JSON 保存在 data 列中。
+    多个 uvicorn worker 可以共享同一个数据库文件，服务重启后任务也不会丢失。
+    """
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id TEXT PRIMARY KEY,
+            auth_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            output_filename TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_auth_id ON tasks (auth_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+        CREATE INDEX IF NOT EXISTS idx_tasks_timestamp ON tasks (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_tasks_output_filename ON tasks (output_filename);
+    """
+
+    def __init__(self, db_path: str = task_db_path):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._local = threading.local()
+        self._connections_lock = threading.Lock()
+        self._connections = set() # 所有线程打开的连接，close() 时统一关闭
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(self._SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 连接不能跨线程使用，每个线程各自持有一个
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # check_same_thread=False 仅为 close() 能在其它线程关闭连接，每个连接仍只由打开它的线程使用
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.add(connection)
+        return connection
+
+    @staticmethod
+    def _row_to_task(row) -> dict:
+        return json.loads(row[0])
+
+    def _write(self, connection: sqlite3.Connection, task_info: dict, insert: bool):
+        values = (
+            task_info["auth_id"],
+            getattr(task_info["status"], "value", task_info["status"]), # TaskStatus 枚举存为其取值
+            task_info["timestamp"],
+            _output_filename(task_info),
+            json.dumps(task_info, ensure_ascii=False, default=str),
+            task_info["task_id"],
+        )
+        if insert:
+            connection.execute("INSERT INTO tasks (auth_id, status, timestamp, output_filename, data, task_id) VALUES (?, ?, ?, ?, ?, ?)", values)
+        else:
+            connection.execute("UPDATE tasks SET auth_id = ?, status = ?, timestamp = ?, output_filename = ?, data = ? WHERE task_id = ?", values)
+
+    def create_task_if_idle(self, task_id: str, task_info: dict) -> Optional[str]:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT task_id FROM tasks WHERE auth_id = ? AND status IN (?, ?) LIMIT 1",
+                (task_info["auth_id"], *ACTIVE_STATUSES),
+            ).fetchone()
+            if row is None:
+                self._write(connection, dict(task_info, task_id=task_id), insert=True)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return row[0] if row else None
+
+    def update_task(self, task_id: str, fields: dict):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is not None:
+                task_info = self._row_to_task(row)
+                task_info.update(fields)
+                self._write(connection, task_info, insert=False)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def get_task(self, task_id: str) -> Optional[dict]:
+        row = self._connection().execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def list_tasks(self, auth_id: str) -> List[dict]:
+        rows = self._connection().execute("SELECT data FROM tasks WHERE auth_id = ? ORDER BY timestamp", (auth_id,)).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def get_task_by_audio_file(self, filename_without_ext: str) -> Optional[dict]:
+        row = self._connection().execute("SELECT data FROM tasks WHERE output_filename = ? LIMIT 1", (filename_without_ext,)).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def pop_expired(self, before_timestamp: float) -> List[dict]:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute("SELECT data FROM tasks WHERE timestamp < ?", (before_timestamp,)).fetchall()
+            connection.execute("DELETE FROM tasks WHERE timestamp < ?", (before_timestamp,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return [self._row_to_task(row) for row in rows]
+
+    def list_active(self) -> List[dict]:
+        rows = self._connection().execute("SELECT data FROM tasks WHERE status IN (?, ?)", ACTIVE_STATUSES).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def close(self):
+        """关闭所有线程（包括 asyncio.to_thread 的线程池线程）打开的连接。"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, set()
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+def is_owner_alive(owner: str) -> bool:
+    """判断 current_owner() 格式的进程标识是否仍在运行；其它主机上的进程无法判断，视为存活。"""
+    host, _, rest = owner.partition(":")
+    pid, _, token = rest.partition(":")
+    if host != socket.gethostname():
+        return True
+    if pid == str(os.getpid()):
+        return token == _process_token
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+def create_task_store(backend: str = task_store_backend) -> TaskStore:
+    """根据 PODCAST_TASK_STORE 创建任务存储。"""
+    if backend == "memory":
+        return MemoryTaskStore()
+    if backend == "sqlite":
+        return SQLiteTaskStore(task_db_path)
+    raise ValueError(f"Unsupported task store: {backend}. Expected 'sqlite' or 'memory'.")
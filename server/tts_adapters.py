@@ -7,17 +7,209 @@ import uuid
 import urllib.parse
 import re # Add re import
 import time # Add time import
+import copy
+import asyncio
+import weakref
+import hashlib
+import threading
+from collections import OrderedDict
 from abc import ABC, abstractmethod
-from typing import Optional # Add Optional import
+from typing import Callable, Optional # Add Optional import
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+import metrics
+from audio_processing import AudioBuffer, decode_audio_buffer, save_audio_buffer
+from audio_stream import JsonAudioStreamDecoder
+
+try:
+    import httpx # 仅异步适配器需要 httpx
+except ImportError:
+    httpx = None
+
+# 同步 HTTP 会话连接池配置：每个适配器实例对同一主机最多保持的 keep-alive 连接数
+http_pool_size = int(os.getenv("PODCAST_TTS_HTTP_POOL_SIZE", "32"))
+# 异步 HTTP 客户端连接池配置
+async_http_max_connections = int(os.getenv("PODCAST_TTS_ASYNC_MAX_CONNECTIONS", "100"))
+# 适配器注册表最多缓存的适配器实例数
+adapter_registry_max_entries = int(os.getenv("PODCAST_TTS_ADAPTER_REGISTRY_SIZE", "32"))
+
+# 流式读取 JSON 内嵌音频（Minimax hex、Gemini base64）时每次读取的字节数，决定解码时额外占用的内存
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+class ConnectionStats:
+    """
+    按服务商统计 TTS HTTP 请求数和新建连接数（TCP 连接与 TLS 握手），用于观察 keep-alive 连接复用效果。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _entry(self, provider: str) -> dict:
+        entry = self._stats.get(provider)
+        if entry is None:
+            entry = self._stats[provider] = {"requests": 0, "connections": 0, "tls_handshakes": 0}
+        return entry
+
+    def record_request(self, provider: str):
+        with self._lock:
+            self._entry(provider)["requests"] += 1
+
+    def record_connection(self, provider: str, tls: bool):
+        with self._lock:
+            entry = self._entry(provider)
+            entry["connections"] += 1
+            if tls:
+                entry["tls_handshakes"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snapshot = {}
+            for provider, entry in self._stats.items():
+                reused = max(0, entry["requests"] - entry["connections"])
+                snapshot[provider] = dict(entry, reused=reused, reuse_ratio=round(reused / entry["requests"], 4) if entry["requests"] else 0.0)
+            return snapshot
+
+connection_stats = ConnectionStats()
+
+def _counting_pool_class(base_class, provider: str, tls: bool):
+    class CountingConnectionPool(base_class):
+        def _new_conn(self):
+            connection_stats.record_connection(provider, tls)
+            return super()._new_conn()
+    return CountingConnectionPool
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """统计请求数与新建连接数的 requests 传输适配器。"""
+    def __init__(self, provider: str, **kwargs):
+        self.provider = provider # 必须在 super().__init__ 之前设置，init_poolmanager 会用到
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool_class(HTTPConnectionPool, self.provider, tls=False),
+            "https": _counting_pool_class(HTTPSConnectionPool, self.provider, tls=True),
+        }
+
+    def send(self, request, *args, **kwargs):
+        connection_stats.record_request(self.provider)
+        return super().send(request, *args, **kwargs)
+
+def create_http_session(provider: str) -> requests.Session:
+    """
+    创建带 keep-alive 连接池的 requests.Session，连接池大小由 PODCAST_TTS_HTTP_POOL_SIZE 控制。
+    """
+    session = requests.Session()
+    adapter = _CountingHTTPAdapter(provider, pool_connections=8, pool_maxsize=http_pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+if httpx is not None:
+    class _CountingAsyncTransport(httpx.AsyncHTTPTransport):
+        """统计请求数与新建连接数的 httpx 传输层，服务商名称取自请求扩展 tts_provider。"""
+        async def handle_async_request(self, request):
+            provider = request.extensions.get("tts_provider", request.url.host)
+            connection_stats.record_request(provider)
+
+            async def trace(event_name, info):
+                if event_name == "connection.connect_tcp.complete":
+                    connection_stats.record_connection(provider, tls=False)
+                elif event_name == "connection.start_tls.complete":
+                    connection_stats.record_connection(provider, tls=True)
+
+            request.extensions = dict(request.extensions, trace=trace)
+            return await super().handle_async_request(request)
+
+# 每个事件循环共享一个 httpx.AsyncClient
+_async_http_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def get_async_http_client():
+    """
+    返回当前事件循环共享的 httpx.AsyncClient，所有异步 TTS 请求复用同一个连接池。
+    """
+    if httpx is None:
+        raise ImportError("The 'httpx' module is required for async TTS adapters. Please install it using 'pip install httpx'.")
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(max_connections=async_http_max_connections, max_keepalive_connections=async_http_max_connections)
+        client = httpx.AsyncClient(transport=_CountingAsyncTransport(limits=limits))
+        _async_http_clients[loop] = client
+    return client
+
+async def aclose_async_http_client():
+    """关闭当前事件循环共享的 httpx.AsyncClient。"""
+    client = _async_http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+class TTSRequestError(RuntimeError):
+    """
+    调用 TTS 接口失败。status_code 为 HTTP 状态码（如果有），retry_after 为服务端建议的重试等待秒数。
+    """
+    def __init__(self, message: str, status_code: Optional[int] = None, timeout: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+    @property
+    def overloaded(self) -> bool:
+        """429、5xx 和超时表示服务商过载，并发控制应据此降低并发。"""
+        return self.timeout or self.status_code == 429 or (self.status_code is not None and self.status_code >= 500)
+
+    @classmethod
+    def from_exception(cls, message: str, error: BaseException) -> "TTSRequestError":
+        """根据 requests 或 httpx 的异常构造 TTSRequestError。"""
+        response = getattr(error, "response", None)
+        status_code = getattr(response, "status_code", None)
+        retry_after = None
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                retry_after = None
+        timeout = isinstance(error, requests.exceptions.Timeout) or (httpx is not None and isinstance(error, httpx.TimeoutException))
+        return cls(message, status_code=status_code, timeout=timeout, retry_after=retry_after)
 
 class TTSAdapter(ABC):
     """
     抽象基类，定义 TTS 适配器的接口。
     """
     @abstractmethod
+    def synthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        """
+        根据文本和语音代码合成语音，以内存中的音频缓冲区返回，不读写任何文件。
+
+        Args:
+            text (str): 要转换为语音的文本。
+            voice_code (str): 用于生成语音的语音代码。
+
+        Returns:
+            AudioBuffer: 服务商返回的音频数据及其格式信息。
+
+        Raises:
+            Exception: 如果音频生成失败。
+        """
+        pass
+
+    # True 表示 synthesize_streaming 在音频到达时分块交付（而不是合成完成后一次性交付）
+    streams_audio = False
+
+    def synthesize_streaming(self, text: str, voice_code: str, on_chunk: Optional[Callable[[bytes], None]]) -> AudioBuffer:
+        """
+        synthesize 的分块交付版本：音频块按到达顺序交给 on_chunk（拼接起来即完整音频），下游可以边接收边处理；
+        返回值与 synthesize 相同。默认实现在合成完成后一次性交付，支持流式响应的适配器覆盖此方法并设置 streams_audio。
+        """
+        audio = self.synthesize(text, voice_code)
+        if on_chunk is not None:
+            on_chunk(audio.data)
+        return audio
+
     def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
         """
-        根据文本和语音代码生成音频文件。
+        根据文本和语音代码生成音频文件（synthesize 的文件版本）。
 
         Args:
             text (str): 要转换为语音的文本。
@@ -31,353 +223,607 @@ class TTSAdapter(ABC):
         Raises:
             Exception: 如果音频生成失败。
         """
-        pass
+        audio = self._apply_audio_effects(self.synthesize(text, voice_code), volume_adjustment, speed_adjustment)
+        audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}{audio.extension}")
+        save_audio_buffer(audio, audio_file)
+        print(f"Generated {os.path.basename(audio_file)}")
+        return audio_file
+
+    provider_name = "tts"
+    session: Optional[requests.Session] = None
+
+    @property
+    def http_extensions(self) -> dict:
+        """异步请求的扩展参数，用于按服务商统计连接。"""
+        return {"tts_provider": self.provider_name}
+
+    def close(self):
+        """关闭适配器持有的 HTTP 会话及其连接池。"""
+        if self.session is not None:
+            self.session.close()
+
+    def cache_fingerprint(self) -> str:
+        """
+        返回影响合成结果的适配器配置指纹（请求模板或 URL 模板，不含 headers 中的凭据），用于片段缓存键。
+        """
+        template = getattr(self, "request_payload_template", None)
+        if template is None and hasattr(self, "api_url_template"):
+            template = getattr(self, "tts_extra_params", {}).get("api_url", self.api_url_template)
+        return json.dumps(template, ensure_ascii=False, sort_keys=True, default=str)
 
-    def _apply_audio_effects(self, audio_file_path: str, volume_adjustment: float, speed_adjustment: float) -> str:
+    def _apply_audio_effects(self, audio: AudioBuffer, volume_adjustment: float, speed_adjustment: float) -> AudioBuffer:
         """
-        对音频文件应用音量和速度调整。
+        对音频缓冲区应用音量和速度调整。
+        音频只解码一次，音量和速度在同一次解码中调整（ffmpeg volume + atempo 滤镜），结果为无损的规范 PCM，
+        全程在内存中完成，不产生中间文件，也不做有损重编码。
         Args:
-            audio_file_path (str): 原始音频文件路径。
+            audio (AudioBuffer): 原始音频。
             volume_adjustment (float): 音量调整值。例如，6.0 表示增加 6dB，-3.0 表示减少 3dB。
             speed_adjustment (float): 速度调整值，正数增加，负数减少。speed_adjustment 是百分比，例如 10 表示 +10%，-10 表示 -10%。
         Returns:
-            str: 调整后的音频文件路径。
+            AudioBuffer: 调整后的音频。
         Raises:
-            ImportError: 如果 'pydub' 模块未安装。
+            ImportError: 如果 'numpy' 模块未安装。
             RuntimeError: 如果音频效果调整失败。
         """
         if volume_adjustment == 0.0 and speed_adjustment == 0.0:
-            return audio_file_path
+            return audio
 
+        effects_start_time = time.perf_counter()
         try:
-            from pydub import AudioSegment
+            samples = decode_audio_buffer(audio, volume_adjustment=volume_adjustment, speed_adjustment=speed_adjustment)
+            print(f"Applied volume adjustment of {volume_adjustment} dB and speed adjustment of {speed_adjustment}%")
+            return AudioBuffer.from_samples(samples)
         except ImportError:
-            raise ImportError("The 'pydub' module is required for audio adjustments. Please install it using 'pip install pydub'.")
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Error applying audio effects: {e}")
+        finally:
+            metrics.effects_seconds.observe(time.perf_counter() - effects_start_time)
 
-        current_audio_file = audio_file_path
-        base, ext = os.path.splitext(audio_file_path)
 
-        try:
-            audio = AudioSegment.from_file(current_audio_file)
-
-            # 应用音量调整
-            if volume_adjustment != 0.0:
-                adjusted_audio = audio + volume_adjustment
-                new_file_path = f"{base}_vol_adjusted{ext}"
-                adjusted_audio.export(new_file_path, format=ext[1:])
-                os.remove(current_audio_file)
-                current_audio_file = new_file_path
-                audio = adjusted_audio
-                print(f"Applied volume adjustment of {volume_adjustment} dB to {os.path.basename(current_audio_file)}")
-
-            # 应用速度调整
-            if speed_adjustment != 0.0:
-                speed_multiplier = 1 + speed_adjustment / 100.0
-                adjusted_audio = audio.speedup(playback_speed=speed_multiplier, chunk_size=150, crossfade=25)
-                new_file_path = f"{base}_speed_adjusted{ext}"
-                adjusted_audio.export(new_file_path, format=ext[1:])
-                if current_audio_file != audio_file_path and os.path.exists(current_audio_file): # 只有当 current_audio_file 是中间文件时才删除
-                    os.remove(current_audio_file)
-                else: # 如果没有音量调整，current_audio_file 仍然是原始文件
-                    os.remove(audio_file_path)
-                current_audio_file = new_file_path
-                print(f"Applied speed adjustment of {speed_adjustment}% to {os.path.basename(current_audio_file)}")
-
-            return current_audio_file
+class AsyncTTSAdapter(ABC):
+    """
+    抽象基类，定义异步 TTS 适配器的接口。异步实现基于共享的 httpx.AsyncClient，
+    在事件循环中并发大量 TTS 请求时无需为每个请求占用一个线程。
+    """
+    @abstractmethod
+    async def asynthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        """
+        synthesize 的异步版本，参数与返回值相同。
+        """
+        pass
 
-        except Exception as e:
-            # 如果发生错误，清理任何中间文件
-            if current_audio_file != audio_file_path and os.path.exists(current_audio_file):
-                os.remove(current_audio_file)
-            raise RuntimeError(f"Error applying audio effects to {os.path.basename(audio_file_path)}: {e}")
+    async def asynthesize_streaming(self, text: str, voice_code: str, on_chunk: Optional[Callable[[bytes], None]]) -> AudioBuffer:
+        """
+        synthesize_streaming 的异步版本，参数与返回值相同；on_chunk 在事件循环中调用，不能阻塞。
+        """
+        audio = await self.asynthesize(text, voice_code)
+        if on_chunk is not None:
+            on_chunk(audio.data)
+        return audio
+
+    async def agenerate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
+        """
+        generate_audio 的异步版本，参数与返回值相同。
+        """
+        audio = await self._aapply_audio_effects(await self.asynthesize(text, voice_code), volume_adjustment, speed_adjustment)
+        audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}{audio.extension}")
+        await asyncio.to_thread(save_audio_buffer, audio, audio_file)
+        print(f"Generated {os.path.basename(audio_file)}")
+        return audio_file
+
+    async def _aapply_audio_effects(self, audio: AudioBuffer, volume_adjustment: float, speed_adjustment: float) -> AudioBuffer:
+        """在线程中执行音频效果调整（解码为阻塞操作），避免阻塞事件循环。"""
+        if volume_adjustment == 0.0 and speed_adjustment == 0.0:
+            return audio
+        return await asyncio.to_thread(self._apply_audio_effects, audio, volume_adjustment, speed_adjustment)
 
 
-class IndexTTSAdapter(TTSAdapter):
+class IndexTTSAdapter(TTSAdapter, AsyncTTSAdapter):
     """
     IndexTTS 的 TTS 适配器实现。
     """
+    provider_name = "index-tts"
+
     def __init__(self, api_url_template: str, tts_extra_params: Optional[dict] = None):
         self.api_url_template = api_url_template
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = create_http_session(self.provider_name)
 
-    def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
+    def _build_api_url(self, text: str, voice_code: str) -> str:
         encoded_text = urllib.parse.quote(text)
 
-        self.api_url_template = self.tts_extra_params.get("api_url", self.api_url_template)
-        api_url = self.api_url_template.replace("{{text}}", encoded_text).replace("{{voiceCode}}", voice_code)
+        api_url_template = self.tts_extra_params.get("api_url", self.api_url_template)
+        api_url = api_url_template.replace("{{text}}", encoded_text).replace("{{voiceCode}}", voice_code)
 
         if not api_url:
             raise ValueError("API URL is not configured for IndexTTS. Cannot generate audio.")
+        return api_url
+
+    def synthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        api_url = self._build_api_url(text, voice_code)
 
         try:
             print(f"Calling IndexTTS API with voice {voice_code}...")
-            response = requests.get(api_url, stream=True, timeout=30)
+            response = self.session.get(api_url, timeout=30)
             response.raise_for_status()
-
-            temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.wav")
-            with open(temp_audio_file, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            print(f"Generated {os.path.basename(temp_audio_file)}")
-            # 应用音量调整
-            final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
-            return final_audio_file
+            return AudioBuffer(response.content, "wav")
 
         except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Error calling IndexTTS API with voice {voice_code}: {e}")
+            raise TTSRequestError.from_exception(f"Error calling IndexTTS API with voice {voice_code}: {e}", e)
         except Exception as e: # Catch other potential errors like JSON parsing or data decoding
             raise RuntimeError(f"Error processing IndexTTS API response for voice {voice_code}: {e}")
 
-class EdgeTTSAdapter(TTSAdapter):
+    async def asynthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        api_url = self._build_api_url(text, voice_code)
+
+        try:
+            print(f"Calling IndexTTS API (async) with voice {voice_code}...")
+            response = await get_async_http_client().get(api_url, timeout=30, extensions=self.http_extensions)
+            response.raise_for_status()
+            return AudioBuffer(response.content, "wav")
+
+        except httpx.HTTPError as e:
+            raise TTSRequestError.from_exception(f"Error calling IndexTTS API with voice {voice_code}: {e}", e)
+        except Exception as e:
+            raise RuntimeError(f"Error processing IndexTTS API response for voice {voice_code}: {e}")
+
+class EdgeTTSAdapter(TTSAdapter, AsyncTTSAdapter):
     """
     EdgeTTS 的 TTS 适配器实现。
     """
+    provider_name = "edge-tts"
+
     def __init__(self, api_url_template: str, tts_extra_params: Optional[dict] = None):
         self.api_url_template = api_url_template
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = create_http_session(self.provider_name)
 
-    def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
+    def _build_api_url(self, text: str, voice_code: str) -> str:
         encoded_text = urllib.parse.quote(text)
 
-        self.api_url_template = self.tts_extra_params.get("api_url", self.api_url_template)
-        api_url = self.api_url_template.replace("{{text}}", encoded_text).replace("{{voiceCode}}", voice_code)
+        api_url_template = self.tts_extra_params.get("api_url", self.api_url_template)
+        api_url = api_url_template.replace("{{text}}", encoded_text).replace("{{voiceCode}}", voice_code)
 
         if not api_url:
             raise ValueError("API URL is not configured for EdgeTTS. Cannot generate audio.")
+        return api_url
+
+    def synthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        api_url = self._build_api_url(text, voice_code)
 
         try:
             print(f"Calling EdgeTTS API with voice {voice_code}...")
-            response = requests.get(api_url, stream=True, timeout=30)
+            response = self.session.get(api_url, timeout=30)
             response.raise_for_status()
-
-            temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.mp3")
-            with open(temp_audio_file, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            print(f"Generated {os.path.basename(temp_audio_file)}")
-            # 应用音量调整
-            final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
-            return final_audio_file
+            return AudioBuffer(response.content, "mp3")
 
         except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Error calling EdgeTTS API with voice {voice_code}: {e}")
+            raise TTSRequestError.from_exception(f"Error calling EdgeTTS API with voice {voice_code}: {e}", e)
         except Exception as e: # Catch other potential errors like JSON parsing or data decoding
             raise RuntimeError(f"Error processing EdgeTTS API response for voice {voice_code}: {e}")
 
+    async def asynthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        api_url = self._build_api_url(text, voice_code)
+
+        try:
+            print(f"Calling EdgeTTS API (async) with voice {voice_code}...")
+            response = await get_async_http_client().get(api_url, timeout=30, extensions=self.http_extensions)
+            response.raise_for_status()
+            return AudioBuffer(response.content, "mp3")
+
+        except httpx.HTTPError as e:
+            raise TTSRequestError.from_exception(f"Error calling EdgeTTS API with voice {voice_code}: {e}", e)
+        except Exception as e:
+            raise RuntimeError(f"Error processing EdgeTTS API response for voice {voice_code}: {e}")
 # 尝试导入 msgpack
-class FishAudioAdapter(TTSAdapter):
+class FishAudioAdapter(TTSAdapter, AsyncTTSAdapter):
     """
     FishAudio 的 TTS 适配器实现。
     """
+    provider_name = "fish-audio"
+
     def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None):
         self.api_url = api_url
         self.headers = headers
         self.request_payload_template = request_payload_template
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = create_http_session(self.provider_name)
 
-    def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
+    def _build_request(self, text: str, voice_code: str):
+        """构造 msgpack 请求体和请求头（每次请求使用独立副本，适配器实例可被并发调用）。"""
         try:
             import msgpack # 延迟导入 msgpack
         except ImportError:
             raise ImportError("The 'msgpack' module is required for FishAudioAdapter. Please install it using 'pip install msgpack'.")
 
         # 构造请求体
-        payload = self.request_payload_template.copy()
+        payload = copy.deepcopy(self.request_payload_template)
         payload["text"] = text
         payload["reference_id"] = voice_code
-        self.headers["Authorization"] = self.headers["Authorization"].replace("{{api_key}}", self.tts_extra_params["api_key"])
+        headers = dict(self.headers)
+        headers["Authorization"] = headers["Authorization"].replace("{{api_key}}", self.tts_extra_params["api_key"])
 
         # 使用 msgpack 打包请求体
         packed_payload = msgpack.packb(payload, use_bin_type=True)
+        return packed_payload, headers
+
+    def synthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        packed_payload, headers = self._build_request(text, voice_code)
 
         try:
             print(f"Calling FishAudio API with voice {voice_code}...")
-            response = requests.post(self.api_url, data=packed_payload, headers=self.headers, timeout=60) # Increased timeout for FishAudio
-
-            temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.mp3")
-            with open(temp_audio_file, "wb") as f:
-                f.write(response.content)
-
-            print(f"Generated {os.path.basename(temp_audio_file)}")
-            # 应用音量调整
-            final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
-            return final_audio_file
+            response = self.session.post(self.api_url, data=packed_payload, headers=headers, timeout=60) # Increased timeout for FishAudio
+            response.raise_for_status()
+            return AudioBuffer(response.content, "mp3")
 
         except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Error calling FishAudio API with voice {voice_code}: {e}")
+            raise TTSRequestError.from_exception(f"Error calling FishAudio API with voice {voice_code}: {e}", e)
         except Exception as e: # Catch other potential errors like JSON parsing or data decoding
             raise RuntimeError(f"Error processing FishAudio API response for voice {voice_code}: {e}")
 
+    async def asynthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        packed_payload, headers = self._build_request(text, voice_code)
+
+        try:
+            print(f"Calling FishAudio API (async) with voice {voice_code}...")
+            response = await get_async_http_client().post(self.api_url, content=packed_payload, headers=headers, timeout=60, extensions=self.http_extensions)
+            response.raise_for_status()
+            return AudioBuffer(response.content, "mp3")
+
+        except httpx.HTTPError as e:
+            raise TTSRequestError.from_exception(f"Error calling FishAudio API with voice {voice_code}: {e}", e)
+        except Exception as e:
+            raise RuntimeError(f"Error processing FishAudio API response for voice {voice_code}: {e}")
+
 
-class MinimaxAdapter(TTSAdapter):
+class MinimaxAdapter(TTSAdapter, AsyncTTSAdapter):
     """
     Minimax 的 TTS 适配器实现。
     """
+    provider_name = "minimax"
+
     def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None):
         self.api_url = api_url
         self.headers = headers
         self.request_payload_template = request_payload_template
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = create_http_session(self.provider_name)
 
-    def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
-
+    def _build_request(self, text: str, voice_code: str):
+        """构造请求 URL、请求体和请求头（每次请求使用独立副本，适配器实例可被并发调用）。"""
         # 构造请求体
-        payload = self.request_payload_template.copy()
+        payload = copy.deepcopy(self.request_payload_template)
         payload["text"] = text
         payload["voice_setting"]["voice_id"] = voice_code
-        self.headers["Authorization"] = self.headers["Authorization"].replace("{{api_key}}", self.tts_extra_params["api_key"])
-        self.api_url = self.api_url.replace("{{group_id}}", self.tts_extra_params["group_id"])
-
-        # Minimax 返回十六进制编码的音频数据，需要解码
-        if payload.get("output_format") == "hex":
-            is_hex_output = True
-        else:
-            is_hex_output = False
+        headers = dict(self.headers)
+        headers["Authorization"] = headers["Authorization"].replace("{{api_key}}", self.tts_extra_params["api_key"])
+        api_url = self.api_url.replace("{{group_id}}", self.tts_extra_params["group_id"])
+        return api_url, payload, headers
+
+    @staticmethod
+    def _extract_audio_url(response_data: dict) -> str:
+        """从响应 JSON 中取出音频下载 URL（output_format 不是 hex 时）。"""
+        audio_url = response_data.get('data', {}).get('audio')
+        if not audio_url:
+            raise RuntimeError("Minimax API returned success but no audio URL found when output_format is not hex.")
+        return audio_url
+
+    @staticmethod
+    def _hex_audio_buffer(decoder: JsonAudioStreamDecoder) -> AudioBuffer:
+        """流式解码结束后检查结果；没有音频时用响应中的 base_resp 报告错误。"""
+        decoder.close()
+        if not decoder.audio:
+            try:
+                base_resp = decoder.envelope().get('base_resp')
+            except ValueError:
+                base_resp = None
+            raise RuntimeError(f"Minimax API returned no audio data: {base_resp}")
+        return AudioBuffer(decoder.audio, "mp3")
+
+    def synthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        api_url, payload, headers = self._build_request(text, voice_code)
+
+        # Minimax 返回十六进制编码的音频数据，边接收边解码
+        is_hex_output = payload.get("output_format") == "hex"
             
         try:
             print(f"Calling Minimax API with voice {voice_code}...")
-            response = requests.post(self.api_url, json=payload, headers=self.headers, timeout=60) # Increased timeout for Minimax
-
-            temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.mp3")
-            response_data = response.json()
-            # 解析并保存音频数据
-            if is_hex_output:
-                audio_hex = response_data.get('data', {}).get('audio')
-                audio_bytes = bytes.fromhex(audio_hex)
-                with open(temp_audio_file, "wb") as f:
-                    f.write(audio_bytes)
-            else:
-                audio_url = response_data.get('data', {}).get('audio')
-                if not audio_url:
-                    raise RuntimeError("Minimax API returned success but no audio URL found when output_format is not hex.")
-                
-                # 下载音频文件
-                audio_response = requests.get(audio_url, stream=True, timeout=30)
-                audio_response.raise_for_status()
-                with open(temp_audio_file, 'wb') as f:
-                    for chunk in audio_response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-
-            print(f"Generated {os.path.basename(temp_audio_file)}")
-            # 应用音量调整
-            final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
-            return final_audio_file
+            with self.session.post(api_url, json=payload, headers=headers, stream=True, timeout=60) as response: # Increased timeout for Minimax
+                response.raise_for_status()
+                if is_hex_output:
+                    decoder = JsonAudioStreamDecoder("audio", "hex")
+                    for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+                        decoder.feed(chunk)
+                    return self._hex_audio_buffer(decoder)
+                audio_url = self._extract_audio_url(response.json())
+
+            # 下载音频文件
+            audio_response = self.session.get(audio_url, timeout=30)
+            audio_response.raise_for_status()
+            return AudioBuffer(audio_response.content, "mp3")
 
         except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Error calling Minimax API with voice {voice_code}: {e}")
+            raise TTSRequestError.from_exception(f"Error calling Minimax API with voice {voice_code}: {e}", e)
         except Exception as e: # Catch other potential errors like JSON parsing or data decoding
             raise RuntimeError(f"Error processing Minimax API response for voice {voice_code}: {e}")
 
+    async def asynthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        api_url, payload, headers = self._build_request(text, voice_code)
+        is_hex_output = payload.get("output_format") == "hex"
 
-class DoubaoTTSAdapter(TTSAdapter):
+        try:
+            print(f"Calling Minimax API (async) with voice {voice_code}...")
+            client = get_async_http_client()
+            async with client.stream("POST", api_url, json=payload, headers=headers, timeout=60, extensions=self.http_extensions) as response:
+                response.raise_for_status()
+                if is_hex_output:
+                    decoder = JsonAudioStreamDecoder("audio", "hex")
+                    async for chunk in response.aiter_bytes(chunk_size=_STREAM_CHUNK_SIZE):
+                        decoder.feed(chunk)
+                    return self._hex_audio_buffer(decoder)
+                await response.aread()
+                audio_url = self._extract_audio_url(response.json())
+
+            audio_response = await client.get(audio_url, timeout=30, extensions=self.http_extensions)
+            audio_response.raise_for_status()
+            return AudioBuffer(audio_response.content, "mp3")
+
+        except httpx.HTTPError as e:
+            raise TTSRequestError.from_exception(f"Error calling Minimax API with voice {voice_code}: {e}", e)
+        except Exception as e:
+            raise RuntimeError(f"Error processing Minimax API response for voice {voice_code}: {e}")
+
+
+class DoubaoTTSAdapter(TTSAdapter, AsyncTTSAdapter):
     """
     豆包TTS 的 TTS 适配器实现。
     """
+    provider_name = "doubao-tts"
+
     def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None):
         self.api_url = api_url
         self.headers = headers
         self.request_payload_template = request_payload_template
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
-
-    def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
-        session = requests.Session()
+        self.session = create_http_session(self.provider_name)
+
+    def _build_request(self, text: str, voice_code: str):
+        """构造请求体和请求头（每次请求使用独立副本，适配器实例可被并发调用）。"""
+        payload = copy.deepcopy(self.request_payload_template)
+        payload['req_params']['text'] = text
+        payload['req_params']['speaker'] = voice_code
+        headers = dict(self.headers)
+        headers["X-Api-App-Id"] = headers["X-Api-App-Id"].replace("{{X-Api-App-Id}}", self.tts_extra_params["X-Api-App-Id"])
+        headers["X-Api-Access-Key"] = headers["X-Api-Access-Key"].replace("{{X-Api-Access-Key}}", self.tts_extra_params["X-Api-Access-Key"])
+        return payload, headers
+
+    @staticmethod
+    def _consume_stream_line(line: str, audio_data: bytearray, on_chunk: Optional[Callable[[bytes], None]] = None) -> bool:
+        """
+        处理一行 NDJSON 流式响应，将其中的音频数据追加到 audio_data，并立即交给 on_chunk。
+        返回 True 表示流已结束（code 20000000）。
+        """
+        data = json.loads(line)
+
+        if data.get("code", 0) == 0 and "data" in data and data["data"]:
+            chunk = base64.b64decode(data["data"])
+            audio_data.extend(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+            return False
+        if data.get("code", 0) == 0 and "sentence" in data and data["sentence"]:
+            return False
+        if data.get("code", 0) == 20000000:
+            return True
+        if data.get("code", 0) > 0:
+            raise RuntimeError(f"Doubao TTS API returned error: {data}")
+        return False
+
+    @staticmethod
+    def _audio_buffer(audio_data: bytearray) -> AudioBuffer:
+        if not audio_data:
+            raise RuntimeError("Doubao TTS API returned success but no audio data received.")
+        return AudioBuffer(audio_data, "mp3")
+
+    streams_audio = True
+
+    def synthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        return self.synthesize_streaming(text, voice_code, None)
+
+    def synthesize_streaming(self, text: str, voice_code: str, on_chunk: Optional[Callable[[bytes], None]]) -> AudioBuffer:
         try:
-            payload = self.request_payload_template.copy()
-            payload['req_params']['text'] = text
-            payload['req_params']['speaker'] = voice_code
-            self.headers["X-Api-App-Id"] = self.headers["X-Api-App-Id"].replace("{{X-Api-App-Id}}", self.tts_extra_params["X-Api-App-Id"])
-            self.headers["X-Api-Access-Key"] = self.headers["X-Api-Access-Key"].replace("{{X-Api-Access-Key}}", self.tts_extra_params["X-Api-Access-Key"])
+            payload, headers = self._build_request(text, voice_code)
 
             print(f"Calling Doubao TTS API with voice {voice_code}...")
-            response = session.post(self.api_url, headers=self.headers, json=payload, stream=True, timeout=30)
-            response.raise_for_status()
-
             audio_data = bytearray()
-            for chunk in response.iter_lines(decode_unicode=True):
-                if not chunk:
-                    continue
-                data = json.loads(chunk)
-
-                if data.get("code", 0) == 0 and "data" in data and data["data"]:
-                    import base64
-                    chunk_audio = base64.b64decode(data["data"])
-                    audio_data.extend(chunk_audio)
-                    continue
-                if data.get("code", 0) == 0 and "sentence" in data and data["sentence"]:
-                    continue
-                if data.get("code", 0) == 20000000:
-                    break
-                if data.get("code", 0) > 0:
-                    raise RuntimeError(f"Doubao TTS API returned error: {data}")
-
-            if not audio_data:
-                raise RuntimeError("Doubao TTS API returned success but no audio data received.")
-
-            temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.mp3")
-            with open(temp_audio_file, "wb") as f:
-                f.write(audio_data)
-
-            print(f"Generated {os.path.basename(temp_audio_file)}")
-            # 应用音量调整
-            final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
-            return final_audio_file
+            with self.session.post(self.api_url, headers=headers, json=payload, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                for chunk in response.iter_lines(decode_unicode=True):
+                    if not chunk:
+                        continue
+                    if self._consume_stream_line(chunk, audio_data, on_chunk):
+                        break
+
+            return self._audio_buffer(audio_data)
 
         except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Error calling Doubao TTS API with voice {voice_code}: {e}")
+            raise TTSRequestError.from_exception(f"Error calling Doubao TTS API with voice {voice_code}: {e}", e)
         except Exception as e:
             raise RuntimeError(f"Error processing Doubao TTS API response for voice {voice_code}: {e}")
-        finally:
-            session.close()
 
+    async def asynthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        return await self.asynthesize_streaming(text, voice_code, None)
+
+    async def asynthesize_streaming(self, text: str, voice_code: str, on_chunk: Optional[Callable[[bytes], None]]) -> AudioBuffer:
+        try:
+            payload, headers = self._build_request(text, voice_code)
 
-class GeminiTTSAdapter(TTSAdapter):
+            print(f"Calling Doubao TTS API (async) with voice {voice_code}...")
+            audio_data = bytearray()
+            async with get_async_http_client().stream("POST", self.api_url, headers=headers, json=payload, timeout=30, extensions=self.http_extensions) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_lines():
+                    if not chunk:
+                        continue
+                    if self._consume_stream_line(chunk, audio_data, on_chunk):
+                        break
+
+            return self._audio_buffer(audio_data)
+
+        except httpx.HTTPError as e:
+            raise TTSRequestError.from_exception(f"Error calling Doubao TTS API with voice {voice_code}: {e}", e)
+        except Exception as e:
+            raise RuntimeError(f"Error processing Doubao TTS API response for voice {voice_code}: {e}")
+
+
+class GeminiTTSAdapter(TTSAdapter, AsyncTTSAdapter):
     """
     Gemini TTS 的 TTS 适配器实现。
     """
+    provider_name = "gemini-tts"
+
     def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None):
         self.api_url = api_url
         self.headers = headers
         self.request_payload_template = request_payload_template
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = create_http_session(self.provider_name)
 
-    def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
+    def _build_request(self, text: str, voice_code: str):
+        """构造请求 URL、请求体和请求头（每次请求使用独立副本，适配器实例可被并发调用）。"""
+        # 构造请求体
+        payload = copy.deepcopy(self.request_payload_template)
+        model_name = payload['model']
+        api_url = self.api_url.replace('{{model}}', model_name) if '{{model}}' in self.api_url else self.api_url
+
+        # 更新请求 payload
+        payload['contents'][0]['parts'][0]['text'] = text
+        payload['generationConfig']['speechConfig']['voiceConfig']['prebuiltVoiceConfig']['voiceName'] = voice_code
+
+        # 更新 headers 中的 API key
+        headers = dict(self.headers)
+        headers['x-goog-api-key'] = self.tts_extra_params.get('api_key')
+        return api_url, payload, headers
+
+    @staticmethod
+    def _audio_buffer(decoder: JsonAudioStreamDecoder) -> AudioBuffer:
+        """流式解码结束后检查结果，并从 inlineData 的 mimeType 中读取采样率。"""
+        decoder.close()
+        response_data = decoder.envelope()
+        if not decoder.audio:
+            raise RuntimeError(f"Gemini TTS API returned no audio data: {response_data}")
+        inline_data = response_data['candidates'][0]['content']['parts'][0]['inlineData']
+        rate_match = re.search(r"rate=(\d+)", inline_data.get('mimeType', ''))
+
+        # Gemini 返回的是原始 PCM 数据（16-bit 单声道，默认 24kHz），保存到文件时才写为 WAV
+        return AudioBuffer(decoder.audio, "pcm", sample_rate=int(rate_match.group(1)) if rate_match else 24000, channels=1)
+
+    def synthesize(self, text: str, voice_code: str) -> AudioBuffer:
         try:
-            # 构造请求体
-            payload = self.request_payload_template.copy()
-            model_name = payload['model']
-            api_url = self.api_url.replace('{{model}}', model_name) if '{{model}}' in self.api_url else self.api_url
+            api_url, payload, headers = self._build_request(text, voice_code)
 
-            # 更新请求 payload
-            payload['contents'][0]['parts'][0]['text'] = text
-            payload['generationConfig']['speechConfig']['voiceConfig']['prebuiltVoiceConfig']['voiceName'] = voice_code
+            print(f"Calling Gemini TTS API with voice {voice_code}...")
+            # inlineData.data 为 base64 编码的 PCM，边接收边解码
+            decoder = JsonAudioStreamDecoder("data", "base64")
+            with self.session.post(api_url, headers=headers, json=payload, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+                    decoder.feed(chunk)
 
-            # 更新 headers 中的 API key
-            gemini_api_key = self.tts_extra_params.get('api_key')
-            self.headers['x-goog-api-key'] = gemini_api_key
+            return self._audio_buffer(decoder)
 
-            print(f"Calling Gemini TTS API with voice {voice_code}...")
-            response = requests.post(api_url, headers=self.headers, json=payload, timeout=60)
-            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise TTSRequestError.from_exception(f"Error calling Gemini TTS API with voice {voice_code}: {e}", e)
+        except Exception as e:
+            raise RuntimeError(f"Error processing Gemini TTS API response for voice {voice_code}: {e}")
 
-            response_data = response.json()
-            audio_data_base64 = response_data['candidates'][0]['content']['parts'][0]['inlineData']['data']
-            audio_data_pcm = base64.b64decode(audio_data_base64)
+    async def asynthesize(self, text: str, voice_code: str) -> AudioBuffer:
+        try:
+            api_url, payload, headers = self._build_request(text, voice_code)
 
-            # Gemini 返回的是 PCM 数据，需要保存为 WAV
-            temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.wav") # 更改为 .wav 扩展名
-            import wave # 导入 wave 模块
-            with wave.open(temp_audio_file, "wb") as f:
-                f.setnchannels(1)
-                f.setsampwidth(2) # 假设 16-bit PCM
-                f.setframerate(24000) # 假设 24kHz 采样率
-                f.writeframes(audio_data_pcm)
+            print(f"Calling Gemini TTS API (async) with voice {voice_code}...")
+            decoder = JsonAudioStreamDecoder("data", "base64")
+            async with get_async_http_client().stream("POST", api_url, headers=headers, json=payload, timeout=60, extensions=self.http_extensions) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(chunk_size=_STREAM_CHUNK_SIZE):
+                    decoder.feed(chunk)
 
-            print(f"Generated {os.path.basename(temp_audio_file)}")
-            # 应用音量和速度调整
-            final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
-            return final_audio_file
+            return self._audio_buffer(decoder)
 
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Error calling Gemini TTS API with voice {voice_code}: {e}")
+        except httpx.HTTPError as e:
+            raise TTSRequestError.from_exception(f"Error calling Gemini TTS API with voice {voice_code}: {e}", e)
         except Exception as e:
-            raise RuntimeError(f"Error processing Gemini TTS API response for voice {voice_code}: {e}")
\ No newline at end of file
+            raise RuntimeError(f"Error processing Gemini TTS API response for voice {voice_code}: {e}")
+
+
+class AdapterRegistry:
+    """
+    进程级 TTS 适配器注册表。
+
+    按 (服务商, 配置指纹) 缓存已配置的适配器实例，不同任务使用相同配置（含凭据）时复用同一个适配器
+    及其 keep-alive 连接池，无需为每个片段重新建立 TCP+TLS 连接。超过 max_entries 时按 LRU 淘汰并关闭会话。
+    """
+    def __init__(self, max_entries: int = adapter_registry_max_entries):
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._adapters = OrderedDict()
+        self.hits = 0
+        self.created = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(provider: str, *config_parts) -> str:
+        """计算配置指纹；凭据只以哈希形式出现在键中。"""
+        serialized = json.dumps([provider, *config_parts], ensure_ascii=False, sort_keys=True, default=str)
+        return f"{provider}:{hashlib.sha256(serialized.encode('utf-8')).hexdigest()}"
+
+    def get_or_create(self, key: str, factory: Callable[[], TTSAdapter]) -> TTSAdapter:
+        with self._lock:
+            adapter = self._adapters.get(key)
+            if adapter is not None:
+                self._adapters.move_to_end(key)
+                self.hits += 1
+                return adapter
+
+        adapter = factory()
+        evicted = []
+        with self._lock:
+            existing = self._adapters.get(key)
+            if existing is not None: # 其它线程已创建
+                evicted.append(adapter)
+                adapter = existing
+                self.hits += 1
+            else:
+                self._adapters[key] = adapter
+                self.created += 1
+                while len(self._adapters) > self.max_entries:
+                    evicted.append(self._adapters.popitem(last=False)[1])
+                    self.evictions += 1
+        for evicted_adapter in evicted:
+            evicted_adapter.close()
+        return adapter
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._adapters),
+                "max_entries": self.max_entries,
+                "providers": sorted({key.split(":", 1)[0] for key in self._adapters}),
+                "hits": self.hits,
+                "created": self.created,
+                "evictions": self.evictions,
+                "connections": connection_stats.snapshot(),
+            }
+
+_adapter_registry: Optional[AdapterRegistry] = None
+_adapter_registry_lock = threading.Lock()
+
+def get_adapter_registry() -> AdapterRegistry:
+    """返回进程级的适配器注册表单例。"""
+    global _adapter_registry
+    with _adapter_registry_lock:
+        if _adapter_registry is None:
+            _adapter_registry = AdapterRegistry()
+        return _adapter_registry
@@ -0,0 +1,170 @@
+# tts_cache.py
+
+import os
+import json
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Optional
+from audio_processing import AudioBuffer, read_audio_buffer, save_audio_buffer
+
+# 全局配置
+tts_cache_dir = os.getenv("PODCAST_TTS_CACHE_DIR", os.path.join("data", "tts_cache")) # 与任务数据库同在 data 目录，容器重启后保留
+tts_cache_max_bytes = int(os.getenv("PODCAST_TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024))) # 默认 512MB，<=0 表示禁用缓存
+
+class SegmentCache:
+    """
+    基于内容寻址的 TTS 片段磁盘缓存。
+
+    键由 (provider, voice_code, 清洗后的 dialog, volume_adjustment, speed_adjustment, 适配器模板指纹) 的哈希构成，
+    值为 TTS 适配器合成的音频（读写时以 AudioBuffer 在内存中传递）。缓存按字节预算进行 LRU 淘汰，最近使用时间通过文件 mtime 持久化，
+    因此进程重启后仍能恢复淘汰顺序。
+    """
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict() # key -> (filename, size)，按最近使用排序
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(provider: str, voice_code: str, text: str, volume_adjustment: float, speed_adjustment: float, fingerprint: str) -> str:
+        """根据合成输入计算缓存键。"""
+        key_material = json.dumps(
+            [provider, voice_code, text, float(volume_adjustment), float(speed_adjustment), fingerprint],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+    def _load_index(self):
+        """扫描缓存目录，按 mtime 从旧到新重建 LRU 索引。"""
+        found = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(".tmp_"):
+                continue
+            file_path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            key = os.path.splitext(filename)[0]
+            found.append((stat.st_mtime, key, filename, stat.st_size))
+        for _, key, filename, size in sorted(found):
+            self._entries[key] = (filename, size)
+            self._total_bytes += size
+        self._evict_locked()
+
+    def _evict_locked(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, (filename, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.cache_dir, filename))
+            except OSError as e:
+                print(f"Error removing evicted cache entry {filename}: {e}")
+
+    def get(self, key: str) -> Optional[AudioBuffer]:
+        """查找缓存条目。命中时将音频读入内存并返回，不在输出目录中创建任何文件；未命中返回 None。"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        filename, size = entry
+        cached_path = os.path.join(self.cache_dir, filename)
+        try:
+            audio = read_audio_buffer(cached_path)
+            os.utime(cached_path, None)
+        except OSError:
+            # 条目可能已被其他进程淘汰
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self._total_bytes -= size
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, key: str, audio: AudioBuffer):
+        """将合成的音频写入缓存，并在超出字节预算时淘汰最久未使用的条目。"""
+        if not self.enabled:
+            return
+        if len(audio) == 0 or len(audio) > self.max_bytes:
+            return
+        filename = f"{key}{audio.extension}"
+        tmp_path = os.path.join(self.cache_dir, f".tmp_{uuid.uuid4().hex}")
+        try:
+            save_audio_buffer(audio, tmp_path)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, os.path.join(self.cache_dir, filename))
+        except OSError as e:
+            print(f"Error storing TTS cache entry {filename}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._entries[key] = (filename, size)
+            self._total_bytes += size
+            self.stores += 1
+            self._evict_locked()
+
+    def discard(self, key: str):
+        """删除缓存条目（例如缓存的音频无法解码）。"""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            self._total_bytes -= entry[1]
+        try:
+            os.remove(os.path.join(self.cache_dir, entry[0]))
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+_segment_cache: Optional[SegmentCache] = None
+_segment_cache_lock = threading.Lock()
+
+def get_segment_cache() -> SegmentCache:
+    """返回进程内共享的片段缓存实例。"""
+    global _segment_cache
+    if _segment_cache is None:
+        with _segment_cache_lock:
+            if _segment_cache is None:
+                _segment_cache = SegmentCache(tts_cache_dir, tts_cache_max_bytes)
+    return _segment_cache